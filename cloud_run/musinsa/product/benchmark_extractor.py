@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+랭킹 아이템 파서 마이크로벤치마크 (기존 .get 체인 파서 vs 선언형 추출기)
+---------------------------------
+- 녹화해 둔 랭킹 API 응답(JSON)의 PRODUCT_COLUMN 아이템에 두 파서를 반복 적용
+- 두 파서 결과가 같은지 함께 검사 (다른 아이템 수 출력)
+
+예) python benchmark_extractor.py --record 3 --record_dir payloads   # 카테고리별 3페이지 녹화
+    python benchmark_extractor.py payloads/*.json --rounds 200
+    python benchmark_extractor.py                                    # 녹화본이 없으면 합성 payload
+
+저장소에는 녹화본을 두지 않는다. 녹화본 없이 돌린 결과(속도 향상, 불일치 0건)는 합성 payload 기준이라
+실제 응답의 필드 분포나 누락 패턴과 다를 수 있다.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+from typing import Dict, List, Optional
+
+from field_extractor import extract_many
+from musinsa_product_crawler import PRODUCT_EXTRACTOR
+
+# ──────────────────────────────────────────────
+# 기존 파서 (비교 기준)
+# ──────────────────────────────────────────────
+def legacy_parse_product_item(item: Dict, rank: int) -> Optional[Dict]:
+    """기존 parse_product_item (.get 체인 + 텍스트마다 re.search) - 비교 기준"""
+    try:
+        product = {
+            'rank': rank,
+            'name': '',
+            'brand': '',
+            'price': '',
+            'original_price': '',
+            'discount_rate': '',
+            'rating': '',
+            'review_count': '',
+            'likes': '',
+            'image_url': '',
+            'product_url': '',
+            'product_id': '',
+            'number_of_views': 0,
+            'sales': 0
+        }
+
+        # 기본 상품 정보 추출
+        product['product_id'] = str(item.get('id', ''))
+
+        info = item.get('info', {})
+        if not info:
+            return None
+
+        product['name'] = info.get('productName', '')
+        product['brand'] = info.get('brandName', '')
+        product['price'] = str(info.get('finalPrice', ''))
+        product['discount_rate'] = str(info.get('discountRatio', ''))
+
+        # 원가 계산
+        if product['discount_rate'] and product['price']:
+            try:
+                final_price = int(product['price'])
+                discount_ratio = int(product['discount_rate'])
+                if discount_ratio > 0:
+                    original_price = int(final_price * 100 / (100 - discount_ratio))
+                    product['original_price'] = str(original_price)
+            except:
+                pass
+
+        # 이미지 정보 추출
+        image_info = item.get('image', {})
+        if image_info and 'url' in image_info:
+            product['image_url'] = image_info['url']
+
+        # 상품 URL 생성
+        if product['product_id']:
+            product['product_url'] = f"https://www.musinsa.com/goods/{product['product_id']}"
+
+        onclick_info = item.get('onClick', {})
+        if onclick_info and 'url' in onclick_info:
+            product['product_url'] = onclick_info['url']
+
+        # 리뷰 정보 추출
+        onclick_event = item.get('onClick', {}).get('eventLog', {}).get('amplitude', {}).get('payload', {})
+        if onclick_event:
+            product['review_count'] = onclick_event.get('reviewCount', '')
+            product['rating'] = onclick_event.get('reviewScore', '')
+
+        image_event = item.get('image', {}).get('onClickLike', {}).get('eventLog', {}).get('amplitude', {}).get(
+            'payload', {})
+        if image_event:
+            if not product['review_count']:
+                product['review_count'] = image_event.get('reviewCount', '')
+            if not product['rating']:
+                product['rating'] = image_event.get('reviewScore', '')
+
+        # 1. number_of_views 추출 (info.additionalInformation에서)
+        additional_info = info.get('additionalInformation', [])
+        if additional_info:
+            for info_item in additional_info:
+                text = info_item.get('text', '')
+
+                # "{number}명이 보는 중" 패턴 찾기
+                views_match = re.search(r'(\d+)명이 보는 중', text)
+                if views_match:
+                    product['number_of_views'] = int(views_match.group(1))
+
+                # 기존 likes 로직도 유지
+                if '명이 보는 중' in text:
+                    numbers = re.findall(r'\d+', text)
+                    if numbers and not product.get('likes'):
+                        product['likes'] = numbers[0]
+
+        # 2. sales 추출 (image.labels에서)
+        image_labels = image_info.get('labels', [])
+        if image_labels:
+            for label in image_labels:
+                text = label.get('text', '')
+
+                # "판매 {float}천개" 패턴 찾기
+                sales_match = re.search(r'판매 ([\d.]+)천개', text)
+                if sales_match:
+                    float_value = float(sales_match.group(1))
+                    product['sales'] = int(float_value * 1000)  # float * 1000
+                    break
+
+        if product['name'] and product['brand']:
+            return product
+
+    except Exception:
+        return None
+
+# ──────────────────────────────────────────────
+# payload
+# ──────────────────────────────────────────────
+def product_items(payload: Dict) -> List[Dict]:
+    items = []
+    for module in payload.get('data', {}).get('modules', []):
+        if module.get('type') == 'MULTICOLUMN' and 'items' in module:
+            items.extend(item for item in module['items'] if item.get('type') == 'PRODUCT_COLUMN')
+    return items
+
+
+def synthetic_payload(n: int, seed: int = 0) -> Dict:
+    """실제 응답 구조를 흉내 낸 랭킹 페이지 (녹화본이 없을 때만 사용)"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        event = {'eventLog': {'amplitude': {'payload': {
+            'reviewCount': rng.randint(0, 5000), 'reviewScore': rng.choice([90, 95, 98, ''])}}}}
+        additional = [{'text': rng.choice(['무료배송', '오늘출발', '쿠폰'])} for _ in range(rng.randint(0, 3))]
+        if rng.random() < 0.6:
+            additional.append({'text': f'{rng.randint(1, 900)}명이 보는 중'})
+        labels = [{'text': rng.choice(['단독', '한정', '신상'])} for _ in range(rng.randint(0, 2))]
+        if rng.random() < 0.5:
+            labels.append({'text': f'판매 {rng.randint(1, 99) / 10}천개'})
+        items.append({
+            'type': 'PRODUCT_COLUMN',
+            'id': 4000000 + i,
+            'info': {
+                'productName': f'상품 {i}', 'brandName': f'브랜드 {i % 50}',
+                'finalPrice': rng.randint(50, 900) * 100, 'discountRatio': rng.choice([0, 10, 25, 40]),
+                'additionalInformation': additional,
+            },
+            'image': {'url': f'https://image.msscdn.net/{i}.jpg', 'labels': labels,
+                      'onClickLike': event if rng.random() < 0.5 else {}},
+            'onClick': dict(event, url=f'https://www.musinsa.com/products/{4000000 + i}'),
+        })
+    return {'data': {'modules': [{'type': 'MULTICOLUMN', 'items': items}]}}
+
+
+def record_payloads(pages: int, record_dir: str) -> List[str]:
+    """카테고리별 랭킹 API 응답을 pages 페이지씩 저장"""
+    from musinsa_product_crawler import MusinsaProductCrawler
+    from utils import CATEGORY_MAPPING
+
+    os.makedirs(record_dir, exist_ok=True)
+    paths = []
+    session = None
+    for category_code in CATEGORY_MAPPING:
+        crawler = MusinsaProductCrawler(category_code=category_code, session=session)
+        session = crawler.session
+        for page in range(1, pages + 1):
+            data = crawler.fetch_products_page(page)
+            if not data:
+                break
+            path = os.path.join(record_dir, f'ranking_{category_code}_{page}.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            paths.append(path)
+    return paths
+
+
+# ──────────────────────────────────────────────
+# 벤치마크
+# ──────────────────────────────────────────────
+def _time_parser(parse_page, pages: List[List[Dict]], rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for items in pages:
+            parse_page(items)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("ranking item parser benchmark")
+    parser.add_argument("payloads", nargs="*", help="녹화한 랭킹 API 응답 JSON 파일")
+    parser.add_argument("--record", type=int, default=0, help="카테고리별로 녹화할 페이지 수")
+    parser.add_argument("--record_dir", default="payloads")
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--synthetic_items", type=int, default=640)
+    args = parser.parse_args()
+
+    paths = list(args.payloads)
+    if args.record:
+        paths += record_payloads(args.record, args.record_dir)
+
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                pages.append(product_items(json.load(f)))
+        source = f"{len(paths)} recorded payloads"
+    else:
+        pages = [product_items(synthetic_payload(args.synthetic_items))]
+        source = "synthetic payload"
+
+    n_items = sum(len(items) for items in pages)
+    print(f"[INFO] {source}, items: {n_items}, rounds: {args.rounds}")
+
+    def legacy_page(items):
+        return [p for p in (legacy_parse_product_item(item, i + 1) for i, item in enumerate(items)) if p]
+
+    def compiled_page(items):
+        return extract_many(PRODUCT_EXTRACTOR, items)
+
+    mismatches = sum(
+        1 for items in pages
+        for old, new in zip(legacy_page(items), compiled_page(items)) if old != new
+    ) + sum(abs(len(legacy_page(items)) - len(compiled_page(items))) for items in pages)
+
+    legacy_sec = _time_parser(legacy_page, pages, args.rounds)
+    compiled_sec = _time_parser(compiled_page, pages, args.rounds)
+    total = n_items * args.rounds
+    print(f"{'parser':>10} {'sec':>8} {'items/s':>12}")
+    print(f"{'legacy':>10} {legacy_sec:>8.3f} {total / legacy_sec:>12.0f}")
+    print(f"{'compiled':>10} {compiled_sec:>8.3f} {total / compiled_sec:>12.0f}")
+    print(f"[RESULT] speedup: {legacy_sec / compiled_sec:.2f}x, mismatched items: {mismatches} ({source})")
+
+
+# ──────────────────────────────────────────────
+if __name__ == "__main__":
+    main()
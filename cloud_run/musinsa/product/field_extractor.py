@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+선언형 필드 추출기
+- 필드 명세(경로 / 정규식 캡처 / 타입 변환)를 한 번 컴파일해서 아이템마다 같은 함수를 재사용
+- 컴파일 결과는 명세를 펼쳐 쓴 파이썬 함수 하나라 필드마다 함수 호출/루프 오버헤드가 없음
+- 정규식은 미리 컴파일하고, 고정 문자열(literal)이 들어 있는 텍스트에만 적용
+"""
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+MISSING = object()
+
+_LOOKUP_ERRORS = "(KeyError, IndexError, TypeError)"
+
+
+def _indent(lines: List[str], depth: int = 1) -> List[str]:
+    return ["    " * depth + line for line in lines]
+
+
+class _Compiler:
+    """명세 → 파이썬 소스. 상수/함수는 추출 함수의 키워드 기본값으로 묶어 지역 변수처럼 조회"""
+
+    def __init__(self):
+        self.consts: Dict[str, Any] = {}
+        self._n = 0
+
+    def name(self, prefix: str) -> str:
+        self._n += 1
+        return f"_{prefix}{self._n}"
+
+    def const(self, value: Any, prefix: str = "c") -> str:
+        name = self.name(prefix)
+        self.consts[name] = value
+        return name
+
+    def subscripts(self, keys: Sequence) -> str:
+        parts = []
+        for key in keys:
+            if isinstance(key, (str, int)) and not isinstance(key, bool):
+                parts.append(f"[{key!r}]")
+            else:
+                parts.append(f"[{self.const(key, 'k')}]")
+        return "".join(parts)
+
+
+class Path:
+    """중첩 경로 값 (예: Path('info', 'productName'))"""
+
+    def __init__(self, *keys):
+        self.keys = keys
+
+    def emit(self, target: str, c: _Compiler) -> List[str]:
+        return [
+            "try:",
+            f"    {target} = item{c.subscripts(self.keys)}",
+            f"except {_LOOKUP_ERRORS}:",
+            f"    {target} = MISSING",
+        ]
+
+
+class First:
+    """여러 경로 중 처음으로 값이 있는(truthy) 것. 모두 비어 있으면 마지막으로 찾은 값"""
+
+    def __init__(self, *sources):
+        self.sources = sources
+
+    def emit(self, target: str, c: _Compiler) -> List[str]:
+        lines = self.sources[0].emit(target, c)
+        for source in self.sources[1:]:
+            tmp = c.name("f")
+            block = source.emit(tmp, c) + [f"if {tmp} is not MISSING:", f"    {target} = {tmp}"]
+            lines += [f"if {target} is MISSING or not {target}:"] + _indent(block)
+        return lines
+
+
+class Scan:
+    """리스트 경로의 각 원소 텍스트에 정규식을 적용해 캡처 그룹 추출
+
+    literal 을 주면 그 문자열이 들어 있는 텍스트에만 정규식을 돌린다.
+    last=True 면 마지막 매치, 아니면 첫 매치.
+    """
+
+    def __init__(self, list_path: Sequence, pattern: str, key: str = 'text',
+                 literal: Optional[str] = None, group: int = 1, last: bool = False):
+        self.list_path = list_path
+        self.pattern = pattern
+        self.key = key
+        self.literal = literal
+        self.group = group
+        self.last = last
+
+    def emit(self, target: str, c: _Compiler) -> List[str]:
+        entries, entry, text, match = c.name("l"), c.name("e"), c.name("t"), c.name("m")
+        search = c.const(re.compile(self.pattern).search, "re")
+
+        body = [f"{text} = {entry}.get({self.key!r}, '')"]
+        if self.literal is not None:
+            body += [f"if {self.literal!r} not in {text}:", "    continue"]
+        body += [f"{match} = {search}({text})"]
+
+        loop = ["try:"] + _indent(body) + [
+            "except (AttributeError, TypeError):",
+            "    continue",
+            f"if {match}:",
+            f"    {target} = {match}.group({self.group})",
+        ]
+        if not self.last:
+            loop.append("    break")
+
+        return [
+            f"{target} = MISSING",
+            "try:",
+            f"    {entries} = item{c.subscripts(self.list_path)}",
+            f"except {_LOOKUP_ERRORS}:",
+            f"    {entries} = None",
+            f"if {entries} and isinstance({entries}, (list, tuple)):",
+            f"    for {entry} in {entries}:",
+        ] + _indent(loop, 2)
+
+
+class Field:
+    """출력 필드 하나
+
+    - source: Path / First / Scan (None 이면 derive 로만 계산)
+    - coerce: 찾은 값에 적용할 변환 (TypeError/ValueError 는 default 로 대체)
+    - derive: 값이 없을 때 다른 필드로 계산하는 함수 (record → value)
+    """
+
+    def __init__(self, name: str, source=None, coerce: Optional[Callable] = None,
+                 default: Any = '', derive: Optional[Callable[[Dict], Any]] = None):
+        self.name = name
+        self.source = source
+        self.coerce = coerce
+        self.default = default
+        self.derive = derive
+
+
+def compile_extractor(fields: List[Field], required: Sequence[str] = ()) -> Callable[..., Optional[Dict]]:
+    """필드 명세 → extract(item, record=None) 함수
+
+    record 로 미리 채울 값(예: rank)을 넘길 수 있다. required 필드가 비어 있으면 None.
+    생성한 소스는 extract.source 로 확인할 수 있다.
+    """
+    c = _Compiler()
+    body: List[str] = ["if record is None:", "    record = {}"]
+    derived: List[str] = []
+
+    for field in fields:
+        key = repr(field.name)
+        default = c.const(field.default, "d")
+        value = c.name("v")
+
+        if field.source is None:
+            body.append(f"{value} = MISSING")
+        else:
+            body += field.source.emit(value, c)
+
+        if field.coerce is not None:
+            coerce = c.const(field.coerce, "fn")
+            body += [
+                f"if {value} is MISSING:",
+                f"    record[{key}] = {default}",
+                "else:",
+                "    try:",
+                f"        record[{key}] = {coerce}({value})",
+                "    except (TypeError, ValueError):",
+                f"        record[{key}] = {default}",
+            ]
+        else:
+            body.append(f"record[{key}] = {default} if {value} is MISSING else {value}")
+
+        if field.derive is not None:
+            # 다른 필드가 모두 채워진 뒤 계산 (컬럼 순서는 위에서 잡은 자리 유지)
+            derive = c.const(field.derive, "fn")
+            derived += [
+                f"if {value} is MISSING:",
+                "    try:",
+                f"        record[{key}] = {derive}(record)",
+                "    except (TypeError, ValueError, ZeroDivisionError):",
+                f"        record[{key}] = {default}",
+            ]
+
+    body += derived
+    for name in required:
+        body += [f"if not record[{name!r}]:", "    return None"]
+    body.append("return record")
+
+    params = ", ".join(f"{name}={name}" for name in ["MISSING"] + list(c.consts))
+    source = "\n".join([f"def extract(item, record=None, *, {params}):"] + _indent(body)) + "\n"
+
+    namespace = dict(c.consts, MISSING=MISSING)
+    exec(compile(source, "<field_extractor>", "exec"), namespace)
+    extract = namespace["extract"]
+    extract.source = source
+    return extract
+
+
+def extract_many(extract: Callable[..., Optional[Dict]], items: Iterable[Dict],
+                 start_rank: int = 1) -> List[Dict]:
+    """페이지 아이템 일괄 추출 (rank 는 원래 위치 기준, 필수 필드가 빠진 아이템은 제외)"""
+    records = []
+    for rank, item in enumerate(items, start_rank):
+        record = extract(item, {'rank': rank})
+        if record is not None:
+            records.append(record)
+    return records
@@ -15,15 +15,21 @@ import io
 logger = logging.getLogger(__name__)
 
 
+def get_storage_client(project_id: Optional[str] = None) -> storage.Client:
+    """GCS 클라이언트 생성 (여러 카테고리 업로드에서 한 번 만들어 재사용)"""
+    if project_id:
+        return storage.Client(project=project_id)
+    return storage.Client()
+
+
 def upload_csv_to_gcs(bucket_name: str, dataframe: pd.DataFrame,
-                      destination_blob_name: str, project_id: Optional[str] = None) -> bool:
+                      destination_blob_name: str, project_id: Optional[str] = None,
+                      client: Optional[storage.Client] = None) -> bool:
     """DataFrame을 CSV로 GCS에 업로드"""
     try:
         # GCS 클라이언트 생성
-        if project_id:
-            client = storage.Client(project=project_id)
-        else:
-            client = storage.Client()
+        if client is None:
+            client = get_storage_client(project_id)
 
         # 버킷과 blob 객체 생성
         bucket = client.bucket(bucket_name)
@@ -45,6 +51,53 @@ def upload_csv_to_gcs(bucket_name: str, dataframe: pd.DataFrame,
         return False
 
 
+def upload_json_to_gcs(bucket_name: str, data: Any, destination_blob_name: str,
+                       project_id: Optional[str] = None,
+                       client: Optional[storage.Client] = None) -> bool:
+    """JSON 데이터를 GCS에 업로드"""
+    try:
+        # GCS 클라이언트 생성
+        if client is None:
+            client = get_storage_client(project_id)
+
+        # 버킷과 blob 객체 생성
+        bucket = client.bucket(bucket_name)
+        blob = bucket.blob(destination_blob_name)
+
+        # 데이터를 JSON 문자열로 변환
+        json_string = json.dumps(data, ensure_ascii=False, indent=2)
+
+        # GCS에 업로드
+        blob.upload_from_string(json_string, content_type='application/json')
+
+        logger.info(f"JSON 파일 GCS 업로드 완료: {destination_blob_name}")
+        return True
+
+    except Exception as e:
+        logger.error(f"JSON 파일 GCS 업로드 실패: {destination_blob_name}, 오류: {str(e)}")
+        return False
+
+
+def download_text_from_gcs(bucket_name: str, blob_name: str,
+                           project_id: Optional[str] = None,
+                           client: Optional[storage.Client] = None) -> Optional[str]:
+    """GCS 파일을 텍스트로 읽기 (없거나 실패 시 None)"""
+    try:
+        if client is None:
+            client = get_storage_client(project_id)
+
+        blob = client.bucket(bucket_name).blob(blob_name)
+        if not blob.exists():
+            logger.info(f"GCS 파일 없음: {blob_name}")
+            return None
+
+        return blob.download_as_text(encoding='utf-8')
+
+    except Exception as e:
+        logger.error(f"GCS 파일 읽기 실패: {blob_name}, 오류: {str(e)}")
+        return None
+
+
 def upload_file_to_gcs(bucket_name: str, source_file_name: str,
                        destination_blob_name: str, project_id: Optional[str] = None) -> bool:
     """로컬 파일을 GCS에 업로드"""
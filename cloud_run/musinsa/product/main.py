@@ -3,12 +3,16 @@
 무신사 데이터 수집 Cloud Run Job 애플리케이션 (Airflow DAG 통합)
 """
 
+import asyncio
 import json
 import os
 import logging
 import sys
+import time
 from datetime import datetime, timezone
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
+import aiohttp
 import pandas as pd
 
 # 로컬 환경일 경우 dotenv 로드
@@ -16,8 +20,14 @@ if os.environ.get("ENV", "").lower() != "production":
     load_dotenv()
 
 from musinsa_product_crawler import MusinsaProductCrawler
+from rate_limiter import AsyncTokenBucket
 from utils import CATEGORY_MAPPING
-from gcs_uploader import upload_csv_to_gcs
+from gcs_uploader import upload_csv_to_gcs, upload_json_to_gcs, get_storage_client
+from page_size_probe import DEFAULT_CANDIDATES, PageSizeCache, resolve_page_size
+from ranking_snapshot import (
+    RankingSnapshotStore, TRACKED_FIELDS, compact_snapshot, diff_rankings, needs_full_snapshot,
+    review_count_increases
+)
 
 # 로깅 설정
 logging.basicConfig(
@@ -26,11 +36,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 랭킹 API 기본 페이지 크기 (PAGE_SIZE_PROBE=true면 이보다 큰 크기를 탐색)
+RANKING_PAGE_SIZE = 40
+
 
 def main():
-    """메인 함수 - 환경변수에 따른 실행 모드 결정"""
+    """메인 함수 - 환경변수에 따른 실행 모드 결정 (CATEGORY_CODES가 있으면 다중 카테고리 모드)"""
     try:
-        result = run_product_job()
+        if os.environ.get("CATEGORY_CODES"):
+            result = run_multi_category_job()
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+        else:
+            result = run_product_job()
 
         if result.get("status") == "success":
             logger.info("작업이 성공적으로 완료되었습니다.")
@@ -59,31 +76,89 @@ def run_product_job():
 
     crawler = MusinsaProductCrawler(
         section_id="231",
-        size=40,
+        size=RANKING_PAGE_SIZE,
         max_pages=max_pages,
         category_code=category_code
     )
+    apply_probed_page_size([crawler])
 
     # 카테고리별 크롤링 실행
     result = crawler.crawl_single_category_ranking()
 
-    # GCS 업로드
+    store = get_snapshot_store()
+    state = store.load(category_code) if store else None
+
+    # GCS 업로드 (SNAPSHOT_DIFF=true면 주기적 전체 스냅샷 사이에는 변경분만)
+    published = {}
+    manifest = {}
     if result.get('products'):
-        success = upload_products_to_gcs(result, category_code)
-        result['gcs_uploaded'] = success
+        # 직전 스냅샷이 갱신되기 전에 review_count 증가분 비교
+        if review_manifest_enabled():
+            manifest = write_review_manifest(build_review_manifest(state, result['products']), category_code)
+        published = publish_ranking(result, category_code, store=store, state=state)
+        result['gcs_uploaded'] = published['gcs_uploaded']
 
     # Airflow Dynamic Task Mapping용 반환값
     return {
         "status": "success",
         "job_type": "product",
         "category_code": category_code,
+        "page_size": crawler.size,
         "gcs_uploaded": result.get('gcs_uploaded', False),
+        "snapshot_type": published.get('snapshot_type'),
+        "change_count": published.get('change_count'),
+        "review_manifest_count": manifest.get('count'),
+        "review_manifest_path": manifest.get('path'),
         "scraped_at": datetime.now(timezone.utc).isoformat()
     }
 
 
-def upload_products_to_gcs(result, category_code):
-    """상품 데이터 GCS 업로드"""
+def page_size_probe_enabled() -> bool:
+    return os.environ.get("PAGE_SIZE_PROBE", "false").lower() == "true"
+
+
+def get_page_size_cache(client=None) -> PageSizeCache:
+    """탐색한 페이지 크기 캐시 (PAGE_SIZE_CACHE_PATH 미지정 시 GCS 버킷 또는 로컬 state/)"""
+    base_path = os.environ.get("PAGE_SIZE_CACHE_PATH")
+    if not base_path:
+        bucket_name = os.environ.get("GCS_BUCKET_NAME")
+        if bucket_name and bucket_name != "your-bucket-name":
+            base_path = f"gs://{bucket_name}/state/musinsa/page_sizes"
+        else:
+            base_path = "state/page_sizes"
+    ttl_hours = float(os.environ.get("PAGE_SIZE_TTL_HOURS", "24"))
+    return PageSizeCache(base_path, ttl_hours, project_id=os.environ.get("GCS_PROJECT_ID"), client=client)
+
+
+def apply_probed_page_size(crawlers: List[MusinsaProductCrawler], client=None) -> int:
+    """랭킹 API가 실제로 지켜주는 최대 페이지 크기를 찾아(또는 캐시에서 읽어) 모든 크롤러에 적용
+
+    같은 섹션 API라 첫 카테고리로 한 번만 탐색한다. 페이지가 커진 만큼 max_pages를 줄여
+    수집 범위는 그대로 두고 요청 수만 줄인다.
+    """
+    crawler = crawlers[0]
+    if not page_size_probe_enabled():
+        return crawler.size
+
+    candidates = DEFAULT_CANDIDATES
+    if os.environ.get("PAGE_SIZE_CANDIDATES"):
+        candidates = [int(v) for v in os.environ["PAGE_SIZE_CANDIDATES"].split(",") if v.strip()]
+
+    size = resolve_page_size(f"ranking_section_{crawler.section_id}", crawler.fetch_product_ids,
+                             crawler.size, get_page_size_cache(client), candidates)
+    for c in crawlers:
+        c.apply_page_size(size)
+    return size
+
+
+def upload_products_to_gcs(result, category_code, now_utc: Optional[datetime] = None, client=None):
+    """상품 데이터 GCS 업로드 (now_utc를 넘기면 여러 카테고리가 같은 실행 시각 파일명을 사용)"""
+    return upload_category_csv_to_gcs(result['products'], category_code, "products", now_utc, client)
+
+
+def upload_category_csv_to_gcs(rows: List[Dict], category_code: str, dataset: str,
+                               now_utc: Optional[datetime] = None, client=None):
+    """카테고리별 경로(raw-data/musinsa/{dataset}/{category}/YYYY/MM/DD/)에 CSV 업로드"""
     bucket_name = os.environ.get("GCS_BUCKET_NAME")
     if not bucket_name or bucket_name == "your-bucket-name":
         return False
@@ -91,21 +166,22 @@ def upload_products_to_gcs(result, category_code):
     try:
         category_name = CATEGORY_MAPPING.get(category_code, f"category_{category_code}")
         category_name = category_name.replace("/", "&")
-        now_utc = datetime.now(timezone.utc)
+        now_utc = now_utc or datetime.now(timezone.utc)
         year = now_utc.strftime("%Y")
         month = now_utc.strftime("%m")
         day = now_utc.strftime("%d")
         timestamp = now_utc.strftime("%Y%m%d_%H%M%S")
 
         filename = f"{category_name}_{timestamp}.csv"
-        gcs_path = f"raw-data/musinsa/products/{category_name}/{year}/{month}/{day}/{filename}"
+        gcs_path = f"raw-data/musinsa/{dataset}/{category_name}/{year}/{month}/{day}/{filename}"
 
-        df = pd.DataFrame(result['products'])
+        df = pd.DataFrame(rows)
         return upload_csv_to_gcs(
             bucket_name=bucket_name,
             dataframe=df,
             destination_blob_name = gcs_path,
-            project_id=os.environ.get("GCS_PROJECT_ID")
+            project_id=os.environ.get("GCS_PROJECT_ID"),
+            client=client
         )
 
     except Exception as e:
@@ -113,6 +189,236 @@ def upload_products_to_gcs(result, category_code):
         return False
 
 
+def snapshot_diff_enabled() -> bool:
+    return os.environ.get("SNAPSHOT_DIFF", "false").lower() == "true"
+
+
+def review_manifest_enabled() -> bool:
+    return os.environ.get("REVIEW_MANIFEST", "false").lower() == "true"
+
+
+def get_snapshot_store(client=None) -> Optional[RankingSnapshotStore]:
+    """직전 랭킹 스냅샷 저장소 (SNAPSHOT_STATE_PATH 미지정 시 GCS 버킷 또는 로컬 state/)
+
+    SNAPSHOT_DIFF(변경분 업로드) 또는 REVIEW_MANIFEST(리뷰 증가 상품 목록)가 켜져 있을 때만 사용
+    """
+    if not snapshot_diff_enabled() and not review_manifest_enabled():
+        return None
+
+    base_path = os.environ.get("SNAPSHOT_STATE_PATH")
+    if not base_path:
+        bucket_name = os.environ.get("GCS_BUCKET_NAME")
+        if bucket_name and bucket_name != "your-bucket-name":
+            base_path = f"gs://{bucket_name}/state/musinsa/ranking_snapshots"
+        else:
+            base_path = "state/ranking_snapshots"
+    return RankingSnapshotStore(base_path, project_id=os.environ.get("GCS_PROJECT_ID"), client=client)
+
+
+def publish_ranking(result, category_code, now_utc: Optional[datetime] = None, client=None,
+                    store: Optional[RankingSnapshotStore] = None, state: Optional[Dict] = None) -> Dict:
+    """랭킹 결과 업로드
+
+    store가 없으면 기존처럼 매번 전체 스냅샷(raw-data/musinsa/products/...).
+    SNAPSHOT_DIFF=true면 FULL_SNAPSHOT_HOURS마다 전체 스냅샷, 그 사이에는 직전 스냅샷(state) 대비
+    insert/update/delete 행만 raw-data/musinsa/product_changes/... 에 올린다.
+    업로드가 성공한 경우에만 직전 스냅샷을 갱신해서 변경분이 끊기지 않게 한다.
+    """
+    now_utc = now_utc or datetime.now(timezone.utc)
+    products = result['products']
+    if store is None:
+        uploaded = upload_products_to_gcs(result, category_code, now_utc, client)
+        return {"snapshot_type": "full", "change_count": len(products), "gcs_uploaded": uploaded}
+
+    full_every_hours = float(os.environ.get("FULL_SNAPSHOT_HOURS", "24"))
+    if not snapshot_diff_enabled() or needs_full_snapshot(state, now_utc, full_every_hours):
+        snapshot_type = "full"
+        change_count = len(products)
+        uploaded = upload_products_to_gcs(result, category_code, now_utc, client)
+        last_full_at = now_utc.isoformat()
+    else:
+        snapshot_type = "diff"
+        rows = diff_rankings(state['products'], products)
+        change_count = len(rows)
+        uploaded = upload_category_csv_to_gcs(rows, category_code, "product_changes", now_utc, client) \
+            if rows else True
+        last_full_at = state['last_full_at']
+        logger.info(f"카테고리 {category_code} 랭킹 변경분 {change_count}건 (전체 {len(products)}개 상품)")
+
+    if uploaded:
+        store.save(category_code, {
+            "scraped_at": result.get('scraped_at'),
+            "last_full_at": last_full_at,
+            "fields": list(TRACKED_FIELDS),
+            "products": compact_snapshot(products)
+        })
+    return {"snapshot_type": snapshot_type, "change_count": change_count, "gcs_uploaded": uploaded}
+
+
+def build_review_manifest(state: Optional[Dict], products: List[Dict]) -> List[Dict]:
+    """직전 크롤링 대비 review_count가 늘어난 상품 (증가량 큰 순)"""
+    min_increase = int(os.environ.get("MIN_REVIEW_INCREASE", "1"))
+    previous = state.get('products') if state else None
+    return review_count_increases(previous, products, min_increase)
+
+
+def write_review_manifest(entries: List[Dict], name: str, now_utc: Optional[datetime] = None,
+                          client=None) -> Dict:
+    """리뷰 작업용 manifest 업로드
+
+    manifests/musinsa/reviews/{name}/latest.json 을 리뷰 배치 작업의 PRODUCT_IDS_FILE로 지정하면
+    리뷰가 늘어난 상품만 증가량 순으로 수집한다. 날짜별 사본도 함께 남긴다.
+    """
+    bucket_name = os.environ.get("GCS_BUCKET_NAME")
+    if not bucket_name or bucket_name == "your-bucket-name":
+        logger.info(f"리뷰 manifest {name}: {len(entries)}개 상품 (GCS_BUCKET_NAME 미설정으로 업로드 생략)")
+        return {"count": len(entries), "path": None}
+
+    now_utc = now_utc or datetime.now(timezone.utc)
+    prefix = f"manifests/musinsa/reviews/{name}"
+    dated_path = f"{prefix}/{now_utc.strftime('%Y/%m/%d')}/{name}_{now_utc.strftime('%Y%m%d_%H%M%S')}.json"
+    latest_path = f"{prefix}/latest.json"
+
+    project_id = os.environ.get("GCS_PROJECT_ID")
+    uploaded = upload_json_to_gcs(bucket_name, entries, dated_path, project_id=project_id, client=client) \
+        and upload_json_to_gcs(bucket_name, entries, latest_path, project_id=project_id, client=client)
+    logger.info(f"리뷰 manifest {name}: {len(entries)}개 상품 -> gs://{bucket_name}/{latest_path}")
+    return {"count": len(entries), "path": f"gs://{bucket_name}/{latest_path}" if uploaded else None}
+
+
+def resolve_category_codes(value: str) -> List[str]:
+    """CATEGORY_CODES 값 해석 - "all"이면 CATEGORY_MAPPING 전체, 아니면 콤마 구분 코드"""
+    if value.strip().lower() == "all":
+        return list(CATEGORY_MAPPING)
+
+    codes = []
+    for code in value.split(","):
+        code = code.strip()
+        if not code:
+            continue
+        if code not in CATEGORY_MAPPING:
+            raise ValueError(f"알 수 없는 카테고리 코드: {code}")
+        if code not in codes:
+            codes.append(code)
+    return codes
+
+
+async def _crawl_categories(crawlers: List[MusinsaProductCrawler]) -> List[Dict]:
+    category_concurrency = int(os.environ.get("CATEGORY_CONCURRENCY", "4"))
+    requests_per_second = float(os.environ.get("REQUESTS_PER_SECOND", "4.0"))
+
+    # HTTP 커넥션 풀과 요청 속도 제한을 모든 카테고리가 공유
+    limiter = AsyncTokenBucket(requests_per_second, capacity=max(1, category_concurrency))
+    semaphore = asyncio.Semaphore(max(1, category_concurrency))
+    connector = aiohttp.TCPConnector(limit=max(1, category_concurrency))
+    timeout = aiohttp.ClientTimeout(total=10)
+
+    async def crawl(crawler: MusinsaProductCrawler) -> Dict:
+        async with semaphore:
+            started = time.monotonic()
+            result = await crawler.crawl_single_category_ranking_async(client, limiter)
+            result['elapsed_sec'] = round(time.monotonic() - started, 2)
+            result['request_sec'] = round(crawler.request_seconds, 2)
+            return result
+
+    async with aiohttp.ClientSession(headers=crawlers[0]._async_headers(), connector=connector,
+                                     timeout=timeout) as client:
+        return await asyncio.gather(*(crawl(crawler) for crawler in crawlers))
+
+
+def run_multi_category_job():
+    """여러 카테고리를 한 프로세스에서 동시에 크롤링하고 카테고리별 경로에 같은 실행 시각으로 업로드"""
+    started = time.monotonic()
+    category_codes = resolve_category_codes(os.environ["CATEGORY_CODES"])
+    max_pages = int(os.environ.get("MAX_PAGES", "8"))
+    # 카테고리별 컨테이너 방식의 컨테이너 기동/세션 준비 시간 (비교용 추정치)
+    container_overhead = float(os.environ.get("CONTAINER_OVERHEAD_SEC", "15"))
+
+    logger.info(f"다중 카테고리 상품 크롤링 시작 - {len(category_codes)}개 카테고리")
+
+    gcs_client = None
+    bucket_name = os.environ.get("GCS_BUCKET_NAME")
+    if bucket_name and bucket_name != "your-bucket-name":
+        gcs_client = get_storage_client(os.environ.get("GCS_PROJECT_ID"))
+
+    crawlers = []
+    session = None
+    for category_code in category_codes:
+        crawler = MusinsaProductCrawler(
+            section_id="231",
+            size=RANKING_PAGE_SIZE,
+            max_pages=max_pages,
+            category_code=category_code,
+            session=session
+        )
+        session = crawler.session
+        crawlers.append(crawler)
+    page_size = apply_probed_page_size(crawlers, gcs_client)
+
+    results = asyncio.run(_crawl_categories(crawlers))
+    crawl_sec = time.monotonic() - started
+
+    # 업로드는 실행 시각 하나로 묶어 카테고리 파티션 전체가 같은 스냅샷이 되도록 함
+    now_utc = datetime.now(timezone.utc)
+    store = get_snapshot_store(client=gcs_client)
+
+    categories = []
+    manifest_entries = []
+    for result in results:
+        published = {}
+        increases = []
+        if result.get('products'):
+            state = store.load(result['category_code']) if store else None
+            if review_manifest_enabled():
+                increases = build_review_manifest(state, result['products'])
+                manifest_entries.extend(increases)
+            published = publish_ranking(result, result['category_code'], now_utc, gcs_client, store, state)
+        categories.append({
+            "category_code": result['category_code'],
+            "status": result['status'],
+            "product_count": result.get('product_count', 0),
+            "gcs_uploaded": published.get('gcs_uploaded', False),
+            "snapshot_type": published.get('snapshot_type'),
+            "change_count": published.get('change_count'),
+            "review_increase_count": len(increases),
+            "elapsed_sec": result.get('elapsed_sec'),
+            "request_sec": result.get('request_sec')
+        })
+
+    # 카테고리를 합친 하나의 manifest (같은 상품이 여러 카테고리에 있으면 증가량 큰 쪽만)
+    manifest = {}
+    if review_manifest_enabled():
+        manifest_entries.sort(key=lambda e: -e['review_increase'])
+        deduped = {}
+        for entry in manifest_entries:
+            deduped.setdefault(entry['product_id'], entry)
+        manifest = write_review_manifest(list(deduped.values()), "all", now_utc, gcs_client)
+
+    wall_sec = time.monotonic() - started
+    error_count = sum(1 for c in categories if c["status"] != "success")
+    # 카테고리별 컨테이너: 각자 요청 시간 + 기동 시간 / 단일 프로세스: 전체 wall time + 기동 1회
+    per_category_container_sec = sum(c["request_sec"] or 0 for c in categories) \
+        + container_overhead * len(categories)
+    per_category_wall_sec = max((c["request_sec"] or 0 for c in categories), default=0) + container_overhead
+
+    return {
+        "status": "success" if error_count < len(categories) else "error",
+        "job_type": "product_multi",
+        "category_count": len(categories),
+        "page_size": page_size,
+        "error_count": error_count,
+        "product_count": sum(c["product_count"] for c in categories),
+        "crawl_sec": round(crawl_sec, 2),
+        "wall_sec": round(wall_sec, 2),
+        "container_sec": round(wall_sec + container_overhead, 2),
+        "per_category_wall_sec_est": round(per_category_wall_sec, 2),
+        "per_category_container_sec_est": round(per_category_container_sec, 2),
+        "review_manifest_count": manifest.get('count'),
+        "review_manifest_path": manifest.get('path'),
+        "categories": categories,
+        "scraped_at": now_utc.isoformat()
+    }
+
 
 if __name__ == "__main__":
     main()
@@ -3,9 +3,11 @@
 """
 무신사 크롤러 메인 (카테고리별 수집)
 """
+import asyncio
 import json
-import re
+import time
 
+import aiohttp
 import requests
 import logging
 from datetime import datetime, timezone
@@ -13,20 +15,67 @@ from typing import Dict, List, Optional
 from fake_useragent import UserAgent
 
 from utils import CATEGORY_MAPPING
+from rate_limiter import AsyncTokenBucket
+from field_extractor import Field, First, Path, Scan, compile_extractor, extract_many
+from page_size_probe import scale_max_pages
+from page_bounds import find_last_page
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_ONCLICK_PAYLOAD = ('onClick', 'eventLog', 'amplitude', 'payload')
+_LIKE_PAYLOAD = ('image', 'onClickLike', 'eventLog', 'amplitude', 'payload')
+
+
+def _original_price(product: Dict) -> str:
+    """할인율로 원가 역산 (할인이 없거나 값이 비정상이면 '')"""
+    final_price = int(product['price'])
+    discount_ratio = int(product['discount_rate'])
+    if 0 < discount_ratio < 100:
+        return str(int(final_price * 100 / (100 - discount_ratio)))
+    return ''
+
+
+def _product_url(product: Dict) -> str:
+    return f"https://www.musinsa.com/goods/{product['product_id']}" if product['product_id'] else ''
+
+
+# 랭킹 아이템 → 상품 행 명세 (필드 순서 = CSV 컬럼 순서)
+PRODUCT_FIELDS = [
+    Field('name', Path('info', 'productName')),
+    Field('brand', Path('info', 'brandName')),
+    Field('price', Path('info', 'finalPrice'), coerce=str),
+    Field('original_price', derive=_original_price),
+    Field('discount_rate', Path('info', 'discountRatio'), coerce=str),
+    Field('rating', First(Path(*_ONCLICK_PAYLOAD, 'reviewScore'), Path(*_LIKE_PAYLOAD, 'reviewScore'))),
+    Field('review_count', First(Path(*_ONCLICK_PAYLOAD, 'reviewCount'), Path(*_LIKE_PAYLOAD, 'reviewCount'))),
+    # "{number}명이 보는 중" 문구의 첫 숫자 (기존 likes 로직)
+    Field('likes', Scan(('info', 'additionalInformation'), r'(\d+)', literal='명이 보는 중')),
+    Field('image_url', Path('image', 'url')),
+    Field('product_url', Path('onClick', 'url'), derive=_product_url),
+    Field('product_id', Path('id'), coerce=str),
+    Field('number_of_views', Scan(('info', 'additionalInformation'), r'(\d+)명이 보는 중',
+                                  literal='명이 보는 중', last=True), coerce=int, default=0),
+    # "판매 {float}천개" → 개수
+    Field('sales', Scan(('image', 'labels'), r'판매 ([\d.]+)천개', literal='천개'),
+          coerce=lambda v: int(float(v) * 1000), default=0),
+]
+PRODUCT_EXTRACTOR = compile_extractor(PRODUCT_FIELDS, required=('name', 'brand'))
+
 
 class MusinsaProductCrawler:
     def __init__(self, section_id: str = "231", size: int = 40,
-                 max_pages: int = 5, category_code: str = "104001"):
-        self.session = self._setup_session()
+                 max_pages: int = 5, category_code: str = "104001",
+                 session: Optional[requests.Session] = None):
+        # 여러 카테고리를 한 프로세스에서 수집할 때는 세션(헤더/UserAgent)을 공유
+        self.session = session or self._setup_session()
         self.section_id = section_id
         self.size = size
         self.max_pages = max_pages
         self.scraped_at = None
         self.category_code = category_code
+        # 요청 응답 대기 시간 합계 (카테고리별 컨테이너로 돌렸을 때의 소요 시간 추정용)
+        self.request_seconds = 0.0
 
 
     def _setup_session(self) -> requests.Session:
@@ -47,8 +96,16 @@ class MusinsaProductCrawler:
         logger.info("세션 설정 완료")
         return session
 
-    def _build_api_url(self, page: int = 1) -> str:
-        """API URL 생성"""
+    def apply_page_size(self, size: int):
+        """탐색한 페이지 크기 적용 (max_pages는 기존 수집 범위(size × max_pages)를 유지하도록 조정)"""
+        if size == self.size:
+            return
+        self.max_pages = scale_max_pages(self.max_pages, self.size, size)
+        self.size = size
+        logger.info(f"카테고리 {self.category_code}: 페이지 크기 {size}, 최대 {self.max_pages}페이지")
+
+    def _build_api_url(self, page: int = 1, size: Optional[int] = None) -> str:
+        """API URL 생성 (size 미지정 시 self.size)"""
         if not self.category_code:
             raise ValueError("category_code가 설정되지 않았습니다.")
         base_url = f"https://api.musinsa.com/api2/hm/web/v5/pans/ranking/sections/{self.section_id}"
@@ -60,15 +117,15 @@ class MusinsaProductCrawler:
             'ageBand': 'AGE_BAND_ALL',
             'period': 'REALTIME',
             'page': page,
-            'size': self.size
+            'size': size or self.size
         }
 
         param_string = "&".join([f"{k}={v}" for k, v in params.items()])
         return f"{base_url}?{param_string}"
 
-    def fetch_products_page(self, page: int = 1) -> Optional[Dict]:
+    def fetch_products_page(self, page: int = 1, size: Optional[int] = None) -> Optional[Dict]:
         """단일 페이지 상품 데이터 수집"""
-        url = self._build_api_url(page)
+        url = self._build_api_url(page, size)
         try:
             logger.info(f"API 요청: {url}")
             response = self.session.get(url, timeout=10)
@@ -83,6 +140,61 @@ class MusinsaProductCrawler:
             logger.error(f"페이지 {page} JSON 파싱 실패: {e}")
             return None
 
+    def fetch_product_ids(self, page: int, size: int) -> Optional[List[str]]:
+        """페이지 크기 탐색용 - 해당 page/size 응답의 상품 id 목록 (요청 실패 시 None)"""
+        data = self.fetch_products_page(page, size)
+        if data is None:
+            return None
+        return [str(item.get('id', '')) for item in self._product_items(data)]
+
+    def find_last_page(self) -> int:
+        """max_pages 안에서 마지막으로 상품이 있는 페이지 (지수 탐색 + 이분 탐색). 실패 시 PageProbeError"""
+        def has_products(page: int) -> Optional[bool]:
+            data = self.fetch_products_page(page)
+            return None if data is None else bool(self._product_items(data))
+
+        last_page, _ = find_last_page(has_products, max_page=self.max_pages)
+        return last_page
+
+    @staticmethod
+    def _product_items(data: Dict) -> List[Dict]:
+        """응답의 MULTICOLUMN 모듈에서 PRODUCT_COLUMN 아이템만 추출"""
+        product_items = []
+        for module in data.get('data', {}).get('modules') or []:
+            if module.get('type') == 'MULTICOLUMN' and 'items' in module:
+                for item in module['items']:
+                    if item.get('type') == 'PRODUCT_COLUMN':
+                        product_items.append(item)
+        return product_items
+
+    def _async_headers(self) -> Dict[str, str]:
+        """requests 세션 헤더를 aiohttp용으로 변환 (brotli 미설치 환경 대비 br 제외)"""
+        headers = dict(self.session.headers)
+        headers['Accept-Encoding'] = 'gzip, deflate'
+        return headers
+
+    async def fetch_products_page_async(self, client: aiohttp.ClientSession,
+                                        limiter: AsyncTokenBucket, page: int = 1) -> Optional[Dict]:
+        """단일 페이지 상품 데이터 수집 (비동기, 여러 카테고리가 client/limiter 공유)"""
+        url = self._build_api_url(page)
+        await limiter.acquire()
+        started = time.monotonic()
+        try:
+            logger.info(f"API 요청: {url}")
+            async with client.get(url) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+            logger.info(f"페이지 {page} API 응답 성공")
+            return data
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"페이지 {page} API 요청 실패: {e}")
+            return None
+        except json.JSONDecodeError as e:
+            logger.error(f"페이지 {page} JSON 파싱 실패: {e}")
+            return None
+        finally:
+            self.request_seconds += time.monotonic() - started
+
     def parse_api_response(self, data: Dict, page: int) -> List[Dict]:
         """API 응답 데이터 파싱"""
         products = []
@@ -91,14 +203,7 @@ class MusinsaProductCrawler:
                 logger.warning(f"페이지 {page}: 예상된 API 응답 구조가 아닙니다.")
                 return products
 
-            modules = data['data']['modules']
-            product_items = []
-
-            for module in modules:
-                if module.get('type') == 'MULTICOLUMN' and 'items' in module:
-                    for item in module['items']:
-                        if item.get('type') == 'PRODUCT_COLUMN':
-                            product_items.append(item)
+            product_items = self._product_items(data)
 
             if not product_items:
                 logger.info(f"페이지 {page}: 상품 데이터가 없습니다.")
@@ -106,13 +211,12 @@ class MusinsaProductCrawler:
 
             logger.info(f"페이지 {page}: {len(product_items)}개 상품 아이템 발견")
 
-            for idx, item in enumerate(product_items):
-                product = self.parse_product_item(item, (page - 1) * self.size + idx + 1)
+            category_name = CATEGORY_MAPPING.get(self.category_code, f"category_{self.category_code}")
+            products = extract_many(PRODUCT_EXTRACTOR, product_items, start_rank=(page - 1) * self.size + 1)
+            for product in products:
                 product['scraped_at'] = self.scraped_at
-                product['category_name'] = CATEGORY_MAPPING.get(self.category_code, f"category_{self.category_code}")
+                product['category_name'] = category_name
                 product['category_code'] = self.category_code
-                if product:
-                    products.append(product)
 
         except Exception as e:
             logger.error(f"페이지 {page} API 응답 파싱 중 오류: {e}")
@@ -120,112 +224,63 @@ class MusinsaProductCrawler:
         return products
 
     def parse_product_item(self, item: Dict, rank: int) -> Optional[Dict]:
-        """개별 상품 아이템 파싱"""
+        """개별 상품 아이템 파싱 (PRODUCT_FIELDS 명세로 컴파일한 추출기 사용)"""
         try:
-            product = {
-                'rank': rank,
-                'name': '',
-                'brand': '',
-                'price': '',
-                'original_price': '',
-                'discount_rate': '',
-                'rating': '',
-                'review_count': '',
-                'likes': '',
-                'image_url': '',
-                'product_url': '',
-                'product_id': '',
-                'number_of_views': 0,
-                'sales': 0
-            }
-
-            # 기본 상품 정보 추출
-            product['product_id'] = str(item.get('id', ''))
-
-            info = item.get('info', {})
-            if not info:
-                return None
-
-            product['name'] = info.get('productName', '')
-            product['brand'] = info.get('brandName', '')
-            product['price'] = str(info.get('finalPrice', ''))
-            product['discount_rate'] = str(info.get('discountRatio', ''))
-
-            # 원가 계산
-            if product['discount_rate'] and product['price']:
-                try:
-                    final_price = int(product['price'])
-                    discount_ratio = int(product['discount_rate'])
-                    if discount_ratio > 0:
-                        original_price = int(final_price * 100 / (100 - discount_ratio))
-                        product['original_price'] = str(original_price)
-                except:
-                    pass
-
-            # 이미지 정보 추출
-            image_info = item.get('image', {})
-            if image_info and 'url' in image_info:
-                product['image_url'] = image_info['url']
-
-            # 상품 URL 생성
-            if product['product_id']:
-                product['product_url'] = f"https://www.musinsa.com/goods/{product['product_id']}"
-
-            onclick_info = item.get('onClick', {})
-            if onclick_info and 'url' in onclick_info:
-                product['product_url'] = onclick_info['url']
-
-            # 리뷰 정보 추출
-            onclick_event = item.get('onClick', {}).get('eventLog', {}).get('amplitude', {}).get('payload', {})
-            if onclick_event:
-                product['review_count'] = onclick_event.get('reviewCount', '')
-                product['rating'] = onclick_event.get('reviewScore', '')
-
-            image_event = item.get('image', {}).get('onClickLike', {}).get('eventLog', {}).get('amplitude', {}).get(
-                'payload', {})
-            if image_event:
-                if not product['review_count']:
-                    product['review_count'] = image_event.get('reviewCount', '')
-                if not product['rating']:
-                    product['rating'] = image_event.get('reviewScore', '')
-
-            # 1. number_of_views 추출 (info.additionalInformation에서)
-            additional_info = info.get('additionalInformation', [])
-            if additional_info:
-                for info_item in additional_info:
-                    text = info_item.get('text', '')
-
-                    # "{number}명이 보는 중" 패턴 찾기
-                    views_match = re.search(r'(\d+)명이 보는 중', text)
-                    if views_match:
-                        product['number_of_views'] = int(views_match.group(1))
-
-                    # 기존 likes 로직도 유지
-                    if '명이 보는 중' in text:
-                        numbers = re.findall(r'\d+', text)
-                        if numbers and not product.get('likes'):
-                            product['likes'] = numbers[0]
-
-            # 2. sales 추출 (image.labels에서)
-            image_labels = image_info.get('labels', [])
-            if image_labels:
-                for label in image_labels:
-                    text = label.get('text', '')
-
-                    # "판매 {float}천개" 패턴 찾기
-                    sales_match = re.search(r'판매 ([\d.]+)천개', text)
-                    if sales_match:
-                        float_value = float(sales_match.group(1))
-                        product['sales'] = int(float_value * 1000)  # float * 1000
-                        break
-
-            if product['name'] and product['brand']:
-                return product
-
+            return PRODUCT_EXTRACTOR(item, {'rank': rank})
         except Exception as e:
             logger.warning(f"상품 파싱 중 오류: {e}")
             return None
 
+    async def crawl_single_category_ranking_async(self, client: aiohttp.ClientSession,
+                                                  limiter: AsyncTokenBucket,
+                                                  last_page: Optional[int] = None) -> Dict:
+        """단일 카테고리 랭킹 크롤링 (비동기). 카테고리끼리는 동시에, 페이지는 순서대로 요청
+
+        last_page(find_last_page 결과)를 넘기면 1..last_page 를 한꺼번에 요청한다.
+        """
+        logger.info(f"카테고리 {self.category_code} 랭킹 크롤링 시작")
+
+        try:
+            self.scraped_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+            if last_page is not None:
+                pages = range(1, min(last_page, self.max_pages) + 1)
+                responses = await asyncio.gather(
+                    *(self.fetch_products_page_async(client, limiter, page) for page in pages))
+            else:
+                pages, responses = range(1, self.max_pages + 1), None
+
+            all_products = []
+            for index, page in enumerate(pages):
+                data = responses[index] if responses is not None \
+                    else await self.fetch_products_page_async(client, limiter, page)
+                if not data:
+                    break
+                products = self.parse_api_response(data, page)
+                if not products:
+                    break
+                all_products.extend(products)
+
+            return {
+                'status': 'success',
+                'category_code': self.category_code,
+                'category_name': CATEGORY_MAPPING.get(self.category_code, 'Unknown'),
+                'products': all_products,
+                'product_count': len(all_products),
+                'scraped_at': self.scraped_at
+            }
+
+        except Exception as e:
+            logger.error(f"카테고리 {self.category_code} 랭킹 크롤링 실패: {e}")
+            return {
+                'status': 'error',
+                'category_code': self.category_code,
+                'products': [],
+                'product_ids': [],
+                'product_count': 0,
+                'error_message': str(e)
+            }
+
     def crawl_single_category_ranking(self) -> Dict:
         """단일 카테고리 랭킹만 크롤링 (Airflow Dynamic Task Mapping용)"""
         logger.info(f"카테고리 {self.category_code} 랭킹 크롤링 시작")
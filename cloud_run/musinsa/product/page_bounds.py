@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+페이지형 목록 API의 마지막 페이지 탐색 (지수 탐색 + 이분 탐색)
+- has_items(page)가 True인 페이지가 1..last 에 연속해 있고 그 뒤로는 비어 있다고 가정
+- 요청 수는 O(log last) - 마지막 페이지를 안 뒤에는 1..last 를 한꺼번에 병렬로 요청할 수 있음
+"""
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PageProbeError(Exception):
+    """탐색 중 요청 실패 (빈 페이지와 구분 - 호출 측은 빈 페이지가 나올 때까지 순차 수집으로 대체)"""
+
+
+def find_last_page(has_items: Callable[[int], Optional[bool]], first_page: int = 1,
+                   start: int = 8, max_page: int = 10000) -> Tuple[int, Dict[int, bool]]:
+    """마지막으로 아이템이 있는 페이지 번호와 탐색한 페이지 결과를 반환
+
+    has_items는 페이지에 아이템이 있으면 True, 비어 있으면 False, 요청 실패면 None.
+    첫 페이지부터 비어 있으면 first_page - 1, max_page까지 모두 차 있으면 max_page.
+    """
+    probes: Dict[int, bool] = {}
+
+    def probe(page: int) -> bool:
+        if page not in probes:
+            result = has_items(page)
+            if result is None:
+                raise PageProbeError(f"페이지 {page} 요청 실패")
+            probes[page] = bool(result)
+        return probes[page]
+
+    if not probe(first_page):
+        return first_page - 1, probes
+
+    # 지수 탐색: 빈 페이지가 나올 때까지 간격을 두 배로
+    low, step = first_page, max(1, start)
+    high = None
+    while high is None:
+        page = min(low + step, max_page)
+        if page == low:
+            return low, probes
+        if probe(page):
+            low = page
+            step *= 2
+        else:
+            high = page
+
+    # 이분 탐색: low는 차 있고 high는 비어 있음
+    while high - low > 1:
+        mid = (low + high) // 2
+        if probe(mid):
+            low = mid
+        else:
+            high = mid
+
+    logger.info(f"마지막 페이지 {low} (탐색 요청 {len(probes)}회)")
+    return low, probes
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+API 페이지 크기 탐색 + TTL 캐시
+- 기본 크기보다 큰 후보 size 로 1페이지를 요청해 실제로 그만큼(중복 없이) 돌려주는 최대 크기를 찾음
+- 2페이지가 1페이지와 겹치지 않는지 확인해 page 오프셋이 size 단위인지 검증
+- 결과는 엔드포인트별 JSON({base_path}/{key}.json)에 TTL 과 함께 저장
+"""
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from gcs_uploader import download_text_from_gcs, upload_json_to_gcs, get_storage_client
+
+logger = logging.getLogger(__name__)
+
+# 기본 크기보다 큰 후보만 탐색 (랭킹 40, 리뷰 20)
+DEFAULT_CANDIDATES = (30, 40, 50, 60, 80, 100, 120, 150, 200)
+
+# (page, size) -> 아이템 id 목록 (요청 실패 시 None)
+FetchIds = Callable[[int, int], Optional[List[str]]]
+
+
+def probe_page_size(fetch_ids: FetchIds, baseline: int,
+                    candidates: Sequence[int] = DEFAULT_CANDIDATES) -> Tuple[int, bool]:
+    """서버가 실제로 지켜주는 최대 페이지 크기 탐색
+
+    반환: (size, conclusive). 데이터가 모자라 상한을 확인하지 못했거나 요청이 실패하면
+    conclusive=False (이번 실행에만 쓰고 캐시하지 않음).
+    """
+    base_ids = fetch_ids(1, baseline)
+    if not base_ids or len(base_ids) < baseline:
+        logger.info(f"기본 크기({baseline})만큼 데이터가 없어 페이지 크기 탐색 생략")
+        return baseline, False
+
+    best, best_ids = baseline, base_ids
+    conclusive = True
+    for size in sorted(c for c in candidates if c > baseline):
+        ids = fetch_ids(1, size)
+        if ids is None:
+            conclusive = False
+            break
+        if len(set(ids)) != len(ids):
+            logger.info(f"size={size}: 중복 아이템 발생 → {best} 사용")
+            break
+        if len(ids) == size:
+            best, best_ids = size, ids
+            continue
+        if len(ids) > best:
+            # 요청보다 적게 옴: 서버 상한이거나 데이터 끝. 다음 페이지가 있으면 서버 상한
+            next_ids = fetch_ids(2, len(ids))
+            if next_ids and not set(next_ids) & set(ids):
+                best, best_ids = len(ids), ids
+            else:
+                conclusive = False
+        break
+
+    if best > baseline:
+        # page 오프셋이 size 단위인지 확인 (겹치면 page 번호가 고정 크기 기준)
+        page2 = fetch_ids(2, best)
+        if page2 is None:
+            return baseline, False
+        if set(page2) & set(best_ids):
+            logger.info(f"size={best}: 2페이지가 1페이지와 겹침 → {baseline} 사용")
+            return baseline, True
+
+    return best, conclusive
+
+
+def scale_max_pages(max_pages: int, baseline: int, size: int) -> int:
+    """페이지 크기가 커진 만큼 최대 페이지 수를 줄여 수집 범위(아이템 수)는 그대로 유지"""
+    return max(1, -(-max_pages * baseline // size))
+
+
+class PageSizeCache:
+    """엔드포인트마다 {base_path}/{key}.json 에 탐색한 페이지 크기 보관 (ttl_hours 지나면 재탐색)"""
+
+    def __init__(self, base_path: str, ttl_hours: float = 24.0,
+                 project_id: Optional[str] = None, client=None):
+        self.base_path = base_path.rstrip("/")
+        self.ttl_seconds = ttl_hours * 3600
+        self.project_id = project_id
+        self.is_gcs = self.base_path.startswith("gs://")
+        self._client = client
+
+        if self.is_gcs:
+            self.bucket_name, _, self.prefix = self.base_path[len("gs://"):].partition("/")
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_storage_client(self.project_id)
+        return self._client
+
+    def _path(self, key: str) -> str:
+        if self.is_gcs:
+            return f"{self.prefix}/{key}.json" if self.prefix else f"{key}.json"
+        return os.path.join(self.base_path, f"{key}.json")
+
+    def get(self, key: str) -> Optional[int]:
+        try:
+            if self.is_gcs:
+                text = download_text_from_gcs(self.bucket_name, self._path(key), client=self.client)
+            else:
+                path = self._path(key)
+                text = None
+                if os.path.exists(path):
+                    with open(path, encoding="utf-8") as f:
+                        text = f.read()
+            if not text:
+                return None
+            entry = json.loads(text)
+            if time.time() - entry.get("probed_ts", 0) > self.ttl_seconds:
+                return None
+            return int(entry["size"])
+        except Exception as e:
+            logger.warning(f"페이지 크기 캐시({key}) 로드 실패: {e}")
+            return None
+
+    def put(self, key: str, size: int) -> bool:
+        entry = {
+            "key": key,
+            "size": size,
+            "probed_ts": time.time(),
+            "probed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if self.is_gcs:
+            return upload_json_to_gcs(self.bucket_name, entry, self._path(key), client=self.client)
+
+        try:
+            os.makedirs(self.base_path, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logger.error(f"페이지 크기 캐시({key}) 저장 실패: {e}")
+            return False
+
+
+def resolve_page_size(key: str, fetch_ids: FetchIds, baseline: int,
+                      cache: Optional[PageSizeCache] = None,
+                      candidates: Sequence[int] = DEFAULT_CANDIDATES) -> int:
+    """캐시가 살아 있으면 그 값, 아니면 탐색 후 (확정된 경우만) 캐시"""
+    if cache is not None:
+        cached = cache.get(key)
+        if cached:
+            logger.info(f"{key} 페이지 크기 캐시 사용: {cached}")
+            return cached
+
+    size, conclusive = probe_page_size(fetch_ids, baseline, candidates)
+    logger.info(f"{key} 페이지 크기 탐색 결과: {size} (기본 {baseline}, 확정 {conclusive})")
+    if cache is not None and conclusive:
+        cache.put(key, size)
+    return size
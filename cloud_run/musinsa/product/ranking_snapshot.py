@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+무신사 랭킹 스냅샷 비교 (이전 스냅샷 대비 신규/이탈/변경 필드만 추출)
+"""
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from gcs_uploader import download_text_from_gcs, upload_json_to_gcs, get_storage_client
+
+logger = logging.getLogger(__name__)
+
+# 카테고리별로 보관하는 비교 대상 필드 (product_id → [rank, price, review_count, sales])
+TRACKED_FIELDS = ('rank', 'price', 'review_count', 'sales')
+
+
+def compact_snapshot(products: List[Dict]) -> Dict[str, List]:
+    """상품 목록 → {product_id: [rank, price, review_count, sales]} (중복 id는 상위 순위만)"""
+    snapshot = {}
+    for product in products:
+        product_id = str(product.get('product_id', ''))
+        if product_id and product_id not in snapshot:
+            snapshot[product_id] = [product.get(field, '') for field in TRACKED_FIELDS]
+    return snapshot
+
+
+def _same(a, b) -> bool:
+    # CSV/JSON을 거치며 int ↔ str 이 섞여도 같은 값으로 취급
+    return str('' if a is None else a) == str('' if b is None else b)
+
+
+def diff_rankings(previous: Dict[str, List], products: List[Dict]) -> List[Dict]:
+    """이전 스냅샷 대비 변경분 행 목록
+
+    - insert: 새로 랭킹에 들어온 상품 (상품 정보 전체)
+    - update: 추적 필드가 바뀐 상품 (바뀐 필드의 현재/이전 값만, rank_delta 는 양수일수록 순위 상승)
+    - delete: 랭킹에서 빠진 상품 (이전 값만)
+    """
+    rows = []
+    current = compact_snapshot(products)
+    rank_idx = TRACKED_FIELDS.index('rank')
+
+    seen = set()
+    for product in products:
+        product_id = str(product.get('product_id', ''))
+        if not product_id or product_id in seen:
+            continue
+        seen.add(product_id)
+
+        meta = {
+            'product_id': product_id,
+            'category_code': product.get('category_code', ''),
+            'category_name': product.get('category_name', ''),
+            'scraped_at': product.get('scraped_at', ''),
+        }
+        prev = previous.get(product_id)
+        if prev is None:
+            rows.append({'change_type': 'insert', **product, **meta})
+            continue
+
+        changed = [field for idx, field in enumerate(TRACKED_FIELDS)
+                   if idx < len(prev) and not _same(prev[idx], current[product_id][idx])]
+        if not changed:
+            continue
+
+        row = {'change_type': 'update', **meta, 'changed_fields': ','.join(changed)}
+        for field in changed:
+            row[field] = product.get(field, '')
+            row[f'prev_{field}'] = prev[TRACKED_FIELDS.index(field)]
+        if 'rank' in changed:
+            try:
+                row['rank_delta'] = int(prev[rank_idx]) - int(product['rank'])
+            except (TypeError, ValueError):
+                pass
+        rows.append(row)
+
+    category = {k: products[0].get(k, '') for k in ('category_code', 'category_name', 'scraped_at')} if products else {}
+    for product_id, prev in previous.items():
+        if product_id in current:
+            continue
+        row = {'change_type': 'delete', 'product_id': product_id, **category}
+        for idx, field in enumerate(TRACKED_FIELDS):
+            if idx < len(prev):
+                row[f'prev_{field}'] = prev[idx]
+        rows.append(row)
+
+    return rows
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(float(str(value).replace(',', '').strip()))
+    except (TypeError, ValueError):
+        return None
+
+
+def review_count_increases(previous: Optional[Dict[str, List]], products: List[Dict],
+                           min_increase: int = 1) -> List[Dict]:
+    """직전 크롤링 대비 review_count가 늘어난 상품 목록 (증가량 큰 순)
+
+    직전 스냅샷에 없는 상품(첫 수집 포함)은 review_count 전체를 증가량으로 본다.
+    항목은 리뷰 작업의 PRODUCT_IDS_FILE 형식({"product_id", "category_code", "review_count"})을 따른다.
+    """
+    previous = previous or {}
+    review_idx = TRACKED_FIELDS.index('review_count')
+
+    entries = []
+    seen = set()
+    for product in products:
+        product_id = str(product.get('product_id', ''))
+        review_count = _to_int(product.get('review_count'))
+        if not product_id or product_id in seen or review_count is None:
+            continue
+        seen.add(product_id)
+
+        prev = previous.get(product_id)
+        prev_count = _to_int(prev[review_idx]) if prev and len(prev) > review_idx else None
+        increase = review_count - (prev_count or 0)
+        if increase < min_increase:
+            continue
+
+        entries.append({
+            'product_id': product_id,
+            'category_code': product.get('category_code', ''),
+            'review_count': review_count,
+            'previous_review_count': prev_count,
+            'review_increase': increase,
+            'rank': product.get('rank'),
+        })
+
+    entries.sort(key=lambda e: (-e['review_increase'], _to_int(e['rank']) or 0))
+    return entries
+
+
+def needs_full_snapshot(state: Optional[Dict], now_utc: datetime, full_every_hours: float) -> bool:
+    """이전 상태가 없거나 마지막 전체 스냅샷 이후 full_every_hours가 지났으면 전체 스냅샷"""
+    if not state or not state.get('products') or not state.get('last_full_at'):
+        return True
+    try:
+        last_full = datetime.fromisoformat(state['last_full_at'])
+    except (TypeError, ValueError):
+        return True
+    return (now_utc - last_full).total_seconds() >= full_every_hours * 3600
+
+
+class RankingSnapshotStore:
+    """카테고리마다 {base_path}/{category_code}.json 파일 하나에 직전 스냅샷 보관
+
+    카테고리별로 파일을 나눠서 카테고리별 Cloud Run 작업이 동시에 돌아도 서로 덮어쓰지 않는다.
+    base_path 예: gs://bucket/state/musinsa/ranking_snapshots 또는 ./state/ranking_snapshots
+    """
+
+    def __init__(self, base_path: str, project_id: Optional[str] = None, client=None):
+        self.base_path = base_path.rstrip("/")
+        self.project_id = project_id
+        self.is_gcs = self.base_path.startswith("gs://")
+        self._client = client
+
+        if self.is_gcs:
+            self.bucket_name, _, self.prefix = self.base_path[len("gs://"):].partition("/")
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_storage_client(self.project_id)
+        return self._client
+
+    def _path(self, category_code: str) -> str:
+        if self.is_gcs:
+            return f"{self.prefix}/{category_code}.json" if self.prefix else f"{category_code}.json"
+        return os.path.join(self.base_path, f"{category_code}.json")
+
+    def load(self, category_code: str) -> Optional[Dict]:
+        """직전 스냅샷 상태 (없거나 읽기 실패 시 None → 전체 스냅샷)"""
+        try:
+            if self.is_gcs:
+                text = download_text_from_gcs(self.bucket_name, self._path(category_code), client=self.client)
+            else:
+                path = self._path(category_code)
+                text = None
+                if os.path.exists(path):
+                    with open(path, encoding="utf-8") as f:
+                        text = f.read()
+            return json.loads(text) if text else None
+        except Exception as e:
+            logger.warning(f"카테고리 {category_code} 스냅샷 로드 실패, 전체 스냅샷으로 진행: {e}")
+            return None
+
+    def save(self, category_code: str, state: Dict) -> bool:
+        state = dict(state, category_code=category_code,
+                     updated_at=datetime.now(timezone.utc).isoformat())
+        if self.is_gcs:
+            return upload_json_to_gcs(self.bucket_name, state, self._path(category_code), client=self.client)
+
+        try:
+            os.makedirs(self.base_path, exist_ok=True)
+            path = self._path(category_code)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logger.error(f"카테고리 {category_code} 스냅샷 저장 실패: {e}")
+            return False
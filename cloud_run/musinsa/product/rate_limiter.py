@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+asyncio용 토큰 버킷 요청 속도 제한기
+"""
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    """초당 rate개 토큰을 채우고 최대 capacity개까지 버스트를 허용하는 토큰 버킷
+
+    여러 코루틴이 하나의 버킷을 공유하면 전체 요청 속도가 rate 이하로 유지된다.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate는 0보다 커야 합니다.")
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        # python 3.9의 asyncio.Lock은 생성 시점 이벤트 루프에 묶이므로 첫 사용 시 생성
+        self._lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """토큰을 얻을 때까지 대기"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
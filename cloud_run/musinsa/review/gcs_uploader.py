@@ -4,26 +4,36 @@ Google Cloud Storage 업로드 유틸리티 (Airflow 병렬 처리용)
 무신사 크롤러 전용 GCS 업로드 함수들
 """
 
+import csv
 import json
 import logging
 import pandas as pd
 from google.cloud import storage
-from typing import Any, Optional
+from typing import Any, List, Optional
 import io
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_UNIT = 256 * 1024
+DEFAULT_UPLOAD_CHUNK_SIZE = 4 * UPLOAD_CHUNK_UNIT  # 1MB
+
+
+def get_storage_client(project_id: Optional[str] = None) -> storage.Client:
+    """GCS 클라이언트 생성 (배치 작업에서 한 번 만들어 재사용)"""
+    if project_id:
+        return storage.Client(project=project_id)
+    return storage.Client()
+
 
 def upload_csv_to_gcs(bucket_name: str, dataframe: pd.DataFrame,
-                      destination_blob_name: str, project_id: Optional[str] = None) -> bool:
+                      destination_blob_name: str, project_id: Optional[str] = None,
+                      client: Optional[storage.Client] = None) -> bool:
     """DataFrame을 CSV로 GCS에 업로드"""
     try:
         # GCS 클라이언트 생성
-        if project_id:
-            client = storage.Client(project=project_id)
-        else:
-            client = storage.Client()
+        if client is None:
+            client = get_storage_client(project_id)
 
         # 버킷과 blob 객체 생성
         bucket = client.bucket(bucket_name)
@@ -45,15 +55,97 @@ def upload_csv_to_gcs(bucket_name: str, dataframe: pd.DataFrame,
         return False
 
 
+class ChunkedCsvUploader:
+    """CSV 행을 받는 대로 GCS resumable upload로 chunk 단위 전송
+
+    메모리에는 전송 대기 중인 chunk 하나만 남으므로 행 수와 무관하게 사용량이 일정하다.
+    첫 write_rows 호출 때 업로드를 시작하고, close()가 성공해야 객체가 생성된다.
+    abort()하거나 close하지 않으면 미완료 업로드는 버려져 부분 파일이 남지 않는다.
+    """
+
+    def __init__(self, bucket_name: str, destination_blob_name: str,
+                 project_id: Optional[str] = None, client: Optional[storage.Client] = None,
+                 chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE):
+        self.bucket_name = bucket_name
+        self.destination_blob_name = destination_blob_name
+        self.project_id = project_id
+        self.client = client
+        # resumable upload chunk는 256KB 배수여야 함
+        self.chunk_size = max(UPLOAD_CHUNK_UNIT, chunk_size // UPLOAD_CHUNK_UNIT * UPLOAD_CHUNK_UNIT)
+        self.row_count = 0
+        self.failed = False
+        self._file = None
+        self._writer = None
+
+    def _open(self, header: List[str]):
+        if self.client is None:
+            self.client = get_storage_client(self.project_id)
+        blob = self.client.bucket(self.bucket_name).blob(self.destination_blob_name)
+        self._file = blob.open("wt", chunk_size=self.chunk_size, content_type='text/csv',
+                               encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file, lineterminator='\n')
+        self._writer.writerow(header)
+
+    def write_rows(self, header: List[str], rows: List[List[Any]]):
+        """행 추가 (첫 호출의 header로 CSV 헤더 확정). 실패 후에는 무시"""
+        if self.failed or not rows:
+            return
+        try:
+            if self._writer is None:
+                self._open(header)
+            self._writer.writerows(rows)
+            self.row_count += len(rows)
+        except Exception as e:
+            self.failed = True
+            logger.error(f"CSV 스트리밍 업로드 실패: {self.destination_blob_name}, 오류: {str(e)}")
+
+    def close(self) -> bool:
+        """남은 chunk를 전송하고 업로드 완료"""
+        if self._file is None:
+            return False
+        if self.failed:
+            self.abort()
+            return False
+        try:
+            self._file.close()
+            self._file = None
+            logger.info(f"CSV 파일 GCS 업로드 완료: {self.destination_blob_name} ({self.row_count}행)")
+            return True
+        except Exception as e:
+            self.failed = True
+            self._file = None
+            logger.error(f"CSV 파일 GCS 업로드 실패: {self.destination_blob_name}, 오류: {str(e)}")
+            return False
+
+    def abort(self):
+        """업로드 중단 (resumable 세션을 취소해 객체가 생성되지 않음)
+
+        TextIOWrapper를 그냥 버리면 GC 때 BlobWriter.close()가 불려 마지막 chunk가 올라가고
+        부분 CSV가 커밋된다. google-cloud-storage 2.10.0의 BlobWriter에는 terminate()가 없으므로
+        내부 버퍼를 먼저 닫아 close()가 아무것도 올리지 않게 하고, 시작된 세션은 직접 DELETE로 취소한다.
+        """
+        if self._file is not None:
+            blob_writer = self._file.buffer
+            upload_and_transport = blob_writer._upload_and_transport
+            blob_writer._buffer.close()
+            if upload_and_transport:
+                upload, transport = upload_and_transport
+                try:
+                    transport.delete(upload.upload_url)
+                except Exception as e:
+                    # 버퍼가 닫혀 완료 요청은 가지 않으므로 객체는 생기지 않음 (세션은 GCS에서 만료됨)
+                    logger.warning(f"resumable 세션 취소 실패: {self.destination_blob_name}, 오류: {str(e)}")
+        self._file = None
+        self._writer = None
+
 def upload_json_to_gcs(bucket_name: str, data: Any, destination_blob_name: str,
-                       project_id: Optional[str] = None) -> bool:
+                       project_id: Optional[str] = None,
+                       client: Optional[storage.Client] = None) -> bool:
     """JSON 데이터를 GCS에 업로드"""
     try:
         # GCS 클라이언트 생성
-        if project_id:
-            client = storage.Client(project=project_id)
-        else:
-            client = storage.Client()
+        if client is None:
+            client = get_storage_client(project_id)
 
         # 버킷과 blob 객체 생성
         bucket = client.bucket(bucket_name)
@@ -73,6 +165,26 @@ def upload_json_to_gcs(bucket_name: str, data: Any, destination_blob_name: str,
         return False
 
 
+def download_text_from_gcs(bucket_name: str, blob_name: str,
+                           project_id: Optional[str] = None,
+                           client: Optional[storage.Client] = None) -> Optional[str]:
+    """GCS 파일을 텍스트로 읽기 (없거나 실패 시 None)"""
+    try:
+        if client is None:
+            client = get_storage_client(project_id)
+
+        blob = client.bucket(bucket_name).blob(blob_name)
+        if not blob.exists():
+            logger.info(f"GCS 파일 없음: {blob_name}")
+            return None
+
+        return blob.download_as_text(encoding='utf-8')
+
+    except Exception as e:
+        logger.error(f"GCS 파일 읽기 실패: {blob_name}, 오류: {str(e)}")
+        return None
+
+
 def upload_file_to_gcs(bucket_name: str, source_file_name: str,
                        destination_blob_name: str, project_id: Optional[str] = None) -> bool:
     """로컬 파일을 GCS에 업로드"""
@@ -3,21 +3,28 @@
 무신사 데이터 수집 Cloud Run Job 애플리케이션 (Airflow DAG 통합)
 """
 
+import asyncio
 import json
 import os
 import logging
 import sys
+import time
 from datetime import datetime, timezone
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
-import pandas as pd
+import aiohttp
 
 # 로컬 환경일 경우 dotenv 로드
 if os.environ.get("ENV", "").lower() != "production":
     load_dotenv()
 
-from musinsa_crawler import MusinsaReviewCrawler
-from utils import CATEGORY_MAPPING
-from gcs_uploader import upload_csv_to_gcs
+from musinsa_crawler import MusinsaReviewCrawler, NEWEST_FIRST_SORT
+from rate_limiter import AsyncTokenBucket
+from utils import CATEGORY_MAPPING, parse_review_count
+from gcs_uploader import ChunkedCsvUploader, download_text_from_gcs, get_storage_client
+from review_flattener import ReviewFlattener
+from page_size_probe import DEFAULT_CANDIDATES, PageSizeCache, resolve_page_size
+from watermark_store import WatermarkStore
 
 # 로깅 설정
 logging.basicConfig(
@@ -26,9 +33,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 리뷰 API 기본 페이지 크기 (PAGE_SIZE_PROBE=true면 이보다 큰 크기를 탐색)
+REVIEW_PAGE_SIZE = 20
+REVIEW_PAGE_SIZE_KEY = "review_list"
+
 
 def main():
-    """메인 함수 - 단일 상품 리뷰 크롤링"""
+    """메인 함수 - 단일 상품 리뷰 크롤링 (PRODUCT_IDS / PRODUCT_IDS_FILE이 있으면 배치 모드)"""
+    if os.environ.get("PRODUCT_IDS") or os.environ.get("PRODUCT_IDS_FILE"):
+        batch_main()
+        return
+
     try:
         # 환경변수에서 필수 파라미터 가져오기
         product_id = os.environ.get("PRODUCT_ID")
@@ -59,42 +74,144 @@ def main():
         logger.error(f"작업 실패: {str(e)}")
         sys.exit(1)
 
+def build_review_crawler(product_id: str, category_code: str,
+                         session=None, watermark: Optional[Dict] = None,
+                         expected_review_count: Optional[int] = None) -> MusinsaReviewCrawler:
+    """환경변수 설정으로 리뷰 크롤러 생성"""
+    return MusinsaReviewCrawler(
+        product_id=product_id,
+        category_code=category_code,
+        review_page_size=REVIEW_PAGE_SIZE,
+        review_max_pages=int(os.environ.get("REVIEW_PAGES", "25")),
+        sort=os.environ.get("SORT", "up_cnt_desc"),
+        my_filter=os.environ.get("MY_FILTER", "false"),
+        has_photo=os.environ.get("HAS_PHOTO", "false"),
+        is_experience=os.environ.get("IS_EXPERIENCE", "false"),
+        request_delay=float(os.environ.get("REQUEST_DELAY", "1.0")),
+        max_concurrency=int(os.environ.get("REVIEW_CONCURRENCY", "4")),
+        requests_per_second=float(os.environ.get("REQUESTS_PER_SECOND", "4.0")),
+        session=session,
+        watermark=watermark,
+        expected_review_count=expected_review_count
+    )
+
+
+def page_size_probe_enabled() -> bool:
+    return os.environ.get("PAGE_SIZE_PROBE", "false").lower() == "true"
+
+
+def get_page_size_cache(client=None) -> PageSizeCache:
+    """탐색한 페이지 크기 캐시 (PAGE_SIZE_CACHE_PATH 미지정 시 GCS 버킷 또는 로컬 state/)"""
+    base_path = os.environ.get("PAGE_SIZE_CACHE_PATH")
+    if not base_path:
+        bucket_name = os.environ.get("GCS_BUCKET_NAME")
+        if bucket_name and bucket_name != "your-bucket-name":
+            base_path = f"gs://{bucket_name}/state/musinsa/page_sizes"
+        else:
+            base_path = "state/page_sizes"
+    ttl_hours = float(os.environ.get("PAGE_SIZE_TTL_HOURS", "24"))
+    return PageSizeCache(base_path, ttl_hours, project_id=os.environ.get("GCS_PROJECT_ID"), client=client)
+
+
+def apply_probed_page_size(crawlers: List[MusinsaReviewCrawler], client=None) -> int:
+    """리뷰 API가 실제로 지켜주는 최대 페이지 크기를 찾아(또는 캐시에서 읽어) 모든 크롤러에 적용
+
+    탐색은 리뷰가 가장 많은 상품 하나로 한 번만 한다. 리뷰가 한 페이지에 다 들어가는 상품뿐이면
+    탐색해도 확정할 수 없으므로 캐시만 사용한다. 페이지가 커진 만큼 review_max_pages를 줄여
+    수집 범위는 그대로 두고 요청 수만 줄인다.
+    """
+    if not crawlers or not page_size_probe_enabled():
+        return REVIEW_PAGE_SIZE
+
+    candidates = DEFAULT_CANDIDATES
+    if os.environ.get("PAGE_SIZE_CANDIDATES"):
+        candidates = [int(v) for v in os.environ["PAGE_SIZE_CANDIDATES"].split(",") if v.strip()]
+
+    cache = get_page_size_cache(client)
+    # 리뷰 수를 모르는 상품은 리뷰 수를 아는 상품보다 뒤로
+    probe_crawler = max(crawlers, key=lambda c: (c.expected_review_count is None, c.expected_review_count or 0))
+    if probe_crawler.expected_review_count is not None \
+            and probe_crawler.expected_review_count <= REVIEW_PAGE_SIZE:
+        size = cache.get(REVIEW_PAGE_SIZE_KEY) or REVIEW_PAGE_SIZE
+    else:
+        size = resolve_page_size(REVIEW_PAGE_SIZE_KEY, probe_crawler.fetch_review_ids,
+                                 REVIEW_PAGE_SIZE, cache, candidates)
+
+    for crawler in crawlers:
+        crawler.apply_page_size(size)
+    logger.info(f"리뷰 페이지 크기 {size} (상품당 최대 {crawlers[0].review_max_pages}페이지)")
+    return size
+
+
+def get_watermark_store(client=None) -> Optional[WatermarkStore]:
+    """INCREMENTAL=true일 때 워터마크 저장소 (WATERMARK_PATH 미지정 시 GCS 버킷 또는 로컬 state/)"""
+    if os.environ.get("INCREMENTAL", "false").lower() != "true":
+        return None
+
+    base_path = os.environ.get("WATERMARK_PATH")
+    if not base_path:
+        bucket_name = os.environ.get("GCS_BUCKET_NAME")
+        if bucket_name and bucket_name != "your-bucket-name":
+            base_path = f"gs://{bucket_name}/state/musinsa/review_watermarks"
+        else:
+            base_path = "state/review_watermarks"
+    return WatermarkStore(base_path, project_id=os.environ.get("GCS_PROJECT_ID"), client=client)
+
+
+def commit_watermark(store: WatermarkStore, crawler: MusinsaReviewCrawler, result: Dict) -> bool:
+    """새 리뷰가 GCS에 저장된 경우에만 워터마크 전진 (업로드 실패 시 다음 실행에서 다시 수집)"""
+    if not result.get('review_count') or not result.get('gcs_uploaded'):
+        return False
+    return store.save(crawler.product_id, crawler.next_watermark())
+
+
 def run_review_job(product_id: str):
     try:
         category_code = os.environ.get("CATEGORY_CODE", "104001")
         category_name = CATEGORY_MAPPING.get(category_code, "")
         product_id = os.environ.get("PRODUCT_ID", "")
-        review_pages = int(os.environ.get("REVIEW_PAGES", "25"))
-        sort = os.environ.get("SORT", "up_cnt_desc")
-        my_filter = os.environ.get("MY_FILTER", "false")
-        has_photo = os.environ.get("HAS_PHOTO", "false")
-        is_experience = os.environ.get("IS_EXPERIENCE", "false")
-        request_delay = float(os.environ.get("REQUEST_DELAY", "1.0"))
 
         logger.info(f"리뷰 크롤링 시작 - category {category_name}의 {product_id}")
 
+        # 상품 랭킹에서 넘겨받은 리뷰 수 (없으면 빈 페이지가 나올 때까지 탐색)
+        expected_review_count = parse_review_count(os.environ.get("REVIEW_COUNT"))
+        if expected_review_count == 0:
+            logger.info(f"상품 {product_id}는 리뷰가 없어 크롤링을 건너뜁니다.")
+            return {
+                "status": "success",
+                "job_type": "review",
+                "product_id": product_id,
+                "category_code": category_code,
+                "category_name": category_name,
+                "review_count": 0,
+                "pages_requested": 0,
+                "skipped": True,
+                "gcs_uploaded": False
+            }
+
+        # 증분 모드면 마지막으로 본 리뷰 워터마크 로드
+        store = get_watermark_store()
+        watermark = store.load(product_id) if store else None
+
         # 크롤러 초기화
-        crawler = MusinsaReviewCrawler(
-            product_id=product_id,
-            category_code=category_code,
-            review_page_size=20,
-            review_max_pages=review_pages,
-            sort=sort,
-            my_filter=my_filter,
-            has_photo=has_photo,
-            is_experience=is_experience,
-            request_delay=request_delay
-        )
-
-        # 리뷰 크롤링 실행
-        result = crawler.crawl_reviews()
-
-        # GCS 업로드
-        if result.get('reviews'):
-            gcs_success = upload_reviews_to_gcs(result)
-            result['gcs_uploaded'] = gcs_success
-        else:
-            result['gcs_uploaded'] = False
+        crawler = build_review_crawler(product_id, category_code, watermark=watermark,
+                                       expected_review_count=expected_review_count)
+        apply_probed_page_size([crawler])
+
+        # 리뷰 크롤링 실행 - 페이지를 받는 대로 flatten 해서 GCS로 chunk 업로드
+        uploader = open_review_sink(crawler)
+        try:
+            result = crawler.crawl_reviews(
+                sink=review_page_writer(crawler, uploader) if uploader else None
+            )
+        except Exception:
+            if uploader:
+                uploader.abort()
+            raise
+        result['gcs_uploaded'] = finish_review_upload(uploader, result)
+
+        if store:
+            commit_watermark(store, crawler, result)
 
         return {
             "status": "success",
@@ -103,6 +220,10 @@ def run_review_job(product_id: str):
             "category_code": category_code,
             "category_name": category_name,
             "review_count": result.get('review_count', 0),
+            "pages_requested": result.get('pages_requested', 0),
+            "planned_pages": result.get('planned_pages'),
+            "page_size": crawler.review_page_size,
+            "incremental": result.get('incremental', False),
             "gcs_uploaded": result.get('gcs_uploaded', False),
             "scraped_at": result.get('scraped_at')
         }
@@ -117,60 +238,255 @@ def run_review_job(product_id: str):
         }
 
 
-def upload_reviews_to_gcs(result):
-    """리뷰 데이터 GCS 업로드"""
+def open_review_sink(crawler: MusinsaReviewCrawler, client=None) -> Optional[ChunkedCsvUploader]:
+    """리뷰 CSV를 GCS로 흘려보낼 업로더 (GCS_BUCKET_NAME 미설정 시 None)"""
     bucket_name = os.environ.get("GCS_BUCKET_NAME")
     if not bucket_name or bucket_name == "your-bucket-name":
         logger.warning("GCS_BUCKET_NAME이 설정되지 않아 업로드를 건너뜁니다.")
+        return None
+
+    product_id = crawler.product_id
+
+    # 날짜별 경로 생성
+    now_utc = datetime.now(timezone.utc)
+    year = now_utc.strftime("%Y")
+    month = now_utc.strftime("%m")
+    day = now_utc.strftime("%d")
+    timestamp = now_utc.strftime("%Y%m%d_%H%M%S")
+
+    # GCS 경로 및 파일명 생성
+    filename = f"{product_id}_{timestamp}.csv"
+    gcs_path = f"raw-data/musinsa/reviews/{year}/{month}/{day}/{product_id}/{filename}"
+
+    chunk_size = int(float(os.environ.get("UPLOAD_CHUNK_MB", "1")) * 1024 * 1024)
+    return ChunkedCsvUploader(
+        bucket_name=bucket_name,
+        destination_blob_name=gcs_path,
+        project_id=os.environ.get("GCS_PROJECT_ID"),
+        client=client,
+        chunk_size=chunk_size
+    )
+
+
+def review_page_writer(crawler: MusinsaReviewCrawler, uploader: ChunkedCsvUploader):
+    """페이지 단위 리뷰를 flatten 해서 바로 업로더에 넘기는 sink"""
+    flattener = ReviewFlattener(crawler.product_id, crawler.category_code, crawler.category_name)
+
+    def write_page(reviews: List[Dict]):
+        rows = flattener.flatten(reviews)
+        uploader.write_rows(flattener.columns, rows)
+
+    return write_page
+
+
+def finish_review_upload(uploader: Optional[ChunkedCsvUploader], result: Dict) -> bool:
+    """수집이 끝난 뒤 업로드 완료 처리"""
+    if uploader is None or not result.get('review_count'):
         return False
 
-    try:
-        product_id = result['product_id']
-        reviews = result['reviews']
-
-        if not reviews:
-            logger.warning("업로드할 리뷰 데이터가 없습니다.")
-            return True
-
-        # 크롤러 인스턴스 생성 (flatten_reviews 메서드 사용을 위해)
-        crawler = MusinsaReviewCrawler(
-            product_id=product_id,
-            category_code=result['category_code']
-        )
-
-        # 리뷰 데이터 플랫하게 변환
-        review_rows = crawler.flatten_reviews(reviews)
-
-        # 날짜별 경로 생성
-        now_utc = datetime.now(timezone.utc)
-        year = now_utc.strftime("%Y")
-        month = now_utc.strftime("%m")
-        day = now_utc.strftime("%d")
-        timestamp = now_utc.strftime("%Y%m%d_%H%M%S")
-
-        # GCS 경로 및 파일명 생성
-        filename = f"{product_id}_{timestamp}.csv"
-        gcs_path = f"raw-data/musinsa/reviews/{year}/{month}/{day}/{product_id}/{filename}"
-
-        # DataFrame으로 변환 후 GCS 업로드
-        df = pd.DataFrame(review_rows)
-        success = upload_csv_to_gcs(
-            bucket_name=bucket_name,
-            dataframe=df,
-            destination_blob_name=gcs_path,
-            project_id=os.environ.get("GCS_PROJECT_ID")
-        )
-
-        if success:
-            logger.info(f"상품 {product_id} 리뷰 업로드 완료: {len(review_rows)}개")
-            return True
+    success = uploader.close()
+    if success:
+        logger.info(f"상품 {result['product_id']} 리뷰 업로드 완료: {uploader.row_count}개")
+    else:
+        logger.error(f"상품 {result['product_id']} 리뷰 업로드 실패")
+    return success
+
+
+def load_product_manifest() -> List[Dict]:
+    """배치 대상 상품 목록 로드
+
+    - PRODUCT_IDS: 콤마 구분 상품 id 목록
+    - PRODUCT_IDS_FILE: 로컬 경로 또는 gs://bucket/path
+      (JSON 배열 [id, ...] / [{"product_id": ..., "category_code": ..., "review_count": ...}, ...] 또는 줄 단위 id)
+    - review_count가 있으면 페이지 범위를 미리 계산하고, 0이면 run_review_batch_job에서 제외
+    """
+    default_category = os.environ.get("CATEGORY_CODE", "104001")
+
+    product_ids = os.environ.get("PRODUCT_IDS")
+    if product_ids:
+        entries = [pid.strip() for pid in product_ids.split(",") if pid.strip()]
+    else:
+        path = os.environ["PRODUCT_IDS_FILE"]
+        if path.startswith("gs://"):
+            bucket_name, _, blob_name = path[len("gs://"):].partition("/")
+            text = download_text_from_gcs(bucket_name, blob_name, project_id=os.environ.get("GCS_PROJECT_ID"))
+            if text is None:
+                raise ValueError(f"상품 목록 파일을 읽을 수 없습니다: {path}")
+        else:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+
+        try:
+            entries = json.loads(text)
+        except json.JSONDecodeError:
+            entries = [line.strip() for line in text.splitlines() if line.strip()]
+
+    products = []
+    seen = set()
+    for entry in entries:
+        if isinstance(entry, dict):
+            product_id = str(entry.get("product_id", "")).strip()
+            category_code = str(entry.get("category_code") or default_category)
+            review_count = parse_review_count(entry.get("review_count"))
         else:
-            logger.error(f"상품 {product_id} 리뷰 업로드 실패")
-            return False
+            product_id = str(entry).strip()
+            category_code = default_category
+            review_count = None
+        if product_id and product_id not in seen:
+            seen.add(product_id)
+            products.append({"product_id": product_id, "category_code": category_code,
+                             "review_count": review_count})
+    return products
+
+
+async def _run_product_in_batch(crawler: MusinsaReviewCrawler, client: aiohttp.ClientSession,
+                                limiter: AsyncTokenBucket, semaphore: asyncio.Semaphore,
+                                gcs_client, store: Optional[WatermarkStore] = None) -> Dict:
+    """배치 내 단일 상품 처리 - 실패해도 예외를 올리지 않고 에러 레코드 반환"""
+    async with semaphore:
+        started = time.monotonic()
+        try:
+            if store:
+                crawler.watermark = await asyncio.to_thread(store.load, crawler.product_id)
+                crawler.sort = NEWEST_FIRST_SORT
+
+            uploader = open_review_sink(crawler, gcs_client)
+            try:
+                result = await crawler.crawl_reviews_async(
+                    client=client, limiter=limiter,
+                    sink=review_page_writer(crawler, uploader) if uploader else None
+                )
+            except Exception:
+                if uploader:
+                    uploader.abort()
+                raise
+            # 업로드 마무리는 동기 I/O라 스레드에서 실행해 다른 상품 수집을 막지 않음
+            gcs_uploaded = await asyncio.to_thread(finish_review_upload, uploader, result)
+            result['gcs_uploaded'] = gcs_uploaded
+
+            if store:
+                await asyncio.to_thread(commit_watermark, store, crawler, result)
+
+            return {
+                "status": "success",
+                "job_type": "review",
+                "product_id": crawler.product_id,
+                "category_code": crawler.category_code,
+                "category_name": crawler.category_name,
+                "review_count": result.get('review_count', 0),
+                "pages_requested": result.get('pages_requested', 0),
+                "planned_pages": result.get('planned_pages'),
+                "page_size": crawler.review_page_size,
+                "incremental": result.get('incremental', False),
+                "gcs_uploaded": gcs_uploaded,
+                "scraped_at": result.get('scraped_at'),
+                "elapsed_sec": round(time.monotonic() - started, 2)
+            }
+
+        except Exception as e:
+            logger.error(f"상품 {crawler.product_id} 리뷰 크롤링 실패: {e}")
+            return {
+                "status": "error",
+                "error_message": str(e),
+                "job_type": "review",
+                "product_id": crawler.product_id,
+                "category_code": crawler.category_code,
+                "elapsed_sec": round(time.monotonic() - started, 2)
+            }
+
+
+async def _run_review_batch(products: List[Dict]) -> List[Dict]:
+    product_concurrency = int(os.environ.get("PRODUCT_CONCURRENCY", "3"))
+    page_concurrency = int(os.environ.get("REVIEW_CONCURRENCY", "4"))
+    requests_per_second = float(os.environ.get("REQUESTS_PER_SECOND", "4.0"))
+
+    # 세션(UserAgent/헤더), HTTP 커넥션 풀, 요청 속도 제한, GCS 클라이언트를 모든 상품이 공유
+    crawlers = []
+    session = None
+    for product in products:
+        crawler = build_review_crawler(product["product_id"], product["category_code"], session=session,
+                                       expected_review_count=product.get("review_count"))
+        session = crawler.session
+        crawlers.append(crawler)
+
+    gcs_client = None
+    bucket_name = os.environ.get("GCS_BUCKET_NAME")
+    if bucket_name and bucket_name != "your-bucket-name":
+        gcs_client = get_storage_client(os.environ.get("GCS_PROJECT_ID"))
+    store = get_watermark_store(client=gcs_client)
+    await asyncio.to_thread(apply_probed_page_size, crawlers, gcs_client)
+
+    limiter = AsyncTokenBucket(requests_per_second, capacity=page_concurrency)
+    semaphore = asyncio.Semaphore(max(1, product_concurrency))
+    connector = aiohttp.TCPConnector(limit=max(1, product_concurrency) * page_concurrency)
+    timeout = aiohttp.ClientTimeout(total=10)
+
+    async with aiohttp.ClientSession(headers=crawlers[0]._async_headers(), connector=connector,
+                                     timeout=timeout) as client:
+        return await asyncio.gather(*(
+            _run_product_in_batch(crawler, client, limiter, semaphore, gcs_client, store)
+            for crawler in crawlers
+        ))
+
+
+def run_review_batch_job(products: List[Dict]) -> Dict:
+    """여러 상품 리뷰를 한 프로세스에서 수집 (상품별 결과 레코드 포함)"""
+    started = time.monotonic()
+
+    # 리뷰 0건 상품은 요청 없이 제외
+    skipped = [p["product_id"] for p in products if p.get("review_count") == 0]
+    if skipped:
+        logger.info(f"리뷰가 없는 상품 {len(skipped)}개 제외")
+    products = [p for p in products if p.get("review_count") != 0]
+    results = asyncio.run(_run_review_batch(products)) if products else []
+
+    error_count = sum(1 for r in results if r["status"] != "success")
+    if not results and skipped:
+        status = "success"
+    elif not results or error_count == len(results):
+        status = "error"
+    elif error_count:
+        status = "partial"
+    else:
+        status = "success"
+
+    return {
+        "status": status,
+        "job_type": "review_batch",
+        "product_count": len(results),
+        "success_count": len(results) - error_count,
+        "error_count": error_count,
+        "skipped_count": len(skipped),
+        "skipped_product_ids": skipped,
+        "elapsed_sec": round(time.monotonic() - started, 2),
+        "results": results
+    }
+
+
+def batch_main():
+    """배치 모드 - 일부 상품 실패는 배치를 중단시키지 않음 (전부 실패 시에만 exit 1)"""
+    try:
+        products = load_product_manifest()
+        logger.info(f"배치 리뷰 크롤링 시작: {len(products)}개 상품")
+
+        result = run_review_batch_job(products)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+        if result["status"] == "error":
+            logger.error("배치 작업이 실패했습니다.")
+            sys.exit(1)
+        logger.info(f"배치 작업 완료: 성공 {result['success_count']}개, 실패 {result['error_count']}개")
+        sys.exit(0)
 
     except Exception as e:
-        logger.error(f"리뷰 데이터 GCS 업로드 실패: {e}")
-        return False
+        error_result = {
+            "status": "error",
+            "error_message": str(e),
+            "job_type": "review_batch"
+        }
+        print(json.dumps(error_result, ensure_ascii=False))
+        logger.error(f"배치 작업 실패: {str(e)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
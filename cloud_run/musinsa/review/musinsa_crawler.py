@@ -2,23 +2,30 @@
 """
 무신사 크롤러 메인
 """
-import time
+import asyncio
 
+import aiohttp
 import requests
 import csv
 import json
 import logging
 import pandas as pd
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional
 from fake_useragent import UserAgent
 from datetime import datetime, timezone
 
 from utils import CATEGORY_MAPPING
+from rate_limiter import AsyncTokenBucket
+from review_flattener import ReviewFlattener
+from page_size_probe import scale_max_pages
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 증분 수집 시 사용하는 최신순 정렬
+NEWEST_FIRST_SORT = "new"
+
 
 class MusinsaReviewCrawler:
     def __init__(
@@ -28,8 +35,13 @@ class MusinsaReviewCrawler:
             review_page_size: int = 20, review_max_pages: int = 50,
             sort: str = "up_cnt_desc", my_filter: str = "false",
             has_photo: str = "false", is_experience: str = "false",
+            max_concurrency: int = 4, requests_per_second: float = 4.0,
+            session: Optional[requests.Session] = None,
+            watermark: Optional[Dict] = None,
+            expected_review_count: Optional[int] = None,
     ):
-        self.session = self._setup_session()
+        # 배치 모드에서는 여러 상품이 하나의 세션(헤더/UserAgent)을 공유
+        self.session = session or self._setup_session()
         self.product_id = product_id
         self.section_id = section_id
         self.size = size
@@ -42,6 +54,17 @@ class MusinsaReviewCrawler:
         self.my_filter = my_filter
         self.has_photo = has_photo
         self.is_experience = is_experience
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests_per_second = requests_per_second
+        # 워터마크가 있으면 최신순으로 받다가 이미 본 리뷰에 닿는 즉시 중단
+        self.watermark = watermark
+        if watermark is not None:
+            self.sort = NEWEST_FIRST_SORT
+        # 상품 랭킹에서 받은 리뷰 수가 있으면 페이지 범위를 미리 확정 (빈 페이지 탐색 요청 생략)
+        self.expected_review_count = expected_review_count
+        self.pages_requested = 0
+        self._latest_review_no = None
+        self._latest_create_date = None
 
         self.reviews = {}
 
@@ -62,12 +85,19 @@ class MusinsaReviewCrawler:
         logger.info("세션 설정 완료")
         return session
 
-    def _build_review_api_url(self, page: int = 0) -> str:
-        """리뷰 API URL 생성"""
+    def apply_page_size(self, page_size: int):
+        """탐색한 페이지 크기 적용 (review_max_pages는 기존 수집 범위(리뷰 수)를 유지하도록 조정)"""
+        if page_size == self.review_page_size:
+            return
+        self.review_max_pages = scale_max_pages(self.review_max_pages, self.review_page_size, page_size)
+        self.review_page_size = page_size
+
+    def _build_review_api_url(self, page: int = 0, page_size: Optional[int] = None) -> str:
+        """리뷰 API URL 생성 (page_size 미지정 시 self.review_page_size)"""
         base_url = "https://goods.musinsa.com/api2/review/v1/view/list"
         params = {
             "page": page,
-            "pageSize": self.review_page_size,
+            "pageSize": page_size or self.review_page_size,
             "goodsNo": self.product_id,
             "sort": self.sort,
             "selectedSimilarNo": self.product_id,
@@ -78,85 +108,212 @@ class MusinsaReviewCrawler:
         param_string = "&".join([f"{k}={v}" for k, v in params.items()])
         return f"{base_url}?{param_string}"
 
-    def crawl_reviews(self) -> Dict:
-        """단일 상품의 모든 리뷰 수집"""
-        logger.info(f"상품 {self.product_id}의 리뷰 수집 시작")
+    def fetch_review_ids(self, page: int, page_size: int) -> Optional[List[str]]:
+        """페이지 크기 탐색용 - 해당 page/pageSize 응답의 리뷰 번호 목록 (요청 실패 시 None)"""
+        url = self._build_review_api_url(page=page, page_size=page_size)
+        try:
+            response = self.session.get(url, timeout=10)
+            response.raise_for_status()
+            review_list = response.json().get("data", {}).get("list", [])
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"상품 {self.product_id}의 페이지 크기 탐색 요청 실패: {e}")
+            return None
+        return [str(review.get('no', '')) for review in review_list]
 
-        reviews = []
-        scraped_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    def _async_headers(self) -> Dict[str, str]:
+        """requests 세션 헤더를 aiohttp용으로 변환 (brotli 미설치 환경 대비 br 제외)"""
+        headers = dict(self.session.headers)
+        headers['Accept-Encoding'] = 'gzip, deflate'
+        return headers
+
+    async def _fetch_review_page(self, client: aiohttp.ClientSession,
+                                 limiter: AsyncTokenBucket, page: int) -> Optional[List[Dict]]:
+        """리뷰 한 페이지 요청. 실패 시 None"""
+        url = self._build_review_api_url(page=page)
+        await limiter.acquire()
+        self.pages_requested += 1
+        try:
+            async with client.get(url) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+            return data.get("data", {}).get("list", [])
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"상품 {self.product_id}의 {page}페이지 요청 실패: {e}")
+        except json.JSONDecodeError as e:
+            logger.error(f"상품 {self.product_id}의 {page}페이지 JSON 파싱 실패: {e}")
+        return None
 
-        for page in range(1, self.review_max_pages + 1):
-            url = self._build_review_api_url(page=page)
+    def planned_pages(self) -> Optional[int]:
+        """예상 리뷰 수로 계산한 요청 페이지 수 (리뷰 수를 모르면 None)"""
+        if self.expected_review_count is None:
+            return None
+        pages = -(-self.expected_review_count // self.review_page_size)
+        return min(pages, self.review_max_pages)
 
+    def _is_new_review(self, review: Dict) -> bool:
+        """워터마크(마지막으로 본 리뷰 번호/작성일)보다 새 리뷰인지"""
+        last_no = self.watermark.get('last_review_no')
+        try:
+            if last_no is not None and review.get('no') is not None:
+                return int(review['no']) > int(last_no)
+        except (TypeError, ValueError):
+            pass
+        last_date = self.watermark.get('last_create_date')
+        return not last_date or str(review.get('createDate', '')) > last_date
+
+    def _advance_watermark(self, reviews: List[Dict]):
+        """수집한 페이지만큼 다음 워터마크 후보 갱신 (리뷰 전체를 들고 있지 않아도 되도록 페이지마다 누적)"""
+        for review in reviews:
             try:
-                response = self.session.get(url=url, timeout=10)
-                response.raise_for_status()
-                data = response.json()
+                self._latest_review_no = max(self._latest_review_no or 0, int(review.get('no')))
+            except (TypeError, ValueError):
+                pass
+            if review.get('createDate'):
+                self._latest_create_date = max(self._latest_create_date or '', str(review['createDate']))
+
+    def next_watermark(self) -> Dict:
+        """수집한 리뷰로 갱신한 워터마크 (새 리뷰가 없으면 기존 값 유지)"""
+        watermark = dict(self.watermark or {})
+        if self._latest_review_no is not None:
+            watermark['last_review_no'] = max(self._latest_review_no, int(watermark.get('last_review_no') or 0))
+        if self._latest_create_date is not None:
+            watermark['last_create_date'] = max(self._latest_create_date, watermark.get('last_create_date') or '')
+        return watermark
+
+    async def _fetch_review_pages(self, client: aiohttp.ClientSession, limiter: AsyncTokenBucket,
+                                  on_page: Callable[[List[Dict]], Awaitable[None]]):
+        """페이지를 동시에 요청하고 페이지 순서대로 on_page에 전달
+
+        빈 페이지(또는 실패)가 나오면 그 페이지 번호 이후는 새로 요청하지 않고,
+        이미 받아온 뒤쪽 페이지 결과도 버려서 순차 수집과 같은 결과를 유지한다.
+        앞 페이지가 모두 끝난 페이지만 내보내므로 한 번 전달한 페이지가 뒤늦게 잘리는 일은 없다.
+        워터마크가 있으면 이미 본 리뷰가 섞인 페이지까지만 새 리뷰를 남기고 멈춘다.
+        """
+        pages: Dict[int, List[Dict]] = {}
+        finished = set()
+        stop_page = self.review_max_pages + 1
+        next_page = 1
+        emitted_page = 0
+        emit_lock = asyncio.Lock()
+
+        # 전체 수집이면 계획한 페이지만 병렬 요청 (증분 수집은 워터마크에서 멈추므로 계획 불필요)
+        planned = self.planned_pages() if self.watermark is None else None
+        if planned is not None:
+            stop_page = planned + 1
 
-                review_list = data.get("data", {}).get("list", [])
+        async def emit_ready():
+            nonlocal emitted_page
+            async with emit_lock:
+                while emitted_page + 1 in finished and emitted_page + 1 < stop_page:
+                    emitted_page += 1
+                    review_list = pages.pop(emitted_page, None)
+                    if review_list:
+                        await on_page(review_list)
 
-                if not review_list:
+        async def fetch_next():
+            nonlocal next_page, stop_page
+            page = next_page
+            next_page += 1
+            review_list = await self._fetch_review_page(client, limiter, page)
+            finished.add(page)
+            if not review_list:
+                if review_list is not None:
                     logger.info(f"상품 {self.product_id}의 {page}페이지에서 더 이상 리뷰가 없음")
-                    break
+                stop_page = min(stop_page, page)
+                return
 
-                # 각 리뷰에 메타데이터 추가
-                for review in review_list:
-                    review['scraped_at'] = scraped_at
-                    review['category_code'] = self.category_code
-                    review['category_name'] = self.category_name
-                    review['product_id'] = self.product_id
+            if (planned is not None and page == planned and stop_page == planned + 1
+                    and planned < self.review_max_pages
+                    and len(review_list) >= self.review_page_size):
+                # 마지막 계획 페이지가 가득 차면 랭킹 수집 이후 리뷰가 늘었을 수 있음 - 계획을 버리고
+                # 빈 페이지가 나올 때까지 탐색 (예상 수가 페이지 크기의 배수여도 다음 페이지를 확인)
+                logger.info(f"상품 {self.product_id}의 {page}페이지가 가득 참 (예상 {self.expected_review_count}개) → 추가 탐색")
+                stop_page = self.review_max_pages + 1
 
-                reviews.extend(review_list)
+            if self.watermark is not None:
+                new_reviews = [r for r in review_list if self._is_new_review(r)]
+                if len(new_reviews) < len(review_list):
+                    logger.info(f"상품 {self.product_id}의 {page}페이지에서 워터마크 도달")
+                    stop_page = min(stop_page, page + 1)
+                review_list = new_reviews
+
+            if review_list:
+                pages[page] = review_list
                 logger.info(f"상품 {self.product_id}의 {page}페이지에서 {len(review_list)}개 리뷰 수집")
+            await emit_ready()
+
+        async def worker():
+            while next_page < stop_page:
+                await fetch_next()
+
+        if self.watermark is not None and next_page < stop_page:
+            # 증분 수집은 대부분 첫 페이지에서 끝나므로 첫 페이지는 단독으로 요청
+            await fetch_next()
+        await asyncio.gather(*(worker() for _ in range(self.max_concurrency)))
+        await emit_ready()
 
-                # 페이지 간 지연
-                if page < self.review_max_pages:
-                    time.sleep(self.request_delay * 0.5)
+    async def crawl_reviews_async(self, client: Optional[aiohttp.ClientSession] = None,
+                                  limiter: Optional[AsyncTokenBucket] = None,
+                                  sink: Optional[Callable[[List[Dict]], None]] = None) -> Dict:
+        """단일 상품의 모든 리뷰 수집 (비동기). client/limiter를 넘기면 여러 상품이 공유
 
-            except requests.exceptions.RequestException as e:
-                logger.error(f"상품 {self.product_id}의 {page}페이지 요청 실패: {e}")
-                break
-            except json.JSONDecodeError as e:
-                logger.error(f"상품 {self.product_id}의 {page}페이지 JSON 파싱 실패: {e}")
-                break
+        sink를 넘기면 페이지마다 메타데이터를 붙인 리뷰 목록을 순서대로 sink에 넘기고
+        결과의 reviews에는 쌓지 않는다 (리뷰 수와 무관하게 메모리 사용량 일정).
+        """
+        logger.info(f"상품 {self.product_id}의 리뷰 수집 시작")
 
-        logger.info(f"상품 {self.product_id}의 총 {len(reviews)}개 리뷰 수집 완료")
+        scraped_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        limiter = limiter or AsyncTokenBucket(self.requests_per_second, capacity=self.max_concurrency)
+        reviews = []
+        review_count = 0
+
+        async def on_page(review_list: List[Dict]):
+            nonlocal review_count
+            # 각 리뷰에 메타데이터 추가
+            for review in review_list:
+                review['scraped_at'] = scraped_at
+                review['category_code'] = self.category_code
+                review['category_name'] = self.category_name
+                review['product_id'] = self.product_id
+            self._advance_watermark(review_list)
+            review_count += len(review_list)
+            if sink is None:
+                reviews.extend(review_list)
+            else:
+                # sink(GCS 업로드 등)는 동기 I/O라 스레드에서 실행
+                await asyncio.to_thread(sink, review_list)
+
+        if self.expected_review_count == 0:
+            logger.info(f"상품 {self.product_id}는 리뷰가 없어 수집을 건너뜀")
+        elif client is None:
+            timeout = aiohttp.ClientTimeout(total=10)
+            async with aiohttp.ClientSession(headers=self._async_headers(), timeout=timeout) as own_client:
+                await self._fetch_review_pages(own_client, limiter, on_page)
+        else:
+            await self._fetch_review_pages(client, limiter, on_page)
+
+        logger.info(f"상품 {self.product_id}의 총 {review_count}개 리뷰 수집 완료")
 
         return {
             'product_id': self.product_id,
             'category_code': self.category_code,
             'category_name': self.category_name,
             'reviews': reviews,
-            'review_count': len(reviews),
+            'review_count': review_count,
+            'pages_requested': self.pages_requested,
+            'planned_pages': self.planned_pages(),
+            'incremental': self.watermark is not None,
             'scraped_at': scraped_at
         }
 
+    def crawl_reviews(self, sink: Optional[Callable[[List[Dict]], None]] = None) -> Dict:
+        """단일 상품의 모든 리뷰 수집"""
+        return asyncio.run(self.crawl_reviews_async(sink=sink))
+
     def flatten_reviews(self, reviews: List[Dict]) -> List[Dict]:
         """리뷰 데이터를 플랫하게 만들어주는 함수"""
-        rows = []
-
-        for review in reviews:
-            flat = {
-                'product_id': self.product_id,
-                'category_code': self.category_code,
-                'category_name': self.category_name
-            }
-
-            for k, v in review.items():
-                if isinstance(v, dict):
-                    for subk, subv in v.items():
-                        column_name = f'{k}_{subk}'.replace('.', '_')
-                        flat[column_name] = subv
-                elif isinstance(v, list):
-                    column_name = k.replace('.', '_')
-                    flat[column_name] = json.dumps(v, ensure_ascii=False)
-                else:
-                    column_name = k.replace('.', '_')
-                    flat[column_name] = v
-
-            rows.append(flat)
-
-        return rows
+        flattener = ReviewFlattener(self.product_id, self.category_code, self.category_name)
+        return [dict(zip(flattener.columns, row)) for row in flattener.flatten(reviews)]
 
     def save_reviews_to_csv(self, reviews: List[Dict], filename: Optional[str] = None) -> str:
         """리뷰 데이터를 CSV로 저장"""
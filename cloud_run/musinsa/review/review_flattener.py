@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+무신사 리뷰 flatten 유틸리티 (페이지 단위 스트리밍용)
+"""
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+META_COLUMNS = ['product_id', 'category_code', 'category_name']
+
+# 컬럼 계획 이후 처음 나온 필드를 JSON 객체로 담는 마지막 컬럼
+EXTRA_COLUMN = 'extra_fields'
+
+
+class ReviewFlattener:
+    """리뷰 dict를 CSV 행(list)으로 변환
+
+    첫 페이지의 키 구성으로 컬럼 계획(컬럼 순서와 키 → 위치 매핑)을 한 번만 세우고,
+    이후 페이지는 계획된 위치에 값만 채운다. CSV 헤더를 첫 페이지에서 확정해야
+    페이지를 받는 즉시 업로드할 수 있으므로, 계획에 없는 키가 뒤늦게 나오면
+    버리지 않고 extra_fields 컬럼에 JSON 객체로 남긴다 ({"키": 값, "중첩키": {"하위키": 값}}).
+    첫 페이지에서 None이던 필드가 뒤에서 dict로 오면 그 컬럼에 JSON 문자열로 넣는다.
+    """
+
+    def __init__(self, product_id: str, category_code: str, category_name: str):
+        self.meta = [product_id, category_code, category_name]
+        self.columns: Optional[List[str]] = None
+        self._index: Dict[str, int] = {}
+        self._scalar_index: Dict[str, int] = {}
+        self._nested_index: Dict[str, Dict[str, int]] = {}
+        self._extra_keys = set()
+
+    def _add_column(self, column: str) -> int:
+        if column not in self._index:
+            self._index[column] = len(self.columns)
+            self.columns.append(column)
+        return self._index[column]
+
+    def plan(self, reviews: Iterable[Dict]) -> List[str]:
+        """컬럼 계획 수립 (원래 flatten_reviews + DataFrame과 같은 컬럼 이름/순서)"""
+        self.columns = []
+        for column in META_COLUMNS:
+            self._add_column(column)
+
+        for review in reviews:
+            for k, v in review.items():
+                if isinstance(v, dict):
+                    nested = self._nested_index.setdefault(k, {})
+                    for subk in v:
+                        if subk not in nested:
+                            nested[subk] = self._add_column(f'{k}_{subk}'.replace('.', '_'))
+                elif k not in self._scalar_index:
+                    self._scalar_index[k] = self._add_column(k.replace('.', '_'))
+
+        self._add_column(EXTRA_COLUMN)
+        return self.columns
+
+    def _note_extra(self, column: str):
+        if column not in self._extra_keys:
+            self._extra_keys.add(column)
+            logger.warning(f"컬럼 계획에 없는 필드는 {EXTRA_COLUMN} 컬럼에 JSON으로 저장됩니다: {column}")
+
+    @staticmethod
+    def _cell(value: Any) -> Any:
+        return '' if value is None else value
+
+    def flatten_row(self, review: Dict) -> List[Any]:
+        row = [''] * len(self.columns)
+        row[:len(self.meta)] = self.meta
+        extra: Dict[str, Any] = {}
+
+        for k, v in review.items():
+            if isinstance(v, dict) and k in self._scalar_index:
+                # 첫 페이지에서는 None 등 스칼라였던 필드
+                row[self._scalar_index[k]] = json.dumps(v, ensure_ascii=False, default=str)
+            elif isinstance(v, dict):
+                nested = self._nested_index.get(k, {})
+                for subk, subv in v.items():
+                    idx = nested.get(subk)
+                    if idx is None:
+                        self._note_extra(f'{k}_{subk}')
+                        extra.setdefault(k, {})[subk] = subv
+                        continue
+                    row[idx] = self._cell(subv)
+            else:
+                idx = self._scalar_index.get(k)
+                if idx is None:
+                    if v is not None:
+                        self._note_extra(k)
+                        extra[k] = v
+                    continue
+                row[idx] = json.dumps(v, ensure_ascii=False) if isinstance(v, list) else self._cell(v)
+
+        if extra:
+            row[self._index[EXTRA_COLUMN]] = json.dumps(extra, ensure_ascii=False, default=str)
+        return row
+
+    def flatten(self, reviews: List[Dict]) -> List[List[Any]]:
+        """한 페이지 리뷰를 행 목록으로 변환 (첫 호출 시 컬럼 계획 수립)"""
+        if self.columns is None:
+            self.plan(reviews)
+        return [self.flatten_row(review) for review in reviews]
@@ -1,3 +1,5 @@
+from typing import Optional
+
 # 카테고리 매핑
 CATEGORY_MAPPING = {
     "104000": "전체",
@@ -17,3 +19,14 @@ CATEGORY_MAPPING = {
     "104011": "미용소품",
     "104012": "헬스/푸드"
 }
+
+
+def parse_review_count(value) -> Optional[int]:
+    """상품 랭킹의 review_count 값("1,234" / 1234 / "") → int, 알 수 없으면 None"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        count = int(float(str(value).replace(",", "").strip()))
+    except ValueError:
+        return None
+    return count if count >= 0 else None
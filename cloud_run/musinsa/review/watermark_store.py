@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+증분 리뷰 수집용 상품별 워터마크 저장소 (로컬 디렉토리 또는 GCS)
+"""
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from gcs_uploader import download_text_from_gcs, upload_json_to_gcs, get_storage_client
+
+logger = logging.getLogger(__name__)
+
+
+class WatermarkStore:
+    """상품마다 {base_path}/{product_id}.json 파일 하나에 워터마크 저장
+
+    상품별로 파일을 나눠서 여러 Cloud Run 작업이 동시에 돌아도 서로 덮어쓰지 않는다.
+    base_path 예: gs://bucket/state/musinsa/review_watermarks 또는 ./state/review_watermarks
+    """
+
+    def __init__(self, base_path: str, project_id: Optional[str] = None, client=None):
+        self.base_path = base_path.rstrip("/")
+        self.project_id = project_id
+        self.is_gcs = self.base_path.startswith("gs://")
+        self._client = client
+
+        if self.is_gcs:
+            self.bucket_name, _, self.prefix = self.base_path[len("gs://"):].partition("/")
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_storage_client(self.project_id)
+        return self._client
+
+    def _path(self, product_id: str) -> str:
+        if self.is_gcs:
+            return f"{self.prefix}/{product_id}.json" if self.prefix else f"{product_id}.json"
+        return os.path.join(self.base_path, f"{product_id}.json")
+
+    def load(self, product_id: str) -> Dict:
+        """저장된 워터마크 (없으면 빈 dict → 최신순 전체 수집)"""
+        try:
+            if self.is_gcs:
+                text = download_text_from_gcs(self.bucket_name, self._path(product_id), client=self.client)
+            else:
+                path = self._path(product_id)
+                text = None
+                if os.path.exists(path):
+                    with open(path, encoding="utf-8") as f:
+                        text = f.read()
+            return json.loads(text) if text else {}
+        except Exception as e:
+            logger.warning(f"상품 {product_id} 워터마크 로드 실패, 전체 수집으로 진행: {e}")
+            return {}
+
+    def save(self, product_id: str, watermark: Dict) -> bool:
+        watermark = dict(watermark, product_id=product_id,
+                         updated_at=datetime.now(timezone.utc).isoformat())
+        if self.is_gcs:
+            return upload_json_to_gcs(self.bucket_name, watermark, self._path(product_id), client=self.client)
+
+        try:
+            os.makedirs(self.base_path, exist_ok=True)
+            path = self._path(product_id)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(watermark, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logger.error(f"상품 {product_id} 워터마크 저장 실패: {e}")
+            return False
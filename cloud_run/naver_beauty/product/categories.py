@@ -14,3 +14,6 @@ category_dir = {
     "뷰티디바이스": {"id": "20006713"},
     "키즈": {"id": "20006719"}
 }
+
+# 다른 카테고리를 모두 포함하는 상위 카테고리 (중복 제거 시 하위 카테고리를 우선)
+ROOT_CATEGORY = "전체"
@@ -1,11 +1,12 @@
 # gcs_uploader.py
 from google.cloud import storage
-from typing import Union
+from typing import Optional, Union
 
 def upload_to_gcs(bucket_name: str, content: Union[str, bytes], blob_path: str,
-                  content_type: str = "application/octet-stream", from_bytes: bool = False):
-    """GCS에 파일 업로드 - 로컬 경로 or 바이너리 데이터"""
-    client = storage.Client()
+                  content_type: str = "application/octet-stream", from_bytes: bool = False,
+                  client: Optional[storage.Client] = None):
+    """GCS에 파일 업로드 - 로컬 경로 or 바이너리 데이터 (client를 넘기면 재사용)"""
+    client = client or storage.Client()
     bucket = client.bucket(bucket_name)
     blob = bucket.blob(blob_path)
 
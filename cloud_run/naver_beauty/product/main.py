@@ -1,7 +1,8 @@
 # main.py (환경변수 기반 실행)
 import os
+import json
 import logging
-from naver_beauty_crawler import collect_product
+from naver_beauty_crawler import collect_product, collect_all_products, resolve_categories
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -9,18 +10,42 @@ logger = logging.getLogger(__name__)
 def get_env_args():
     bucket = os.environ.get("BUCKET_NAME")
     category = os.environ.get("CATEGORY")
+    # CATEGORIES("all" 또는 콤마 구분)가 있으면 여러 카테고리를 한 프로세스에서 수집
+    categories = os.environ.get("CATEGORIES")
 
-    if not bucket or not category:
-        raise ValueError("❌ 환경변수 'BUCKET_NAME' 또는 'CATEGORY'가 설정되지 않았습니다.")
+    if not bucket or not (category or categories):
+        raise ValueError("❌ 환경변수 'BUCKET_NAME' 또는 'CATEGORY'/'CATEGORIES'가 설정되지 않았습니다.")
 
-    return bucket, category
+    return bucket, category, categories
 
 if __name__ == "__main__":
     logger.info("🚀 네이버 상품 수집 시작")
     try:
-        bucket, category = get_env_args()
-        logger.info(f"📦 버킷: {bucket} / 📂 카테고리: {category}")
-        collect_product(bucket, category)
+        bucket, category, categories = get_env_args()
+        concurrency = int(os.environ.get("PAGE_CONCURRENCY", "4"))
+        requests_per_second = float(os.environ.get("REQUESTS_PER_SECOND", "2.0"))
+        max_requests_per_second = float(os.environ.get("MAX_REQUESTS_PER_SECOND", "5.0"))
+
+        if categories:
+            category_names = resolve_categories(categories)
+            logger.info(f"📦 버킷: {bucket} / 📂 카테고리 {len(category_names)}개: {', '.join(category_names)}")
+            summary = collect_all_products(
+                bucket, category_names,
+                concurrency=concurrency,
+                category_concurrency=int(os.environ.get("CATEGORY_CONCURRENCY", "4")),
+                requests_per_second=requests_per_second,
+                max_requests_per_second=max_requests_per_second
+            )
+            print(json.dumps(summary, ensure_ascii=False, indent=2))
+        else:
+            logger.info(f"📦 버킷: {bucket} / 📂 카테고리: {category}")
+            collect_product(
+                bucket, category,
+                async_fetch=os.environ.get("ASYNC_FETCH", "false").lower() == "true",
+                concurrency=concurrency,
+                requests_per_second=requests_per_second,
+                max_requests_per_second=max_requests_per_second
+            )
     except Exception as e:
         logger.error(f"❌ 실행 중 오류 발생: {e}", exc_info=True)
         raise
@@ -1,12 +1,20 @@
+import asyncio
 import time
+import aiohttp
 import requests
 import logging
 import pandas as pd
 from datetime import datetime, timezone
 from typing import List, Dict, Optional
 from fake_useragent import UserAgent
+from google.cloud import storage
 from gcs_uploader import upload_to_gcs
-from categories import category_dir
+from categories import category_dir, ROOT_CATEGORY
+from rate_limiter import AdaptiveTokenBucket
+from page_bounds import find_last_page
+
+# 이 상태 코드는 차단/과부하로 보고 속도를 낮춘 뒤 재시도
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -72,19 +80,128 @@ class NaverShoppingCrawler:
         try:
             response = self.session.post(self.base_api_url, json=payload, timeout=30)
             response.raise_for_status()
-            data = response.json()
-            card_items = data.get('data', {}).get('pagedCards', {}).get('data', [])
-
-            parsed_items = [
-                self._parse_product_card(card, scraped_time, category_name)
-                for card in card_items
-            ]
-            return [item for item in parsed_items if item is not None]
+            return self._parse_paged_cards(response.json(), scraped_time, category_name)
 
         except Exception as e:
             logger.error(f"페이지 {page} 수집 실패: {e}", exc_info=True)
             return []
 
+    def find_last_page(self, max_pages: int, page_size: int = 20, display_category_id: Optional[str] = None,
+                       sort_type: Optional[str] = None) -> int:
+        """마지막으로 상품이 있는 페이지 (지수 탐색 + 이분 탐색, 요청 O(log n)). 실패 시 PageProbeError"""
+        display_category_id = display_category_id or self.default_display_category_id
+        sort_type = sort_type or self.default_sort_type
+
+        def has_cards(page: int) -> Optional[bool]:
+            payload = self._build_graphql_payload(page, page_size, display_category_id, sort_type)
+            try:
+                response = self.session.post(self.base_api_url, json=payload, timeout=30)
+                response.raise_for_status()
+                return bool(response.json().get('data', {}).get('pagedCards', {}).get('data'))
+            except Exception as e:
+                logger.warning(f"페이지 {page} 탐색 실패: {e}")
+                return None
+
+        last_page, _ = find_last_page(has_cards, max_page=max_pages)
+        return last_page
+
+    def _parse_paged_cards(self, data: Dict, scraped_time: Optional[datetime] = None,
+                           category_name: Optional[str] = None) -> List[Dict]:
+        card_items = data.get('data', {}).get('pagedCards', {}).get('data', [])
+        parsed_items = [
+            self._parse_product_card(card, scraped_time, category_name)
+            for card in card_items
+        ]
+        return [item for item in parsed_items if item is not None]
+
+    def _async_headers(self) -> Dict[str, str]:
+        # brotli 미설치 환경 대비 br 제외
+        headers = dict(self.session.headers)
+        headers['Accept-Encoding'] = 'gzip, deflate'
+        return headers
+
+    async def fetch_single_page_async(self, client: aiohttp.ClientSession, limiter: AdaptiveTokenBucket,
+                                      page: int, page_size: int, display_category_id: str, sort_type: str,
+                                      scraped_time: Optional[datetime] = None, category_name: Optional[str] = None,
+                                      max_retries: int = 3) -> List[Dict]:
+        """getPagedCards 한 페이지 (비동기). 429/5xx면 limiter 속도를 낮추고 재시도, 그 외 실패는 빈 페이지"""
+        payload = self._build_graphql_payload(page, page_size, display_category_id, sort_type)
+
+        for attempt in range(max_retries + 1):
+            await limiter.acquire()
+            try:
+                async with client.post(self.base_api_url, json=payload) as response:
+                    if response.status in THROTTLE_STATUSES and attempt < max_retries:
+                        retry_after = response.headers.get('Retry-After')
+                        limiter.on_throttle(float(retry_after) if retry_after and retry_after.isdigit() else None)
+                        logger.warning(f"페이지 {page} 응답 {response.status} - 요청 속도 {limiter.rate:.2f}/s로 낮춰 재시도")
+                        continue
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+                limiter.on_success()
+                # 응답이 오는 대로 파싱 (다른 페이지 요청은 계속 진행)
+                return self._parse_paged_cards(data, scraped_time, category_name)
+
+            except asyncio.TimeoutError:
+                if attempt < max_retries:
+                    limiter.on_throttle()
+                    logger.warning(f"페이지 {page} 시간 초과 - 재시도")
+                    continue
+                logger.error(f"페이지 {page} 수집 실패: 시간 초과")
+            except Exception as e:
+                logger.error(f"페이지 {page} 수집 실패: {e}", exc_info=True)
+            return []
+        return []
+
+    async def fetch_products_api_async(self, max_pages: int, page_size: int = 20,
+                                       display_category_id: Optional[str] = None,
+                                       sort_type: Optional[str] = None,
+                                       scraped_time: Optional[datetime] = None,
+                                       category_name: Optional[str] = None,
+                                       client: Optional[aiohttp.ClientSession] = None,
+                                       limiter: Optional[AdaptiveTokenBucket] = None,
+                                       concurrency: int = 4, last_page: Optional[int] = None) -> List[Dict]:
+        """fetch_products_api의 비동기 버전
+
+        concurrency개 worker가 페이지 번호를 차례로 가져가 동시에 요청하고, 빈 페이지가 나오면
+        그 뒤 페이지는 새로 요청하지 않는다. 이미 받아온 뒤쪽 페이지도 버려서 순차 수집과 결과가 같다.
+        client/limiter를 넘기면 여러 카테고리가 커넥션 풀과 요청 속도 제한을 공유한다.
+        last_page(find_last_page 결과)를 넘기면 그 범위만 요청해 빈 페이지 뒤로 넘겨 보내는 요청이 없다.
+        """
+        display_category_id = display_category_id or self.default_display_category_id
+        sort_type = sort_type or self.default_sort_type
+        limiter = limiter or AdaptiveTokenBucket(2.0, capacity=concurrency, max_rate=5.0)
+
+        pages: Dict[int, List[Dict]] = {}
+        stop_page = (min(max_pages, last_page) if last_page is not None else max_pages) + 1
+        next_page = 1
+
+        async def worker():
+            nonlocal next_page, stop_page
+            while next_page < stop_page:
+                page = next_page
+                next_page += 1
+                products = await self.fetch_single_page_async(
+                    client, limiter, page, page_size, display_category_id, sort_type, scraped_time, category_name)
+                if not products:
+                    if page < stop_page:
+                        logger.info(f"페이지 {page}에서 더 이상 상품 없음. 새 페이지 요청 중단.")
+                    stop_page = min(stop_page, page)
+                    continue
+                pages[page] = products
+
+        if client is None:
+            timeout = aiohttp.ClientTimeout(total=30)
+            async with aiohttp.ClientSession(headers=self._async_headers(), timeout=timeout) as client:
+                await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        else:
+            await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+        all_products = []
+        for page in sorted(p for p in pages if p < stop_page):
+            all_products.extend(pages[page])
+        return all_products
+
 
     def fetch_products_api(self, max_pages: int, page_size: int = 20,
                            display_category_id: Optional[str] = None,
@@ -139,10 +256,11 @@ class NaverShoppingCrawler:
             names = [product.get('productCategoryName')]
         return names
 
-    def save_and_upload(self, data: List[Dict], category_name: str, scraped_time: datetime, bucket_name: str):
+    def save_and_upload(self, data: List[Dict], category_name: str, scraped_time: datetime, bucket_name: str,
+                        client=None) -> bool:
         if not data:
             logger.warning(f"'{category_name}' 저장할 데이터가 없습니다.")
-            return
+            return False
         try:
             timestamp_str = scraped_time.strftime("%Y%m%d_%H%M%S")
             year = scraped_time.strftime("%Y")
@@ -153,13 +271,17 @@ class NaverShoppingCrawler:
             blob_path = f"raw-data/naver/products/{category_name}/{year}/{month}/{day}/{category_name}_{timestamp_str}.csv"
 
             df_bytes = df.to_csv(index=False, encoding='utf-8-sig').encode('utf-8-sig')
-            upload_to_gcs(bucket_name, df_bytes, blob_path, content_type="text/csv", from_bytes=True)
+            upload_to_gcs(bucket_name, df_bytes, blob_path, content_type="text/csv", from_bytes=True, client=client)
             logger.info(f"✅ GCS 업로드 완료: {blob_path}")
+            return True
         except Exception as e:
             logger.error(f"GCS 업로드 중 오류 발생: {e}", exc_info=True)
+            return False
 
 
-def collect_product(bucket_name: str, category_name: str):
+def collect_product(bucket_name: str, category_name: str, async_fetch: bool = False,
+                    concurrency: int = 4, requests_per_second: float = 2.0,
+                    max_requests_per_second: float = 5.0):
     if category_name not in category_dir:
         logger.error(f"❌ 존재하지 않는 카테고리: {category_name}")
         return
@@ -170,7 +292,7 @@ def collect_product(bucket_name: str, category_name: str):
 
     logger.info(f"\n--- 카테고리 '{category_name}' 수집 시작 ---")
     try:
-        products = crawler.fetch_products_api(
+        fetch_args = dict(
             display_category_id=category_id,
             sort_type="DISPLAY_CATEGORY_GENDER_AGE_GROUP_F20",
             max_pages=25,
@@ -178,6 +300,18 @@ def collect_product(bucket_name: str, category_name: str):
             scraped_time=scraped_time,
             category_name=category_name
         )
+        started = time.monotonic()
+        if async_fetch:
+            # 고정 2초 대기 대신 동시 요청 + 응답에 따라 조절되는 속도 제한
+            limiter = AdaptiveTokenBucket(requests_per_second, capacity=concurrency,
+                                          max_rate=max_requests_per_second)
+            products = asyncio.run(crawler.fetch_products_api_async(
+                **fetch_args, limiter=limiter, concurrency=concurrency))
+            logger.info(f"⏱️ 비동기 수집 {time.monotonic() - started:.1f}초 "
+                        f"(최종 속도 {limiter.rate:.2f}/s, 속도 제한 응답 {limiter.throttle_count}회)")
+        else:
+            products = crawler.fetch_products_api(**fetch_args)
+            logger.info(f"⏱️ 순차 수집 {time.monotonic() - started:.1f}초")
 
         if not products:
             logger.warning(f"⚠️ {category_name} 상품 없음")
@@ -187,3 +321,123 @@ def collect_product(bucket_name: str, category_name: str):
             # logger.info(f"\n📌 '{category_name}' 수집 샘플: {products[0]['name']} ({products[0]['price']}원), 리뷰수: {products[0]['reviewCount']}, 평점: {products[0]['avgReviewScore']}")
     except Exception as e:
         logger.error(f"❌ 오류 발생: {e}", exc_info=True)
+
+
+def resolve_categories(value: str) -> List[str]:
+    """CATEGORIES 값 해석 - "all"이면 category_dir 전체, 아니면 콤마 구분 카테고리명"""
+    if value.strip().lower() == "all":
+        return list(category_dir)
+
+    names = []
+    for name in value.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in category_dir:
+            raise ValueError(f"❌ 존재하지 않는 카테고리: {name}")
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def dedupe_products(results: Dict[str, List[Dict]]) -> List[Dict]:
+    """여러 카테고리에 걸친 상품을 product_id당 한 행으로 합침
+
+    대표 category_name은 상품이 나온 첫 하위 카테고리(category_dir 순서)이고,
+    ROOT_CATEGORY('전체')에만 있는 상품만 '전체'로 남는다.
+    category_names에는 상품이 나온 카테고리를 모두 '|'로 이어 붙인다.
+    """
+    merged: Dict[str, Dict] = {}
+    appearances: Dict[str, List[str]] = {}
+    ordered = [name for name in category_dir if name in results and name != ROOT_CATEGORY]
+    if ROOT_CATEGORY in results:
+        ordered.append(ROOT_CATEGORY)
+
+    for name in ordered:
+        for rank, product in enumerate(results[name], 1):
+            product_id = product.get("product_id")
+            if not product_id:
+                continue
+            if product_id not in merged:
+                merged[product_id] = {**product, "category_rank": rank}
+                appearances[product_id] = []
+            if name not in appearances[product_id]:
+                appearances[product_id].append(name)
+
+    for product_id, product in merged.items():
+        product["category_names"] = "|".join(appearances[product_id])
+    return list(merged.values())
+
+
+async def _crawl_categories(crawler: NaverShoppingCrawler, category_names: List[str], scraped_time: datetime,
+                            concurrency: int, category_concurrency: int,
+                            limiter: AdaptiveTokenBucket) -> Dict[str, List[Dict]]:
+    # HTTP 커넥션 풀과 요청 속도 제한을 모든 카테고리가 공유
+    semaphore = asyncio.Semaphore(max(1, category_concurrency))
+    connector = aiohttp.TCPConnector(limit=max(1, category_concurrency) * max(1, concurrency))
+    timeout = aiohttp.ClientTimeout(total=30)
+
+    async def crawl(category_name: str) -> List[Dict]:
+        async with semaphore:
+            logger.info(f"--- 카테고리 '{category_name}' 수집 시작 ---")
+            return await crawler.fetch_products_api_async(
+                display_category_id=category_dir[category_name]["id"],
+                sort_type="DISPLAY_CATEGORY_GENDER_AGE_GROUP_F20",
+                max_pages=25,
+                page_size=20,
+                scraped_time=scraped_time,
+                category_name=category_name,
+                client=client,
+                limiter=limiter,
+                concurrency=concurrency
+            )
+
+    async with aiohttp.ClientSession(headers=crawler._async_headers(), connector=connector,
+                                     timeout=timeout) as client:
+        products = await asyncio.gather(*(crawl(name) for name in category_names))
+    return dict(zip(category_names, products))
+
+
+def collect_all_products(bucket_name: str, category_names: Optional[List[str]] = None,
+                         concurrency: int = 4, category_concurrency: int = 4,
+                         requests_per_second: float = 2.0, max_requests_per_second: float = 5.0) -> Dict:
+    """여러 카테고리를 한 프로세스에서 동시에 수집 (세션/UserAgent, 커넥션 풀, 속도 제한, GCS 클라이언트 공유)
+
+    카테고리별 CSV는 기존 경로에 그대로 올리고, 카테고리 간 중복을 제거한 CSV를
+    raw-data/naver/products/all/... 에 함께 올린다 (리뷰 수집 대상은 이 파일 기준).
+    """
+    category_names = category_names or list(category_dir)
+    crawler = NaverShoppingCrawler()
+    scraped_time = datetime.now(timezone.utc)
+    limiter = AdaptiveTokenBucket(requests_per_second, capacity=concurrency, max_rate=max_requests_per_second)
+
+    logger.info(f"🚀 {len(category_names)}개 카테고리 동시 수집 시작")
+    started = time.monotonic()
+    results = asyncio.run(_crawl_categories(
+        crawler, category_names, scraped_time, concurrency, category_concurrency, limiter))
+    crawl_sec = time.monotonic() - started
+
+    client = storage.Client()
+    categories = []
+    for category_name, products in results.items():
+        if not products:
+            logger.warning(f"⚠️ {category_name} 상품 없음")
+        uploaded = crawler.save_and_upload(products, category_name, scraped_time, bucket_name, client=client)
+        categories.append({"category_name": category_name, "product_count": len(products),
+                           "gcs_uploaded": uploaded})
+
+    deduped = dedupe_products(results)
+    total = sum(len(products) for products in results.values())
+    dedup_uploaded = crawler.save_and_upload(deduped, "all", scraped_time, bucket_name, client=client)
+    logger.info(f"\n📦 총 {total}개 수집, 카테고리 간 중복 제거 후 {len(deduped)}개 "
+                f"(수집 {crawl_sec:.1f}초, 최종 속도 {limiter.rate:.2f}/s, 속도 제한 응답 {limiter.throttle_count}회)")
+
+    return {
+        "category_count": len(category_names),
+        "product_count": total,
+        "unique_product_count": len(deduped),
+        "dedup_uploaded": dedup_uploaded,
+        "crawl_sec": round(crawl_sec, 2),
+        "categories": categories,
+        "scraped_at": scraped_time.isoformat()
+    }
@@ -0,0 +1,77 @@
+"""
+asyncio용 요청 속도 제한기 (토큰 버킷 + 응답 기반 속도 조절)
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class AsyncTokenBucket:
+    """초당 rate개 토큰을 채우고 최대 capacity개까지 버스트를 허용하는 토큰 버킷
+
+    여러 코루틴이 하나의 버킷을 공유하면 전체 요청 속도가 rate 이하로 유지된다.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate는 0보다 커야 합니다.")
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        # 이벤트 루프가 뜬 뒤(첫 사용 시) 생성
+        self._lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """토큰을 얻을 때까지 대기"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class AdaptiveTokenBucket(AsyncTokenBucket):
+    """응답에 따라 rate를 조절하는 토큰 버킷 (AIMD)
+
+    - 성공이 success_window번 이어질 때마다 rate += step (max_rate까지)
+    - 429/5xx 응답이면 rate *= backoff (min_rate까지), 버킷을 비워 바로 다음 요청을 늦춤
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, min_rate: float = 0.5,
+                 max_rate: Optional[float] = None, step: float = 0.5,
+                 backoff: float = 0.5, success_window: int = 5):
+        super().__init__(rate, capacity)
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max(max_rate or rate, rate)
+        self.step = step
+        self.backoff = backoff
+        self.success_window = max(1, success_window)
+        self.throttle_count = 0
+        self._successes = 0
+
+    def _set_rate(self, rate: float):
+        # 지금까지 쌓인 토큰은 기존 속도로 정산한 뒤 변경
+        self._refill()
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+
+    def on_success(self):
+        self._successes += 1
+        if self._successes >= self.success_window:
+            self._successes = 0
+            self._set_rate(self.rate + self.step)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        self._successes = 0
+        self.throttle_count += 1
+        self._set_rate(self.rate * self.backoff)
+        # Retry-After가 있으면 그 시간만큼 토큰을 빚으로 잡아 대기
+        self._tokens = -retry_after * self.rate if retry_after else min(self._tokens, 0.0)
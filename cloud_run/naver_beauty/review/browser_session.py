@@ -0,0 +1,237 @@
+# browser_session.py
+# Selenium 크롬 세션 공통 설정
+# - CDP Network.setBlockedURLs로 이미지/미디어/폰트/광고·분석 스크립트 요청 차단
+# - 디스크 캐시 경로를 고정해 브라우저를 다시 띄워도 정적 리소스(JS/CSS) 재사용
+# - 페이지 로드 시간, 전송/캐시/차단 요청을 모아 크롤링이 끝날 때 절약량 보고
+import json
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 크롤링에 필요 없는 리소스 (DOM 텍스트/속성만 읽으므로 src URL은 그대로 남음)
+# 패턴은 URL 전체와 비교되므로 쿼리스트링(?type=w640 등)이 붙는 확장자는 끝에 * 를 둠
+BLOCKED_URL_PATTERNS = [
+    # 이미지
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico", "*.bmp*",
+    # 미디어
+    "*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*",
+    # 폰트
+    "*.woff*", "*.ttf*", "*.otf*", "*.eot*",
+    # 광고/분석
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*googleadservices.com*", "*facebook.net*", "*connect.facebook.*", "*criteo.*", "*hotjar.com*",
+    "*clarity.ms*", "*kakao.com/sdk*", "*wcs.naver.net*", "*nelo2*", "*datadoghq*", "*sentry.io*",
+    "*adsystem*", "*adservice*", "*mixpanel.com*", "*braze.com*", "*appsflyer.com*",
+]
+
+# 디스크 캐시 경로 (브라우저를 동시에 여러 개 띄우면 각자 다른 경로를 써야 함)
+CACHE_DIR = os.getenv("CHROME_CACHE_DIR", "/tmp/chrome-cache")
+CACHE_SIZE_BYTES = 256 * 1024 * 1024
+
+MB = 1024 * 1024
+
+NAVIGATION_TIME_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+return nav && nav.loadEventEnd > 0 ? nav.loadEventEnd - nav.startTime : null;
+"""
+
+
+def resource_blocking_enabled() -> bool:
+    return os.getenv("BLOCK_RESOURCES", "true").lower() != "false"
+
+
+def blocked_url_patterns() -> List[str]:
+    """기본 차단 목록 + EXTRA_BLOCKED_URLS(쉼표 구분 와일드카드 패턴)"""
+    extra = [p.strip() for p in os.getenv("EXTRA_BLOCKED_URLS", "").split(",") if p.strip()]
+    return BLOCKED_URL_PATTERNS + extra
+
+
+def prepare_options(options, cache_dir: str = CACHE_DIR):
+    """디스크 캐시 고정 + 네트워크 이벤트 기록(performance 로그)"""
+    options.add_argument(f"--disk-cache-dir={cache_dir}")
+    options.add_argument(f"--disk-cache-size={CACHE_SIZE_BYTES}")
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+class BrowserSession:
+    """드라이버 + 리소스 차단 설정 + 로드 통계
+
+    페이지 이동은 session.get(url)로 해야 로드 시간이 집계된다.
+    calibrate_first=True면 첫 get(url) 전에 같은 URL을 캐시 없이 차단 off/on으로 한 번씩 열어
+    페이지당 절약량을 재고, 보고서에 크롤링 전체 추정 절약량을 넣는다 (페이지 로드 2회 추가).
+    """
+
+    def __init__(self, driver, block_resources: bool = True, patterns: Optional[List[str]] = None,
+                 calibrate_first: bool = False):
+        self.driver = driver
+        self.block_resources = block_resources
+        self.patterns = patterns if patterns is not None else blocked_url_patterns()
+        self.pages = 0
+        self.load_ms = 0.0
+        self.transferred_bytes = 0
+        self.cache_hits = 0
+        self.cached_bytes = 0
+        self.blocked_by_type: Dict[str, int] = {}
+        self.baseline: Optional[Dict] = None
+        self._calibrate_pending = calibrate_first and block_resources
+        self._cached_ids = set()
+
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": False})
+        self._set_blocking(block_resources)
+
+    def _set_blocking(self, enabled: bool):
+        self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.patterns if enabled else []})
+
+    def _read_network_events(self) -> Dict:
+        """쌓인 performance 로그를 읽어 비움 → 전송 바이트, 캐시 적중, 차단 요청 집계"""
+        counts = {"bytes": 0, "cache_hits": 0, "cached_bytes": 0, "blocked": {}}
+        try:
+            logs = self.driver.get_log("performance")
+        except Exception:
+            return counts
+
+        for log in logs:
+            try:
+                message = json.loads(log["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            request_id = params.get("requestId")
+
+            if method == "Network.requestServedFromCache" or (
+                    method == "Network.responseReceived" and params.get("response", {}).get("fromDiskCache")):
+                if request_id not in self._cached_ids:
+                    self._cached_ids.add(request_id)
+                    counts["cache_hits"] += 1
+            elif method == "Network.dataReceived" and request_id in self._cached_ids:
+                counts["cached_bytes"] += params.get("dataLength", 0)
+            elif method == "Network.loadingFinished":
+                counts["bytes"] += int(params.get("encodedDataLength", 0))
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                resource_type = params.get("type", "Other")
+                counts["blocked"][resource_type] = counts["blocked"].get(resource_type, 0) + 1
+        return counts
+
+    def _drain(self):
+        counts = self._read_network_events()
+        self.transferred_bytes += counts["bytes"]
+        self.cache_hits += counts["cache_hits"]
+        self.cached_bytes += counts["cached_bytes"]
+        for resource_type, count in counts["blocked"].items():
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + count
+
+    def _navigation_ms(self) -> Optional[float]:
+        try:
+            return self.driver.execute_script(NAVIGATION_TIME_JS)
+        except Exception:
+            return None
+
+    def calibrate(self, url: str):
+        """url을 캐시 없이 차단 off/on으로 열어 페이지당 절약 바이트/시간 측정 (통계에는 넣지 않음)"""
+        self._drain()
+        measured = {}
+        try:
+            self.driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+            for blocked in (False, True):
+                self._set_blocking(blocked)
+                self.driver.get(url)
+                load_ms = self._navigation_ms() or 0.0
+                measured[blocked] = (self._read_network_events()["bytes"], load_ms)
+        except Exception as e:
+            logger.warning(f"⚠️ 리소스 차단 효과 측정 실패: {e}")
+            return
+        finally:
+            self.driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": False})
+            self._set_blocking(self.block_resources)
+
+        (full_bytes, full_ms), (blocked_bytes, blocked_ms) = measured[False], measured[True]
+        self.baseline = {
+            "bytes_per_page": max(full_bytes - blocked_bytes, 0),
+            "load_ms_per_page": max(full_ms - blocked_ms, 0.0),
+        }
+        logger.info(f"📏 페이지당 차단 효과: {full_bytes / MB:.2f}MB → {blocked_bytes / MB:.2f}MB, "
+                    f"{full_ms:.0f}ms → {blocked_ms:.0f}ms")
+
+    def get(self, url: str):
+        if self._calibrate_pending:
+            self._calibrate_pending = False
+            self.calibrate(url)
+        self.driver.get(url)
+        load_ms = self._navigation_ms()
+        if load_ms is not None:
+            self.pages += 1
+            self.load_ms += load_ms
+        self._drain()
+
+    def report(self) -> Dict:
+        """크롤링 동안의 리소스 통계 (calibrate 했으면 추정 절약량 포함)"""
+        self._drain()
+        report = {
+            "resource_blocking": self.block_resources,
+            "pages": self.pages,
+            "avg_load_ms": round(self.load_ms / self.pages, 1) if self.pages else None,
+            "transferred_mb": round(self.transferred_bytes / MB, 2),
+            "blocked_requests": sum(self.blocked_by_type.values()),
+            "blocked_by_type": dict(self.blocked_by_type),
+            "cache_hits": self.cache_hits,
+            "cache_saved_mb": round(self.cached_bytes / MB, 2),
+        }
+        if self.baseline:
+            saved_bytes = self.baseline["bytes_per_page"] * self.pages + self.cached_bytes
+            report["saved_mb_est"] = round(saved_bytes / MB, 2)
+            report["saved_load_sec_est"] = round(self.baseline["load_ms_per_page"] * self.pages / 1000, 1)
+        return report
+
+    def quit(self) -> Dict:
+        """통계를 로그로 남기고 브라우저 종료"""
+        report = self.report()
+        message = (f"📉 브라우저 리소스: 페이지 {report['pages']}개, 전송 {report['transferred_mb']}MB, "
+                   f"차단 {report['blocked_requests']}건, 캐시 재사용 {report['cache_saved_mb']}MB")
+        if "saved_mb_est" in report:
+            message += f", 추정 절약 {report['saved_mb_est']}MB / {report['saved_load_sec_est']}초"
+        logger.info(message)
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"⚠️ 브라우저 종료 실패: {e}")
+        return report
+
+
+def create_browser_session(options, driver_factory: Callable, block_resources: Optional[bool] = None,
+                           calibrate_first: Optional[bool] = None) -> BrowserSession:
+    """options로 드라이버를 만들고 리소스 차단을 적용한 세션 반환
+
+    driver_factory: webdriver.Chrome 또는 undetected_chromedriver.Chrome (options= 키워드로 호출)
+    BLOCK_RESOURCES=false면 차단 없이 통계만, RESOURCE_CALIBRATE=true면 첫 페이지에서 절약량 측정.
+    """
+    if block_resources is None:
+        block_resources = resource_blocking_enabled()
+    if calibrate_first is None:
+        calibrate_first = os.getenv("RESOURCE_CALIBRATE", "false").lower() == "true"
+    driver = driver_factory(options=prepare_options(options))
+    return BrowserSession(driver, block_resources=block_resources, calibrate_first=calibrate_first)
+
+
+def sum_reports(reports: List[Dict]) -> Dict:
+    """브라우저를 여러 번 띄운 경우(워커 재시작) 보고서 합산"""
+    total: Dict = {"pages": 0, "transferred_mb": 0.0, "blocked_requests": 0, "cache_hits": 0,
+                   "cache_saved_mb": 0.0, "blocked_by_type": {}}
+    load_ms = 0.0
+    for report in reports:
+        for key in ("pages", "transferred_mb", "blocked_requests", "cache_hits", "cache_saved_mb"):
+            total[key] += report.get(key) or 0
+        load_ms += (report.get("avg_load_ms") or 0) * (report.get("pages") or 0)
+        for resource_type, count in report.get("blocked_by_type", {}).items():
+            total["blocked_by_type"][resource_type] = total["blocked_by_type"].get(resource_type, 0) + count
+        for key in ("saved_mb_est", "saved_load_sec_est"):
+            if key in report:
+                total[key] = round(total.get(key, 0) + report[key], 2)
+    total["avg_load_ms"] = round(load_ms / total["pages"], 1) if total["pages"] else None
+    total["transferred_mb"] = round(total["transferred_mb"], 2)
+    total["cache_saved_mb"] = round(total["cache_saved_mb"], 2)
+    return total
@@ -18,3 +18,8 @@ def upload_to_gcs(bucket_name: str, content: Union[str, bytes], blob_path: str,
             blob.upload_from_file(f, content_type=content_type)
     
     #logging.info(f"✅ 업로드 완료: gs://{bucket_name}/{blob_path}")
+
+def download_text_from_gcs(bucket_name: str, blob_path: str) -> str:
+    """GCS 파일을 텍스트로 읽기"""
+    client = storage.Client()
+    return client.bucket(bucket_name).blob(blob_path).download_as_text(encoding="utf-8")
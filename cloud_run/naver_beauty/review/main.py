@@ -1,4 +1,6 @@
 import os
+import json
+import sys
 from datetime import datetime, timezone
 from naver_review_crawler import collect_and_save
 
@@ -10,16 +12,43 @@ def get_env_var(name: str, required=True, default: str = None) -> str:
 
 if __name__ == "__main__":
     # ✅ 환경 변수로부터 값 읽기
-    product_id = get_env_var("PRODUCT_ID")
-    product_url = get_env_var("PRODUCT_URL")
-    category = get_env_var("CATEGORY")
     bucket_name = get_env_var("BUCKET_NAME")
     sort_type = get_env_var("SORT_OPTION", required=False, default="랭킹순")  # ✅ 이름 통일
     max_reviews = int(get_env_var("MAX_REVIEWS", required=False, default="100"))  # ✅ 숫자 변환
+    # ✅ REVIEW_SOURCE=selenium이면 API를 건너뛰고 브라우저로만 수집
+    use_api = get_env_var("REVIEW_SOURCE", required=False, default="api").lower() != "selenium"
+    # ✅ REVIEW_DEDUP=true면 정렬 옵션이 달라도 이미 올린 리뷰는 건너뜀 (상품별 review_id 목록 유지)
+    seen_path = None
+    if get_env_var("REVIEW_DEDUP", required=False, default="false").lower() == "true":
+        seen_path = get_env_var("SEEN_STATE_PATH", required=False,
+                                default=f"gs://{bucket_name}/state/naver/review_seen")
 
     # ✅ 타임스탬프 생성
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M")
 
+    # ✅ TASKS_FILE이 있으면 워커 모드 (브라우저 하나로 여러 상품 처리)
+    tasks_file = get_env_var("TASKS_FILE", required=False)
+    if tasks_file:
+        from review_worker import load_tasks, run_worker
+
+        summary = run_worker(
+            load_tasks(tasks_file),
+            bucket_name=bucket_name,
+            timestamp=timestamp,
+            max_reviews=max_reviews,
+            sort_option=sort_type,
+            use_api=use_api,
+            seen_path=seen_path,
+            max_products=int(get_env_var("BROWSER_MAX_PRODUCTS", required=False, default="20")),
+            max_memory_mb=float(get_env_var("BROWSER_MAX_MEMORY_MB", required=False, default="1500"))
+        )
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        sys.exit(1 if summary["task_count"] and summary["error_count"] == summary["task_count"] else 0)
+
+    product_id = get_env_var("PRODUCT_ID")
+    product_url = get_env_var("PRODUCT_URL")
+    category = get_env_var("CATEGORY")
+
     # ✅ 리뷰 수집 실행
     collect_and_save(
         product_id=product_id,
@@ -28,5 +57,7 @@ if __name__ == "__main__":
         bucket_name=bucket_name,
         timestamp=timestamp,
         max_reviews=max_reviews,
-        sort_option=sort_type 
+        sort_option=sort_type,
+        use_api=use_api,
+        seen_path=seen_path
     )
@@ -0,0 +1,155 @@
+# naver_review_api.py
+# 상품 페이지가 리뷰 탭에서 호출하는 JSON 리뷰 API를 직접 호출 (브라우저 없이 상품당 수 초)
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import requests
+
+# 상품 페이지 리뷰 탭이 호출하는 엔드포인트 (페이지 구조가 바뀌면 환경변수로 교체)
+REVIEW_API_URL = os.getenv("REVIEW_API_URL", "https://smartstore.naver.com/i/v1/contents/reviews/query-pages")
+
+# 화면 정렬 텍스트 → API 정렬값
+API_SORT_TYPES = {
+    "랭킹순": "REVIEW_RANKING",
+    "최신순": "REVIEW_CREATE_DATE_DESC",
+    "평점 높은순": "REVIEW_SCORE_DESC",
+    "평점 낮은순": "REVIEW_SCORE_ASC",
+}
+
+# 상품 페이지 __PRELOADED_STATE__ 안의 리뷰 조회 키
+_MERCHANT_NO_RE = re.compile(r'"(?:checkoutMerchantNo|merchantNo)"\s*:\s*"?(\d+)')
+_ORIGIN_PRODUCT_NO_RE = re.compile(r'"originProductNo"\s*:\s*"?(\d+)')
+
+
+class ReviewApiError(Exception):
+    """API로 리뷰를 가져오지 못함 (호출 측에서 Selenium으로 대체)"""
+
+
+def parse_review_keys(html: str) -> Dict[str, str]:
+    """상품 페이지 HTML → 리뷰 API 조회 키 (merchant_no, origin_product_no)"""
+    merchant = _MERCHANT_NO_RE.search(html)
+    origin = _ORIGIN_PRODUCT_NO_RE.search(html)
+    if not merchant or not origin:
+        raise ReviewApiError("상품 페이지에서 merchantNo/originProductNo를 찾지 못함")
+    return {"merchant_no": merchant.group(1), "origin_product_no": origin.group(1)}
+
+
+def _format_created_at(value: Optional[str]) -> Optional[str]:
+    # 화면 표기(YY.MM.DD.)와 같은 형식으로 맞춤 (Selenium 수집 결과와 컬럼 호환)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:10], "%Y-%m-%d").strftime("%y.%m.%d.")
+    except ValueError:
+        return value
+
+
+def parse_review_item(item: Dict, category_name: str, product_id: str, sort_option: str,
+                      scraped_at: Optional[str] = None) -> Dict:
+    """API 리뷰 항목 → Selenium 수집과 같은 컬럼의 리뷰 행"""
+    score = item.get("reviewScore")
+    return {
+        "review_id": str(item["id"]) if item.get("id") is not None else None,
+        "username": item.get("writerMemberId") or item.get("writerMemberNickname"),
+        "created_at": _format_created_at(item.get("createDate")),
+        "scraped_at": scraped_at or datetime.now(timezone.utc).isoformat(),
+        "rating": str(score) if score is not None else None,
+        "content": (item.get("reviewContent") or "").strip() or None,
+        "option": (item.get("productOptionContent") or "").strip() or None,
+        "category": category_name,
+        "product_id": product_id,
+        "sort_option": sort_option,
+    }
+
+
+def parse_review_page(data: Dict, category_name: str, product_id: str, sort_option: str,
+                      scraped_at: Optional[str] = None) -> List[Dict]:
+    """API 응답 한 페이지 → 리뷰 행 목록 (본문 없는 리뷰는 Selenium 수집과 같이 제외)"""
+    reviews = []
+    for item in data.get("contents") or []:
+        review = parse_review_item(item, category_name, product_id, sort_option, scraped_at)
+        if review["content"]:
+            reviews.append(review)
+    return reviews
+
+
+class NaverReviewApiClient:
+    def __init__(self, session: Optional[requests.Session] = None, page_size: int = 20,
+                 request_delay: float = 0.3, timeout: float = 10):
+        self.session = session or requests.Session()
+        self.session.headers.setdefault("Accept", "application/json, text/plain, */*")
+        self.session.headers.setdefault("Accept-Language", "ko-KR,ko;q=0.9,en;q=0.8")
+        if "Mozilla" not in self.session.headers.get("User-Agent", ""):
+            self.session.headers["User-Agent"] = (
+                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+            )
+        self.page_size = page_size
+        self.request_delay = request_delay
+        self.timeout = timeout
+
+    def resolve_review_keys(self, product_url: str) -> Dict[str, str]:
+        try:
+            response = self.session.get(product_url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise ReviewApiError(f"상품 페이지 요청 실패: {e}") from e
+        return parse_review_keys(response.text)
+
+    def fetch_page(self, keys: Dict[str, str], page: int, sort_type: str, referer: str) -> Dict:
+        payload = {
+            "checkoutMerchantNo": int(keys["merchant_no"]),
+            "originProductNo": int(keys["origin_product_no"]),
+            "page": page,
+            "pageSize": self.page_size,
+            "reviewSearchSortType": sort_type,
+        }
+        try:
+            response = self.session.post(REVIEW_API_URL, json=payload, timeout=self.timeout,
+                                         headers={"Referer": referer})
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            raise ReviewApiError(f"리뷰 API {page}페이지 요청 실패: {e}") from e
+
+    def collect_reviews(self, product_id: str, product_url: str, category_name: str,
+                        sort_option: str = "랭킹순", max_reviews: int = 100,
+                        seen=None) -> List[Dict]:
+        """리뷰 API로 최대 max_reviews개 수집. 실패하면 ReviewApiError
+
+        seen(SeenReviewIds)을 넘기면 이미 수집한 리뷰는 건너뛰고, 한 페이지가 모두 중복이면 멈춘다.
+        """
+        sort_type = API_SORT_TYPES.get(sort_option)
+        if not sort_type:
+            raise ReviewApiError(f"지원하지 않는 정렬 옵션: {sort_option}")
+
+        keys = self.resolve_review_keys(product_url)
+        scraped_at = datetime.now(timezone.utc).isoformat()
+        reviews: List[Dict] = []
+        page = 1
+        while len(reviews) < max_reviews:
+            data = self.fetch_page(keys, page, sort_type, product_url)
+            page_reviews = parse_review_page(data, category_name, product_id, sort_option, scraped_at)
+            if not data.get("contents"):
+                break
+            if seen is not None and page_reviews:
+                unseen = seen.filter_new(page_reviews)
+                if not unseen:
+                    logging.info(f"⏹️ API {page}페이지 리뷰가 모두 이미 수집됨 → '{sort_option}' 조기 종료")
+                    break
+                page_reviews = unseen
+            reviews.extend(page_reviews)
+            logging.info(f"🔁 API {page}페이지 {len(page_reviews)}개 (누적 {len(reviews)})")
+
+            total_pages = data.get("totalPages")
+            if data.get("last") or (total_pages is not None and page >= total_pages):
+                break
+            page += 1
+            time.sleep(self.request_delay)
+
+        return reviews[:max_reviews]
@@ -4,7 +4,7 @@ import sys
 import os
 import time
 import tempfile
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 from datetime import datetime, timezone
 import pandas as pd
 
@@ -16,6 +16,9 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
 from gcs_uploader import upload_to_gcs
+from naver_review_api import NaverReviewApiClient, ReviewApiError
+from seen_reviews import SeenReviewIds
+from browser_session import BrowserSession, create_browser_session
 
 # ✅ 로깅 설정
 logging.basicConfig(
@@ -51,45 +54,41 @@ def click_sort_option(driver, text: str = "최신순"):
     except Exception as e:
         logging.warning(f"⚠️ 리뷰 정렬 '{text}' 클릭 실패: {e}")
 
-def parse_review_element(element) -> Dict:
-    def safe_find(selector, by=By.CSS_SELECTOR, many=False):
-        try:
-            return (element.find_elements if many else element.find_element)(by, selector)
-        except:
-            return [] if many else None
-
-    review_id = element.get_attribute("data-shp-contents-id")
-    username = safe_find("strong._2L3vDiadT9")
-    username = username.text.strip() if username else None
-
-    date_spans = safe_find("span._2L3vDiadT9", many=True)
-    created_at = next((s.text.strip() for s in date_spans if "." in s.text), None)
-
-    rating = safe_find("em._15NU42F3kT")
-    rating = rating.text.strip() if rating else None
-
-    content = None
-    try:
-        content_element = element.find_element(By.CSS_SELECTOR, "div._1kMfD5ErZ6 > span._2L3vDiadT9")
-        content = content_element.text.strip()
-    except:
-        try:
-            fallback = element.find_element(By.CSS_SELECTOR, "div._3z6gI4oI6l")
-            content = fallback.text.strip()
-        except:
-            content = None
-
-    option = safe_find("div._2FXNMst_ak")
-    option = option.text.strip() if option else None
-
+# 리뷰 목록의 "더보기"를 모두 펼친 뒤 리뷰별 필드를 JSON 배열로 한 번에 반환 (WebDriver 왕복 1회)
+EXTRACT_REVIEWS_JS = """
+const done = arguments[arguments.length - 1];
+const items = Array.from(document.querySelectorAll('li.BnwL_cs1av'));
+let expanded = 0;
+for (const li of items) {
+  const more = li.querySelector('span._3R1ftMxgoY');
+  if (more) { more.click(); expanded++; }
+}
+const text = (el) => (el ? el.innerText.trim() : null);
+const collect = () => done(items.map((li) => {
+  const content = li.querySelector('div._1kMfD5ErZ6 > span._2L3vDiadT9');
+  return {
+    review_id: li.getAttribute('data-shp-contents-id'),
+    username: text(li.querySelector('strong._2L3vDiadT9')),
+    date_texts: Array.from(li.querySelectorAll('span._2L3vDiadT9')).map((s) => s.innerText),
+    rating: text(li.querySelector('em._15NU42F3kT')),
+    content: content ? text(content) : text(li.querySelector('div._3z6gI4oI6l')),
+    option: text(li.querySelector('div._2FXNMst_ak')),
+  };
+}));
+// 펼친 본문이 다시 그려질 시간을 준 뒤 수집
+if (expanded) { setTimeout(collect, 100); } else { collect(); }
+"""
+
+def parse_review_record(record: Dict) -> Dict:
+    created_at = next((t.strip() for t in record.get("date_texts") or [] if "." in t), None)
     return {
-        "review_id": review_id,
-        "username": username,
+        "review_id": record.get("review_id"),
+        "username": record.get("username"),
         "created_at": created_at,
         "scraped_at": datetime.now(timezone.utc).isoformat(),
-        "rating": rating,
-        "content": content,
-        "option": option
+        "rating": record.get("rating"),
+        "content": record.get("content"),
+        "option": record.get("option")
     }
 
 def extract_reviews_from_page(driver, category_name: str, product_id: str, sort_option: str) -> List[Dict]:
@@ -97,36 +96,64 @@ def extract_reviews_from_page(driver, category_name: str, product_id: str, sort_
         logging.warning("⚠️ 리뷰 요소 로딩 실패 → 페이지 건너뜀")
         return []
 
-    review_elements = driver.find_elements(By.CSS_SELECTOR, "li.BnwL_cs1av")
-    reviews = []
+    try:
+        records = driver.execute_async_script(EXTRACT_REVIEWS_JS) or []
+    except Exception as e:
+        logging.warning(f"❌ 리뷰 추출 스크립트 실패: {e}")
+        return []
 
-    for element in review_elements:
-        try:
-            more_span = element.find_elements(By.CSS_SELECTOR, "span._3R1ftMxgoY")
-            if more_span:
-                driver.execute_script("arguments[0].click();", more_span[0])
-                time.sleep(0.1)
-
-            review = parse_review_element(element)
-            if review.get("content"):
-                review["category"] = category_name
-                review["product_id"] = product_id
-                review["sort_option"] = sort_option
-                reviews.append(review)
-        except Exception as e:
-            logging.warning(f"❌ 리뷰 파싱 실패: {e}")
-            continue
+    reviews = []
+    for record in records:
+        review = parse_review_record(record)
+        if review.get("content"):
+            review["category"] = category_name
+            review["product_id"] = product_id
+            review["sort_option"] = sort_option
+            reviews.append(review)
 
     return reviews
 
 def collect_and_save(product_id: str, category_name: str, product_url: str,
-                     bucket_name: str, timestamp: str, max_reviews: int = 100, sort_option: str = "랭킹순"):
+                     bucket_name: str, timestamp: str, max_reviews: int = 100, sort_option: str = "랭킹순",
+                     use_api: bool = True, get_session: Optional[Callable[[], BrowserSession]] = None,
+                     seen_path: Optional[str] = None) -> int:
+    # get_session: 재사용할 브라우저 세션을 돌려주는 함수 (Selenium 대체가 필요할 때만 호출)
+    # seen_path: 상품별 수집 review_id 저장 위치 (있으면 다른 정렬로 이미 올린 리뷰는 건너뜀)
     logging.info(f"🔍 리뷰 수집 시작: [{category_name}] {product_id}")
+    started = time.monotonic()
     reviews = []
-    MAX_PAGES = 10
-    empty_page_streak = 0
-    MAX_EMPTY_PAGES = 3
+    source = "selenium"
+    seen = SeenReviewIds.load(product_id, seen_path) if seen_path else None
+
+    # 리뷰 API 직접 호출이 기본, 실패하면 브라우저로 대체
+    if use_api:
+        try:
+            reviews = NaverReviewApiClient().collect_reviews(
+                product_id, product_url, category_name, sort_option=sort_option, max_reviews=max_reviews,
+                seen=seen)
+            source = "api"
+        except ReviewApiError as e:
+            logging.warning(f"⚠️ 리뷰 API 수집 실패 → Selenium으로 대체: {e}")
+            if seen is not None:
+                seen = SeenReviewIds.load(product_id, seen_path)
 
+    if source == "selenium":
+        reviews = collect_reviews_selenium(product_id, category_name, product_url, max_reviews, sort_option,
+                                           session=get_session() if get_session else None, seen=seen)
+
+    logging.info(f"⏱️ {source} 수집 {time.monotonic() - started:.1f}초, 리뷰 {len(reviews)}개")
+
+    if not reviews:
+        logging.info(f"🧩 리뷰 없음 → 저장 없이 종료: {product_id}")
+        return 0
+
+    save_reviews(reviews, bucket_name, category_name, product_id, timestamp, max_reviews)
+    if seen is not None:
+        seen.commit(reviews[:max_reviews])
+    return min(len(reviews), max_reviews)
+
+def build_browser_session() -> BrowserSession:
+    # 이미지/폰트/광고 스크립트는 CDP로 차단 (browser_session.py)
     options = Options()
     options.add_argument("--headless")
     options.add_argument("--no-sandbox")
@@ -142,10 +169,25 @@ def collect_and_save(product_id: str, category_name: str, product_url: str,
     options.add_argument("--disable-features=NetworkService")
     options.add_argument("--no-first-run")
 
-    driver = webdriver.Chrome(options=options)
+    return create_browser_session(options, webdriver.Chrome)
+
+def collect_reviews_selenium(product_id: str, category_name: str, product_url: str,
+                             max_reviews: int = 100, sort_option: str = "랭킹순",
+                             session: Optional[BrowserSession] = None,
+                             seen: Optional[SeenReviewIds] = None) -> List[Dict]:
+    # session을 넘기면 재사용 (종료는 호출 측 담당), 없으면 상품마다 새로 띄우고 종료
+    reviews = []
+    MAX_PAGES = 10
+    empty_page_streak = 0
+    MAX_EMPTY_PAGES = 3
+
+    own_session = session is None
+    if own_session:
+        session = build_browser_session()
+    driver = session.driver
 
     try:
-        driver.get(product_url)
+        session.get(product_url)
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
         time.sleep(2)
 
@@ -162,7 +204,7 @@ def collect_and_save(product_id: str, category_name: str, product_url: str,
             click_sort_option(driver, text=sort_option)
         except TimeoutException:
             logging.warning(f"❌ 리뷰 탭 클릭 실패: {product_id}")
-            return
+            return reviews
 
         for page in range(1, MAX_PAGES + 1):
             if len(reviews) >= max_reviews:
@@ -182,6 +224,13 @@ def collect_and_save(product_id: str, category_name: str, product_url: str,
             else:
                 empty_page_streak = 0
 
+            if seen is not None:
+                unseen = seen.filter_new(new_reviews)
+                if not unseen:
+                    logging.info(f"⏹️ 페이지 {page} 리뷰가 모두 이미 수집됨 → '{sort_option}' 조기 종료")
+                    break
+                new_reviews = unseen
+
             reviews.extend(new_reviews)
             logging.info(f"🔁 총 누적 리뷰 수: {len(reviews)}")
 
@@ -198,13 +247,10 @@ def collect_and_save(product_id: str, category_name: str, product_url: str,
     except Exception as e:
         logging.error(f"❌ 수집 중 예외 발생: {e}")
     finally:
-        driver.quit()
+        if own_session:
+            session.quit()
 
-    if not reviews:
-        logging.info(f"🧩 리뷰 없음 → 저장 없이 종료: {product_id}")
-        return
-
-    save_reviews(reviews, bucket_name, category_name, product_id, timestamp, max_reviews)
+    return reviews
 
 def save_reviews(reviews: List[Dict], bucket_name: str, category_name: str,
                  product_id: str, timestamp: str, max_reviews: int):
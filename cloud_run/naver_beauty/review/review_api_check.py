@@ -0,0 +1,190 @@
+# review_api_check.py
+# 리뷰 API 클라이언트 녹화/재생 점검
+#   python review_api_check.py --record <product_id> <product_url>   # 실제 응답을 익명화해 fixtures/에 녹화
+#   python review_api_check.py fixtures/*.json                       # 녹화본으로 클라이언트 재생 + 컬럼 검사
+#   python -m pytest test_review_api_replay.py                       # fixtures/review_api_*.json 전체 재생
+# fixture 구성 (네트워크 없이 재생 가능)
+#   - product_html: 상품 페이지에서 조회 키 주변만 잘라 둔 HTML → parse_review_keys 검사
+#   - pages: 리뷰 API 응답 (작성자 id/닉네임은 가명, 프로필/첨부 URL은 제거)
+#   - expected_first_review: 첫 리뷰 행 기대값 (scraped_at 제외)
+# fixtures/review_api_anon_*.json 은 녹화본이 아니라 응답 구조를 본떠 손으로 만든 fixture로,
+# 응답이 끝난 뒤의 페이지(last / totalPages 이후)를 일부러 넣어 두어 종료 조건이 틀리면 리뷰 수가 달라짐
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import requests
+
+from naver_review_api import (NaverReviewApiClient, REVIEW_API_URL, _MERCHANT_NO_RE, _ORIGIN_PRODUCT_NO_RE,
+                              parse_review_keys)
+
+# Selenium 수집(parse_review_record + 메타데이터)과 같은 컬럼
+REVIEW_COLUMNS = ["review_id", "username", "created_at", "scraped_at", "rating",
+                  "content", "option", "category", "product_id", "sort_option"]
+
+# 녹화 시 익명화: 작성자 관련 키는 가명으로, URL/첨부 키는 제거
+_WRITER_KEY_RE = re.compile(r"writer|member|nickname", re.IGNORECASE)
+_DROP_KEY_RE = re.compile(r"url|image|attach|profile", re.IGNORECASE)
+HTML_EXCERPT_CHARS = 120
+
+
+class _Response:
+    def __init__(self, text: str = "", data: Dict = None):
+        self.text = text
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+class RecordingSession(requests.Session):
+    """실제 요청을 보내면서 상품 페이지와 리뷰 API 응답을 fixture로 모음"""
+
+    def __init__(self):
+        super().__init__()
+        self.fixture = {"product_html": None, "keys": None, "pages": {}}
+
+    def request(self, method, url, *args, **kwargs):
+        response = super().request(method, url, *args, **kwargs)
+        if method.upper() == "GET":
+            self.fixture["product_html"] = html_excerpt(response.text)
+            self.fixture["keys"] = parse_review_keys(response.text)
+        elif url == REVIEW_API_URL:
+            self.fixture["pages"][str(kwargs["json"]["page"])] = response.json()
+        return response
+
+
+def html_excerpt(html: str) -> str:
+    """상품 페이지 전체 대신 조회 키가 들어 있는 부분만 남김 (window-products/스마트스토어 공통)"""
+    spans = [m.span() for regex in (_MERCHANT_NO_RE, _ORIGIN_PRODUCT_NO_RE) for m in regex.finditer(html)]
+    if not spans:
+        return ""
+    return "\n".join(html[max(start - HTML_EXCERPT_CHARS, 0):end + HTML_EXCERPT_CHARS] for start, end in sorted(spans))
+
+
+def anonymize(value, pseudonyms: Dict[str, str]):
+    """리뷰 API 응답에서 작성자 식별 정보 제거 (같은 작성자는 같은 가명 유지)"""
+    if isinstance(value, list):
+        return [anonymize(v, pseudonyms) for v in value]
+    if not isinstance(value, dict):
+        return value
+    result = {}
+    for key, v in value.items():
+        if _DROP_KEY_RE.search(key) and not isinstance(v, (dict, list)):
+            continue
+        if _WRITER_KEY_RE.search(key) and not isinstance(v, (dict, list)):
+            if v is None:
+                result[key] = None
+            elif isinstance(v, str):
+                result[key] = pseudonyms.setdefault(v, f"us{len(pseudonyms):02d}****")
+            else:
+                result[key] = 0
+            continue
+        result[key] = anonymize(v, pseudonyms)
+    return result
+
+
+class ReplaySession(requests.Session):
+    """fixture에서 응답을 돌려주는 세션 (네트워크 없음)"""
+
+    def __init__(self, fixture: Dict):
+        super().__init__()
+        self.fixture = fixture
+
+    def get(self, url, *args, **kwargs):
+        if self.fixture.get("product_html"):
+            return _Response(text=self.fixture["product_html"])
+        keys = self.fixture["keys"]
+        return _Response(text=json.dumps({"merchantNo": keys["merchant_no"],
+                                          "originProductNo": keys["origin_product_no"]}))
+
+    def post(self, url, *args, json=None, **kwargs):
+        return _Response(data=self.fixture["pages"].get(str(json["page"]), {"contents": []}))
+
+
+def record(product_id: str, product_url: str, out_dir: str, sort_option: str, max_reviews: int) -> str:
+    session = RecordingSession()
+    NaverReviewApiClient(session=session).collect_reviews(
+        product_id, product_url, "fixture", sort_option=sort_option, max_reviews=max_reviews)
+    fixture = {"product_id": product_id, "product_url": product_url, "sort_option": sort_option,
+               "max_reviews": max_reviews, **session.fixture}
+    fixture["pages"] = anonymize(fixture["pages"], {})
+
+    # 기대값은 익명화한 응답을 재생한 결과로 기록
+    reviews = collect_from_fixture(fixture)
+    fixture["review_count"] = len(reviews)
+    if reviews:
+        fixture["expected_first_review"] = {k: v for k, v in reviews[0].items() if k != "scraped_at"}
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"review_api_{product_id}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False)
+    print(f"📼 녹화 완료: {path} (리뷰 {len(reviews)}개, {len(fixture['pages'])}페이지)")
+    return path
+
+
+def collect_from_fixture(fixture: Dict) -> List[Dict]:
+    client = NaverReviewApiClient(session=ReplaySession(fixture), request_delay=0)
+    return client.collect_reviews(fixture["product_id"], fixture["product_url"], "fixture",
+                                  sort_option=fixture["sort_option"], max_reviews=fixture["max_reviews"])
+
+
+def check_fixture(fixture: Dict) -> Tuple[List[Dict], List[str]]:
+    """fixture 재생 → (리뷰 행, 오류 목록)"""
+    reviews = collect_from_fixture(fixture)
+
+    errors = []
+    if fixture.get("product_html") and parse_review_keys(fixture["product_html"]) != fixture["keys"]:
+        errors.append("상품 페이지 키 파싱 불일치")
+    expected_first = fixture.get("expected_first_review")
+    if expected_first and reviews and any(reviews[0].get(k) != v for k, v in expected_first.items()):
+        errors.append(f"첫 리뷰 불일치: {reviews[0]}")
+    if len(reviews) != fixture["review_count"]:
+        errors.append(f"리뷰 수 {len(reviews)} != 녹화 {fixture['review_count']}")
+    if any(list(review) != REVIEW_COLUMNS for review in reviews):
+        errors.append("컬럼 불일치")
+    if any(not review["review_id"] or not review["content"] for review in reviews):
+        errors.append("review_id/content 누락")
+    if len({review["review_id"] for review in reviews}) != len(reviews):
+        errors.append("중복 review_id")
+    return reviews, errors
+
+
+def replay(paths: List[str]) -> bool:
+    ok = True
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            fixture = json.load(f)
+
+        started = time.perf_counter()
+        reviews, errors = check_fixture(fixture)
+        elapsed = time.perf_counter() - started
+
+        status = "✅" if not errors else "❌ " + ", ".join(errors)
+        print(f"{status} {os.path.basename(path)}: 리뷰 {len(reviews)}개, 재생 {elapsed * 1000:.1f}ms")
+        ok = ok and not errors
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("naver review api check")
+    parser.add_argument("fixtures", nargs="*", help="녹화한 fixture JSON")
+    parser.add_argument("--record", nargs=2, metavar=("PRODUCT_ID", "PRODUCT_URL"))
+    parser.add_argument("--out_dir", default="fixtures")
+    parser.add_argument("--sort_option", default="랭킹순")
+    parser.add_argument("--max_reviews", type=int, default=100)
+    args = parser.parse_args()
+
+    paths = list(args.fixtures)
+    if args.record:
+        paths.append(record(*args.record, args.out_dir, args.sort_option, args.max_reviews))
+    if not paths:
+        parser.error("fixture 경로 또는 --record 가 필요합니다.")
+    sys.exit(0 if replay(paths) else 1)
@@ -0,0 +1,194 @@
+# review_worker.py
+# 브라우저 하나를 살려 둔 채 여러 상품 리뷰를 차례로 수집하는 워커 모드
+import csv
+import io
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from browser_session import BrowserSession, sum_reports
+from gcs_uploader import download_text_from_gcs
+from naver_review_crawler import build_browser_session, collect_and_save
+
+
+def _process_tree_rss_mb(root_pid: int) -> float:
+    """root_pid와 모든 자식 프로세스의 RSS 합계 (MB, /proc 기준)"""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # comm에 공백/괄호가 있을 수 있어 마지막 ')' 뒤에서 ppid를 읽음
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+        stack.extend(children.get(pid, []))
+    return total / (1024 * 1024)
+
+
+class BrowserWorker:
+    """Chrome 하나를 여러 상품에 재사용
+
+    - 브라우저는 처음 필요할 때(API 수집 실패 시) 띄움
+    - 상품 사이에는 쿠키/스토리지/추가 창을 정리해 이전 상품 상태가 남지 않게 함
+    - max_products개 상품을 처리했거나 브라우저 프로세스 메모리가 max_memory_mb를 넘으면 재시작
+    """
+
+    def __init__(self, max_products: int = 20, max_memory_mb: float = 1500):
+        self.max_products = max(1, max_products)
+        self.max_memory_mb = max_memory_mb
+        self.launch_count = 0
+        # 종료한 브라우저들의 리소스 통계 (browser_session.BrowserSession.report)
+        self.resource_reports: List[Dict] = []
+        self._session: Optional[BrowserSession] = None
+        self._products_on_driver = 0
+        self._used = False
+
+    def get_session(self) -> BrowserSession:
+        if self._session is None:
+            self._session = build_browser_session()
+            self._products_on_driver = 0
+            self.launch_count += 1
+            logging.info(f"🌐 브라우저 시작 ({self.launch_count}번째)")
+        self._used = True
+        return self._session
+
+    def memory_mb(self) -> Optional[float]:
+        try:
+            return _process_tree_rss_mb(self._session.driver.service.process.pid)
+        except Exception:
+            return None
+
+    def reset(self):
+        """다음 상품 전에 브라우저 상태 초기화"""
+        driver = self._session.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        # 스토리지는 현재 origin 기준이라 about:blank로 나가기 전에 비움
+        driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def after_product(self):
+        """상품 하나 끝난 뒤 호출 - 상태 초기화 또는 재시작 판단"""
+        if self._session is None or not self._used:
+            return
+        self._used = False
+        self._products_on_driver += 1
+
+        memory = self.memory_mb()
+        if self._products_on_driver >= self.max_products:
+            logging.info(f"♻️ 상품 {self._products_on_driver}개 처리 → 브라우저 재시작")
+            self.quit()
+        elif memory is not None and memory > self.max_memory_mb:
+            logging.info(f"♻️ 브라우저 메모리 {memory:.0f}MB > {self.max_memory_mb:.0f}MB → 재시작")
+            self.quit()
+        else:
+            try:
+                self.reset()
+            except Exception as e:
+                logging.warning(f"⚠️ 브라우저 초기화 실패 → 재시작: {e}")
+                self.quit()
+
+    def quit(self):
+        if self._session is not None:
+            self.resource_reports.append(self._session.quit())
+            self._session = None
+
+
+def load_tasks(path: str) -> List[Dict]:
+    """작업 목록 로드 (로컬 또는 gs:// 경로의 CSV/JSON)
+
+    CSV는 상품 수집 결과(product_id, product_url, category_name) 형식을 그대로 받는다.
+    product_id 기준으로 중복 제거.
+    """
+    if path.startswith("gs://"):
+        bucket_name, _, blob_path = path[len("gs://"):].partition("/")
+        text = download_text_from_gcs(bucket_name, blob_path)
+    else:
+        with open(path, encoding="utf-8-sig") as f:
+            text = f.read()
+    text = text.lstrip("\ufeff")  # utf-8-sig로 저장된 CSV
+
+    if path.endswith(".json"):
+        rows = json.loads(text)
+    else:
+        rows = list(csv.DictReader(io.StringIO(text)))
+
+    tasks, seen = [], set()
+    for row in rows:
+        product_id = str(row.get("product_id") or "").strip()
+        product_url = (row.get("product_url") or "").strip()
+        category = row.get("category") or row.get("category_name") or ""
+        if not product_id or not product_url or product_url == "N/A" or product_id in seen:
+            continue
+        seen.add(product_id)
+        tasks.append({"product_id": product_id, "product_url": product_url, "category": category})
+    return tasks
+
+
+def run_worker(tasks: List[Dict], bucket_name: str, timestamp: str, max_reviews: int = 100,
+               sort_option: str = "랭킹순", use_api: bool = True, seen_path: Optional[str] = None,
+               max_products: int = 20, max_memory_mb: float = 1500) -> Dict:
+    """작업 큐를 차례로 처리 (상품 하나가 실패해도 다음 상품 계속)"""
+    worker = BrowserWorker(max_products=max_products, max_memory_mb=max_memory_mb)
+    started = time.monotonic()
+    results = []
+
+    try:
+        for index, task in enumerate(tasks, 1):
+            logging.info(f"📋 [{index}/{len(tasks)}] {task['product_id']}")
+            task_started = time.monotonic()
+            try:
+                count = collect_and_save(
+                    product_id=task["product_id"],
+                    category_name=task["category"],
+                    product_url=task["product_url"],
+                    bucket_name=bucket_name,
+                    timestamp=timestamp,
+                    max_reviews=max_reviews,
+                    sort_option=sort_option,
+                    use_api=use_api,
+                    get_session=worker.get_session,
+                    seen_path=seen_path
+                )
+                status = "success"
+            except Exception as e:
+                logging.error(f"❌ {task['product_id']} 처리 실패: {e}", exc_info=True)
+                count, status = 0, "error"
+                # 브라우저 상태를 알 수 없으므로 새로 띄움
+                worker.quit()
+            worker.after_product()
+            results.append({"product_id": task["product_id"], "status": status, "review_count": count,
+                            "elapsed_sec": round(time.monotonic() - task_started, 2)})
+    finally:
+        worker.quit()
+
+    error_count = sum(1 for r in results if r["status"] != "success")
+    return {
+        "task_count": len(tasks),
+        "error_count": error_count,
+        "review_count": sum(r["review_count"] for r in results),
+        "browser_launches": worker.launch_count,
+        "browser_resources": sum_reports(worker.resource_reports),
+        "elapsed_sec": round(time.monotonic() - started, 2),
+        "results": results
+    }
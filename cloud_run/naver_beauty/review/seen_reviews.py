@@ -0,0 +1,81 @@
+# seen_reviews.py
+# 상품별로 이미 수집한 review_id 목록 (정렬 옵션을 바꿔 다시 수집해도 중복 리뷰는 건너뜀)
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Set
+
+from google.api_core.exceptions import NotFound
+
+from gcs_uploader import download_text_from_gcs, upload_to_gcs
+
+
+class SeenReviewIds:
+    """{base_path}/{product_id}.txt 에 정렬된 review_id를 한 줄에 하나씩 보관
+
+    오탐이 있으면 새 리뷰를 잃으므로 Bloom filter 대신 정확한 id 목록을 쓴다
+    (상품당 수천 건 × 10여 바이트라 크기 부담이 없음).
+    base_path 예: gs://bucket/state/naver/review_seen 또는 ./state/review_seen
+    """
+
+    def __init__(self, product_id: str, base_path: str, ids: Optional[Set[str]] = None):
+        self.product_id = product_id
+        self.base_path = base_path.rstrip("/")
+        self.ids: Set[str] = ids or set()
+        # 이번 실행에서 통과시킨 id (같은 실행 안의 페이지 중복도 거름)
+        self._pending: Set[str] = set()
+
+    def _location(self):
+        if self.base_path.startswith("gs://"):
+            bucket_name, _, prefix = self.base_path[len("gs://"):].partition("/")
+            blob_path = f"{prefix}/{self.product_id}.txt" if prefix else f"{self.product_id}.txt"
+            return bucket_name, blob_path
+        return None, os.path.join(self.base_path, f"{self.product_id}.txt")
+
+    @classmethod
+    def load(cls, product_id: str, base_path: str) -> "SeenReviewIds":
+        seen = cls(product_id, base_path)
+        bucket_name, path = seen._location()
+        try:
+            if bucket_name:
+                text = download_text_from_gcs(bucket_name, path)
+            elif os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    text = f.read()
+            else:
+                text = ""
+        except NotFound:
+            text = ""
+        seen.ids = {line.strip() for line in text.splitlines() if line.strip()}
+        logging.info(f"🗂️ {product_id} 기존 수집 리뷰 {len(seen.ids)}개")
+        return seen
+
+    def filter_new(self, reviews: List[Dict]) -> List[Dict]:
+        """처음 보는 리뷰만 반환 (review_id가 없는 리뷰는 그대로 통과)"""
+        new_reviews = []
+        for review in reviews:
+            review_id = review.get("review_id")
+            if review_id:
+                if review_id in self.ids or review_id in self._pending:
+                    continue
+                self._pending.add(review_id)
+            new_reviews.append(review)
+        return new_reviews
+
+    def commit(self, reviews: Iterable[Dict]) -> bool:
+        """업로드한 리뷰의 id를 추가해 저장 (업로드가 끝난 뒤 호출)"""
+        self.ids.update(r["review_id"] for r in reviews if r.get("review_id"))
+        content = "\n".join(sorted(self.ids)) + "\n"
+        bucket_name, path = self._location()
+        try:
+            if bucket_name:
+                upload_to_gcs(bucket_name, content.encode("utf-8"), path, content_type="text/plain", from_bytes=True)
+            else:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logging.error(f"❌ {self.product_id} 수집 리뷰 id 저장 실패: {e}")
+            return False
@@ -0,0 +1,51 @@
+# test_review_api_replay.py
+# fixtures/review_api_*.json 재생 테스트 (네트워크 없음)
+#   python -m pytest cloud_run/naver_beauty/review/test_review_api_replay.py
+import glob
+import json
+import os
+
+import pytest
+
+from review_api_check import anonymize, check_fixture, html_excerpt
+from naver_review_api import parse_review_keys
+
+FIXTURE_PATHS = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "review_api_*.json")))
+
+
+@pytest.mark.parametrize("path", FIXTURE_PATHS, ids=os.path.basename)
+def test_replay_fixture(path):
+    with open(path, encoding="utf-8") as f:
+        fixture = json.load(f)
+
+    reviews, errors = check_fixture(fixture)
+
+    assert not errors
+    assert reviews
+
+
+def test_anonymize_replaces_writer_fields():
+    pages = {"1": {"contents": [
+        {"id": 1, "writerMemberId": "realid12", "writerMemberNickname": "닉네임",
+         "writerMemberProfileImageUrl": "https://example.com/p.jpg", "reviewContent": "좋아요"},
+        {"id": 2, "writerMemberId": "realid12", "reviewAttaches": [], "reviewContent": "또 샀어요"},
+    ]}}
+
+    contents = anonymize(pages, {})["1"]["contents"]
+
+    assert "realid12" not in json.dumps(contents, ensure_ascii=False)
+    assert "닉네임" not in json.dumps(contents, ensure_ascii=False)
+    assert contents[0]["writerMemberId"] == contents[1]["writerMemberId"]
+    assert "writerMemberProfileImageUrl" not in contents[0]
+    assert contents[0]["reviewContent"] == "좋아요"
+
+
+def test_html_excerpt_keeps_review_keys():
+    html = ("<html>" + "x" * 5000 +
+            '<script>window.__PRELOADED_STATE__={"product":{"A":{"checkoutMerchantNo":510000001,'
+            '"originProductNo":"8800000001"}}}</script>' + "y" * 5000 + "</html>")
+
+    excerpt = html_excerpt(html)
+
+    assert len(excerpt) < 1000
+    assert parse_review_keys(excerpt) == parse_review_keys(html)
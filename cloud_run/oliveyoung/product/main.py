@@ -1,5 +1,6 @@
 import os
 import sys
+import json
 import logging
 from datetime import datetime, timezone
 import pandas as pd
@@ -44,6 +45,8 @@ def main():
 
     logger.info(f"[START] category={category_name} max_pages={max_pages}")
     crawler = OliveYoungProductCrawler(headless=True)
+    products = []
+    gcs_path = None
 
     try:
         # 1. 크롤링
@@ -69,5 +72,14 @@ def main():
     finally:
         crawler.close()
 
+    summary = {
+        "category_name": category_name,
+        "product_count": len(products),
+        "gcs_path": gcs_path,
+        "browser_resources": crawler.resource_report,
+    }
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return summary
+
 if __name__ == "__main__":
     main()
@@ -13,6 +13,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from fake_useragent import UserAgent
 import logging
+from browser_session import create_browser_session
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,8 +21,10 @@ logger = logging.getLogger(__name__)
 class OliveYoungProductCrawler:
     def __init__(self, headless: bool = True):
         self.headless = headless
+        self.session = None
         self.driver = None
         self.wait = None
+        self.resource_report = None
         self.setup_driver()
 
     def setup_driver(self):
@@ -41,7 +44,9 @@ class OliveYoungProductCrawler:
         options.add_argument(f'--user-agent={ua.random}')
 
         try:
-            self.driver = uc.Chrome(options=options)
+            # 이미지/폰트/광고 스크립트는 CDP로 차단 (browser_session.py)
+            self.session = create_browser_session(options, uc.Chrome)
+            self.driver = self.session.driver
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             self.wait = WebDriverWait(self.driver, 10)
             logger.info("Chrome WebDriver 초기화 완료 (undetected_chromedriver)")
@@ -51,7 +56,7 @@ class OliveYoungProductCrawler:
     def get_page(self, url: str, wait_time: int = 3) -> bool:
         """페이지 로딩"""
         try:
-            self.driver.get(url)
+            self.session.get(url)
             time.sleep(wait_time)
             return True
         except Exception as e:
@@ -741,7 +746,7 @@ class OliveYoungProductCrawler:
         logger.info(f"리뷰 데이터가 {filename}에 저장되었습니다.")
 
     def close(self):
-        """브라우저 종료"""
-        if self.driver:
-            self.driver.quit()
+        """브라우저 종료 (리소스 통계는 resource_report에 남김)"""
+        if self.session:
+            self.resource_report = self.session.quit()
             logger.info("브라우저가 종료되었습니다.")
@@ -28,6 +28,7 @@ def scrape_reviews(product_id: str, product_url: str, max_pages: int = 1):
         logger.info(f"URL: {product_url}")
 
         crawler = OliveYoungReviewCrawler()
+        result = None
 
         try:
             crawling_started_at = datetime.now(timezone.utc).isoformat()
@@ -38,13 +39,14 @@ def scrape_reviews(product_id: str, product_url: str, max_pages: int = 1):
 
             if not reviews:
                 logger.warning(f"No reviews found for product_id={product_id}")
-                return {
+                result = {
                     "status": "completed",
                     "product_id": product_id,
                     "product_name": product_name,
                     "reviews_count": 0,
                     "message": "No reviews found"
                 }
+                return result
 
             # 첫 리뷰에서 상품명 추출
             if 'product_name' in reviews[0]:
@@ -75,16 +77,20 @@ def scrape_reviews(product_id: str, product_url: str, max_pages: int = 1):
             logger.info(f"✅ Scraped {len(reviews)} reviews for {product_name}")
             logger.info(f"📦 Uploaded to: {upload_result['gcs_path']}")
 
-            return {
+            result = {
                 "status": "completed",
                 "product_id": product_id,
                 "product_name": product_name,
                 "reviews_count": len(reviews),
                 "gcs_path": upload_result['gcs_path']
             }
+            return result
 
         finally:
+            # 브라우저 종료 후 리소스 통계를 결과에 포함 (return 값은 이미 정해졌으므로 dict에 직접 추가)
             crawler.close()
+            if result is not None:
+                result["browser_resources"] = crawler.resource_report
 
     except Exception as e:
         logger.error(f"Error during scraping: {str(e)}", exc_info=True)
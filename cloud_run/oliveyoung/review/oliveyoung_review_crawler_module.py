@@ -14,14 +14,17 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from undetected_chromedriver import Chrome, ChromeOptions
 from fake_useragent import UserAgent
+from browser_session import create_browser_session
 
 logger = logging.getLogger(__name__)
 
 class OliveYoungReviewCrawler:
     def __init__(self, headless: bool = True):
         self.headless = headless
+        self.session = None
         self.driver = None
         self.wait = None
+        self.resource_report = None
         self.setup_driver()
         
     def setup_driver(self):
@@ -46,7 +49,9 @@ class OliveYoungReviewCrawler:
         options.add_argument(f'--user-agent={ua.random}')
         
         try:
-            self.driver = Chrome(options=options)
+            # 이미지/폰트/광고 스크립트는 CDP로 차단 (browser_session.py)
+            self.session = create_browser_session(options, Chrome)
+            self.driver = self.session.driver
             # WebDriver 속성 숨기기 (oliveyoung_product_crawler.py 참고)
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             self.wait = WebDriverWait(self.driver, 10)
@@ -59,7 +64,7 @@ class OliveYoungReviewCrawler:
         """페이지 로딩"""
         try:
             logger.info(f"페이지 로드 중: {url}")
-            self.driver.get(url)
+            self.session.get(url)
             time.sleep(wait_time)
             return True
         except Exception as e:
@@ -89,7 +94,7 @@ class OliveYoungReviewCrawler:
         
         try:
             logger.info(f"페이지 로드 중: {product_url}")
-            self.driver.get(product_url)
+            self.session.get(product_url)
             time.sleep(8)  # 페이지 로드 대기 시간 증가
             
             # 메인 페이지에서 카테고리 정보 먼저 추출
@@ -294,10 +299,7 @@ class OliveYoungReviewCrawler:
         return parsed_reviews
     
     def close(self):
-        """브라우저 종료"""
-        if self.driver:
-            try:
-                self.driver.quit()
-                logger.info("브라우저가 종료되었습니다.")
-            except Exception as e:
-                logger.error(f"브라우저 종료 중 오류: {e}")
+        """브라우저 종료 (리소스 통계는 resource_report에 남김)"""
+        if self.session:
+            self.resource_report = self.session.quit()
+            logger.info("브라우저가 종료되었습니다.")
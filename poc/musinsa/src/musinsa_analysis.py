@@ -144,7 +144,7 @@ class MusinsaAnalyzer:
                 print(f"❌ 스크롤 {i+1}회에서 무한 스크롤 동작 안함")
     
     def monitor_network_requests(self):
-        """Network 요청 모니터링"""
+        """Network 요청 모니터링 (로드 후 덮어쓰므로 첫 요청은 놓침 - 엔드포인트 캡처/재현은 network_capture.py)"""
         print("\n=== Network 요청 모니터링 ===")
         
         # JavaScript로 fetch 및 XMLHttpRequest 모니터링
@@ -11,6 +11,9 @@ from typing import List, Dict, Optional
 from fake_useragent import UserAgent
 import logging
 
+from field_extractor import extract_many
+from ranking_fields import RANKING_ITEM_EXTRACTOR
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -147,11 +150,8 @@ class MusinsaApiCrawler:
             
             logger.info(f"페이지 {page}: {len(product_items)}개 상품 아이템 발견")
             
-            # 각 상품 파싱
-            for idx, item in enumerate(product_items):
-                product = self.parse_product_item(item, (page - 1) * 40 + idx + 1)
-                if product:
-                    products.append(product)
+            # 각 상품 일괄 파싱
+            products = extract_many(RANKING_ITEM_EXTRACTOR, product_items, start_rank=(page - 1) * 40 + 1)
                     
         except Exception as e:
             logger.error(f"페이지 {page} API 응답 파싱 중 오류: {e}")
@@ -159,100 +159,12 @@ class MusinsaApiCrawler:
         return products
     
     def parse_product_item(self, item: Dict, rank: int) -> Optional[Dict]:
-        """개별 상품 아이템 파싱 - 무신사 API 구조에 맞춰 수정"""
+        """개별 상품 아이템 파싱 (ranking_fields 명세로 컴파일한 추출기 사용)"""
         try:
-            product = {
-                'rank': rank,
-                'name': '',
-                'brand': '',
-                'price': '',
-                'original_price': '',
-                'discount_rate': '',
-                'rating': '',
-                'review_count': '',
-                'likes': '',
-                'image_url': '',
-                'product_url': '',
-                'product_id': ''
-            }
-            
-            # 무신사 API 구조: item.id가 상품 ID, item.info에 상품 정보
-            product['product_id'] = str(item.get('id', ''))
-            
-            info = item.get('info', {})
-            if not info:
-                return None
-            
-            # 상품명과 브랜드명
-            product['name'] = info.get('productName', '')
-            product['brand'] = info.get('brandName', '')
-            
-            # 가격 정보
-            product['price'] = str(info.get('finalPrice', ''))
-            product['discount_rate'] = str(info.get('discountRatio', ''))
-            
-            # 할인율이 있는 경우 원가 계산
-            if product['discount_rate'] and product['price']:
-                try:
-                    final_price = int(product['price'])
-                    discount_ratio = int(product['discount_rate'])
-                    if discount_ratio > 0:
-                        original_price = int(final_price * 100 / (100 - discount_ratio))
-                        product['original_price'] = str(original_price)
-                except:
-                    pass
-            
-            # 이미지 정보 - 실제 API 구조에 맞춰 수정
-            image_info = item.get('image', {})
-            if image_info and 'url' in image_info:
-                product['image_url'] = image_info['url']
-            
-            # 상품 URL
-            if product['product_id']:
-                product['product_url'] = f"https://www.musinsa.com/goods/{product['product_id']}"
-            
-            # onClick 정보에서 추가 데이터 추출
-            onclick_info = item.get('onClick', {})
-            if onclick_info and 'url' in onclick_info:
-                product['product_url'] = onclick_info['url']
-            
-            # 평점과 리뷰 수 정보 - eventLog에서 추출
-            # onClick eventLog에서 추출 시도
-            onclick_event = item.get('onClick', {}).get('eventLog', {}).get('amplitude', {}).get('payload', {})
-            if onclick_event:
-                product['review_count'] = onclick_event.get('reviewCount', '')
-                product['rating'] = onclick_event.get('reviewScore', '')
-            
-            # image onClickLike eventLog에서도 추출 시도 (더 정확한 데이터일 수 있음)
-            image_event = item.get('image', {}).get('onClickLike', {}).get('eventLog', {}).get('amplitude', {}).get('payload', {})
-            if image_event:
-                if not product['review_count']:
-                    product['review_count'] = image_event.get('reviewCount', '')
-                if not product['rating']:
-                    product['rating'] = image_event.get('reviewScore', '')
-            
-            # 추가 정보에서 실시간 조회 수 등 추출
-            additional_info = info.get('additionalInformation', [])
-            if additional_info:
-                import re
-                for info_item in additional_info:
-                    text = info_item.get('text', '')
-                    
-                    # "N명이 보는 중" 정보 추출
-                    if '명이 보는 중' in text:
-                        numbers = re.findall(r'\d+', text)
-                        if numbers:
-                            product['likes'] = numbers[0]  # 실시간 조회자 수를 likes 필드에 저장
-            
-            # 필수 정보가 있는 경우만 반환
-            if product['name'] and product['brand']:
-                return product
-                
+            return RANKING_ITEM_EXTRACTOR(item, {'rank': rank})
         except Exception as e:
             logger.warning(f"상품 파싱 중 오류: {e}")
-            logger.warning(f"아이템 구조: {item}")
-            
-        return None
+            return None
     
     def save_to_csv(self, filename: str = 'musinsa_beauty_api_products.csv'):
         """CSV 파일로 저장"""
@@ -9,6 +9,9 @@ import time
 import logging
 from typing import List, Dict, Optional
 
+from field_extractor import extract_many
+from ranking_fields import RANKING_ITEM_EXTRACTOR
+
 logger = logging.getLogger(__name__)
 
 class MusinsaRankingCollector:
@@ -76,10 +79,7 @@ class MusinsaRankingCollector:
 
             logger.info(f"페이지 {page}: {len(product_items)}개 상품 아이템 발견")
 
-            for idx, item in enumerate(product_items):
-                product = self.parse_product_item(item, (page - 1) * self.size + idx + 1)
-                if product:
-                    products.append(product)
+            products = extract_many(RANKING_ITEM_EXTRACTOR, product_items, start_rank=(page - 1) * self.size + 1)
 
         except Exception as e:
             logger.error(f"페이지 {page} API 응답 파싱 중 오류: {e}")
@@ -87,83 +87,12 @@ class MusinsaRankingCollector:
         return products
 
     def parse_product_item(self, item: Dict, rank: int) -> Optional[Dict]:
-        """개별 상품 아이템 파싱"""
+        """개별 상품 아이템 파싱 (ranking_fields 명세로 컴파일한 추출기 사용)"""
         try:
-            product = {
-                'rank': rank,
-                'name': '',
-                'brand': '',
-                'price': '',
-                'original_price': '',
-                'discount_rate': '',
-                'rating': '',
-                'review_count': '',
-                'likes': '',
-                'image_url': '',
-                'product_url': '',
-                'product_id': ''
-            }
-
-            product['product_id'] = str(item.get('id', ''))
-            info = item.get('info', {})
-            if not info:
-                return None
-
-            product['name'] = info.get('productName', '')
-            product['brand'] = info.get('brandName', '')
-            product['price'] = str(info.get('finalPrice', ''))
-            product['discount_rate'] = str(info.get('discountRatio', ''))
-
-            if product['discount_rate'] and product['price']:
-                try:
-                    final_price = int(product['price'])
-                    discount_ratio = int(product['discount_rate'])
-                    if discount_ratio > 0:
-                        original_price = int(final_price * 100 / (100 - discount_ratio))
-                        product['original_price'] = str(original_price)
-                except:
-                    pass
-
-            image_info = item.get('image', {})
-            if image_info and 'url' in image_info:
-                product['image_url'] = image_info['url']
-
-            if product['product_id']:
-                product['product_url'] = f"https://www.musinsa.com/goods/{product['product_id']}"
-
-            onclick_info = item.get('onClick', {})
-            if onclick_info and 'url' in onclick_info:
-                product['product_url'] = onclick_info['url']
-
-            onclick_event = item.get('onClick', {}).get('eventLog', {}).get('amplitude', {}).get('payload', {})
-            if onclick_event:
-                product['review_count'] = onclick_event.get('reviewCount', '')
-                product['rating'] = onclick_event.get('reviewScore', '')
-
-            image_event = item.get('image', {}).get('onClickLike', {}).get('eventLog', {}).get('amplitude', {}).get('payload', {})
-            if image_event:
-                if not product['review_count']:
-                    product['review_count'] = image_event.get('reviewCount', '')
-                if not product['rating']:
-                    product['rating'] = image_event.get('reviewScore', '')
-
-            additional_info = info.get('additionalInformation', [])
-            if additional_info:
-                import re
-                for info_item in additional_info:
-                    text = info_item.get('text', '')
-                    if '명이 보는 중' in text:
-                        numbers = re.findall(r'\d+', text)
-                        if numbers:
-                            product['likes'] = numbers[0]
-
-            if product['name'] and product['brand']:
-                return product
-
+            return RANKING_ITEM_EXTRACTOR(item, {'rank': rank})
         except Exception as e:
             logger.warning(f"상품 파싱 중 오류: {e}")
-
-        return None
+            return None
 
     def extract_product_ids(self, products: List[Dict]) -> List[str]:
         """상품 리스트에서 product_id 추출"""
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+페이지가 호출하는 XHR/fetch JSON API를 캡처해 재현 가능한 요청 템플릿으로 저장
+- headless Chrome으로 페이지를 한 번 열고 performance 로그(CDP Network 이벤트)에서 요청/응답을 수집
+- 페이지 로드 직후 요청까지 잡힘 (로드 후 fetch/XHR를 덮어쓰던 monitor_network_requests 방식은 첫 요청을 놓침)
+- 템플릿은 requests로 바로 재호출 가능 → DOM 스크래핑 대신 직접 HTTP 호출로 전환할 때 사용
+
+사용 예:
+    python network_capture.py --site naver --match graphql
+    python network_capture.py https://www.musinsa.com/main/beauty/ranking --scroll 5
+    python network_capture.py --replay captures/shopping.naver.com_20250101_120000.json --set variables.params.page=2
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 사이트별 기본 캡처 페이지
+SITE_URLS = {
+    "naver": "https://shopping.naver.com/window/beauty/category?filterSoldOut=true&menu=20032470",
+    "musinsa": "https://www.musinsa.com/main/beauty/ranking",
+    "oliveyoung": "https://www.oliveyoung.co.kr/store/main/getBestList.do",
+}
+
+# 재호출에 필요 없거나 브라우저가 자동으로 붙이는 헤더
+DROP_HEADERS = {"cookie", "content-length", "host", "connection", "accept-encoding"}
+
+# 광고/분석 요청은 JSON이어도 템플릿에서 제외
+NOISE_DOMAINS = ("google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.com",
+                 "criteo", "nelo", "wcs.naver", "beacon", "sentry.io", "datadoghq")
+
+
+def build_capture_driver(headless: bool = True, user_agent: Optional[str] = None) -> webdriver.Chrome:
+    """performance 로그를 켠 Chrome (Network 이벤트가 로그로 쌓임)"""
+    options = Options()
+    if headless:
+        options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    if user_agent:
+        options.add_argument(f'--user-agent={user_agent}')
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    driver = webdriver.Chrome(options=options)
+    driver.execute_cdp_cmd("Network.enable", {})
+    return driver
+
+
+def _decode_json(text: Optional[str]) -> Any:
+    if text is None:
+        return None
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        return text
+
+
+def _is_json_response(entry: Dict) -> bool:
+    mime_type = (entry.get("mime_type") or "").lower()
+    return "json" in mime_type or (entry.get("resource_type") in ("XHR", "Fetch") and "javascript" not in mime_type)
+
+
+def read_network_events(driver) -> Dict[str, Dict]:
+    """performance 로그 → requestId별 요청/응답 정보 (로그는 읽으면 비워짐)"""
+    entries: Dict[str, Dict] = {}
+    for log in driver.get_log("performance"):
+        message = json.loads(log["message"])["message"]
+        method = message.get("method")
+        params = message.get("params", {})
+        request_id = params.get("requestId")
+        if not request_id:
+            continue
+
+        if method == "Network.requestWillBeSent":
+            request = params["request"]
+            entries.setdefault(request_id, {}).update({
+                "request_id": request_id,
+                "method": request["method"],
+                "url": request["url"],
+                "headers": request.get("headers", {}),
+                "post_data": request.get("postData"),
+                "has_post_data": request.get("hasPostData", False),
+                "resource_type": params.get("type"),
+            })
+        elif method == "Network.responseReceived":
+            response = params["response"]
+            entries.setdefault(request_id, {}).update({
+                "status": response.get("status"),
+                "mime_type": response.get("mimeType"),
+                "resource_type": params.get("type"),
+            })
+        elif method == "Network.loadingFinished":
+            entries.setdefault(request_id, {})["finished"] = True
+    return entries
+
+
+def capture(driver, url: str, scroll_times: int = 3, wait: float = 3.0,
+            match: Optional[str] = None) -> List[Dict]:
+    """페이지를 열고 스크롤하며 발생한 JSON API 호출 목록을 반환 (응답 본문 포함)"""
+    driver.get(url)
+    time.sleep(wait)
+    for _ in range(scroll_times):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        time.sleep(2)
+
+    calls = []
+    for request_id, entry in read_network_events(driver).items():
+        if "url" not in entry or not entry.get("finished") or not _is_json_response(entry):
+            continue
+        if any(domain in entry["url"] for domain in NOISE_DOMAINS):
+            continue
+        if match and match not in entry["url"]:
+            continue
+
+        # 큰 POST 본문은 로그에 빠져 있어 따로 요청
+        if entry["has_post_data"] and entry["post_data"] is None:
+            try:
+                entry["post_data"] = driver.execute_cdp_cmd(
+                    "Network.getRequestPostData", {"requestId": request_id})["postData"]
+            except Exception:
+                pass
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            entry["response_body"] = _decode_json(body.get("body"))
+        except Exception:
+            entry["response_body"] = None
+        calls.append(entry)
+
+    logger.info(f"🕸️ JSON API 호출 {len(calls)}개 캡처: {url}")
+    return calls
+
+
+def _response_shape(body: Any, depth: int = 2) -> Any:
+    """응답 구조 요약 (키와 타입만 - 재호출 결과 비교용)"""
+    if isinstance(body, dict):
+        if depth == 0:
+            return "object"
+        return {key: _response_shape(value, depth - 1) for key, value in body.items()}
+    if isinstance(body, list):
+        return [_response_shape(body[0], depth - 1)] if body and depth > 0 else "array"
+    return type(body).__name__
+
+
+def build_template(call: Dict) -> Dict:
+    """캡처한 호출 → 재현 가능한 요청 템플릿
+
+    쿼리 파라미터 값이 JSON이면(GraphQL variables/extensions 등) 풀어서 저장하므로
+    page, sort 같은 값을 바로 고칠 수 있다.
+    """
+    parts = urlsplit(call["url"])
+    query = {key: _decode_json(value) if value[:1] in "{[" else value
+             for key, value in parse_qsl(parts.query, keep_blank_values=True)}
+    headers = {key: value for key, value in call.get("headers", {}).items()
+               if not key.startswith(":") and key.lower() not in DROP_HEADERS}
+    body = _decode_json(call.get("post_data"))
+
+    template = {
+        "name": query.get("operationName") or parts.path.rstrip("/").rsplit("/", 1)[-1] or parts.netloc,
+        "method": call["method"],
+        "url": urlunsplit((parts.scheme, parts.netloc, parts.path, "", "")),
+        "query": query,
+        "headers": headers,
+        "json": body if isinstance(body, (dict, list)) else None,
+        "data": body if isinstance(body, str) else None,
+        "response": {
+            "status": call.get("status"),
+            "mime_type": call.get("mime_type"),
+            "shape": _response_shape(call.get("response_body")),
+        },
+    }
+    return template
+
+
+def build_templates(calls: List[Dict]) -> List[Dict]:
+    """같은 엔드포인트(메서드 + URL + operationName)는 첫 호출만 남김"""
+    templates, seen = [], set()
+    for call in calls:
+        template = build_template(call)
+        key = (template["method"], template["url"], template["name"])
+        if key in seen:
+            continue
+        seen.add(key)
+        templates.append(template)
+    return templates
+
+
+def set_param(template: Dict, path: str, value: Any) -> Dict:
+    """점 경로로 쿼리/본문 값 변경 (예: variables.params.page, page). 쿼리에서 먼저 찾음"""
+    keys = path.split(".")
+    for section in ("query", "json"):
+        target = template.get(section)
+        for key in keys[:-1]:
+            if not isinstance(target, dict) or key not in target:
+                target = None
+                break
+            target = target[key]
+        if isinstance(target, dict) and keys[-1] in target:
+            target[keys[-1]] = value
+            return template
+    raise KeyError(f"템플릿에 '{path}' 파라미터가 없습니다: {template['name']}")
+
+
+def replay(template: Dict, session: Optional[requests.Session] = None, timeout: float = 30) -> requests.Response:
+    """템플릿으로 요청 재현 (문자열이 아닌 쿼리 값은 캡처 때처럼 압축 JSON으로 인코딩)"""
+    session = session or requests.Session()
+    query = {key: value if isinstance(value, str) else json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+             for key, value in template["query"].items()}
+    url = f"{template['url']}?{urlencode(query)}" if query else template["url"]
+    return session.request(template["method"], url, headers=template["headers"], json=template["json"],
+                           data=template["data"].encode("utf-8") if template["data"] else None,
+                           timeout=timeout)
+
+
+def save_templates(templates: List[Dict], page_url: str, out_path: Optional[str] = None) -> str:
+    if not out_path:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        out_path = os.path.join("captures", f"{urlsplit(page_url).netloc}_{timestamp}.json")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump({"page_url": page_url, "captured_at": datetime.now().isoformat(), "templates": templates},
+                  f, ensure_ascii=False, indent=2)
+    return out_path
+
+
+def replay_file(path: str, overrides: List[str], match: Optional[str] = None):
+    """저장한 템플릿을 다시 호출해 상태 코드와 응답 구조가 캡처 때와 같은지 확인"""
+    with open(path, encoding='utf-8') as f:
+        templates = json.load(f)["templates"]
+
+    session = requests.Session()
+    for template in templates:
+        if match and match not in template["url"] and match != template["name"]:
+            continue
+        for override in overrides:
+            param, _, value = override.partition("=")
+            try:
+                set_param(template, param, _decode_json(value))
+            except KeyError:
+                continue
+        try:
+            response = replay(template, session)
+            shape = _response_shape(_decode_json(response.text))
+            same = "✅" if shape == template["response"]["shape"] else "⚠️ 응답 구조 다름"
+            print(f"  {response.status_code} {same} {template['method']} {template['name']} ({template['url']})")
+        except requests.RequestException as e:
+            print(f"  ❌ {template['method']} {template['name']}: {e}")
+        time.sleep(0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="페이지의 JSON API 호출 캡처 / 재현")
+    parser.add_argument("url", nargs="?", help="캡처할 페이지 URL")
+    parser.add_argument("--site", choices=sorted(SITE_URLS), help="사이트 기본 페이지 사용")
+    parser.add_argument("--scroll", type=int, default=3, help="추가 요청을 띄우기 위한 스크롤 횟수")
+    parser.add_argument("--match", help="URL에 이 문자열이 포함된 호출만")
+    parser.add_argument("--out", help="템플릿 저장 경로 (기본: captures/{host}_{시각}.json)")
+    parser.add_argument("--show-browser", action="store_true", help="headless 끄기")
+    parser.add_argument("--replay", help="저장한 템플릿 파일을 재호출")
+    parser.add_argument("--set", action="append", default=[], metavar="PATH=VALUE",
+                        help="재호출 시 바꿀 파라미터 (예: variables.params.page=2)")
+    args = parser.parse_args()
+
+    if args.replay:
+        replay_file(args.replay, args.set, args.match)
+        return
+
+    page_url = args.url or SITE_URLS.get(args.site)
+    if not page_url:
+        parser.error("URL 또는 --site 를 지정하세요")
+
+    driver = build_capture_driver(headless=not args.show_browser)
+    try:
+        calls = capture(driver, page_url, scroll_times=args.scroll, match=args.match)
+    finally:
+        driver.quit()
+
+    templates = build_templates(calls)
+    out_path = save_templates(templates, page_url, args.out)
+
+    print(f"\n📡 API 엔드포인트 {len(templates)}개")
+    for template in templates:
+        print(f"  - {template['method']} {template['name']} ({template['url']}) → {template['response']['status']}")
+    print(f"💾 템플릿 저장: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
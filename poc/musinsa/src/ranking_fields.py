@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+무신사 랭킹 아이템 필드 명세 (musinsa_api_crawler / musinsa_ranking_collector 공용)
+"""
+from typing import Dict
+
+from field_extractor import Field, First, Path, Scan, compile_extractor
+
+_ONCLICK_PAYLOAD = ('onClick', 'eventLog', 'amplitude', 'payload')
+_LIKE_PAYLOAD = ('image', 'onClickLike', 'eventLog', 'amplitude', 'payload')
+
+
+def _original_price(product: Dict) -> str:
+    """할인율로 원가 역산 (할인이 없거나 값이 비정상이면 '')"""
+    final_price = int(product['price'])
+    discount_ratio = int(product['discount_rate'])
+    if 0 < discount_ratio < 100:
+        return str(int(final_price * 100 / (100 - discount_ratio)))
+    return ''
+
+
+def _product_url(product: Dict) -> str:
+    return f"https://www.musinsa.com/goods/{product['product_id']}" if product['product_id'] else ''
+
+
+# 필드 순서 = CSV 컬럼 순서
+RANKING_ITEM_FIELDS = [
+    Field('name', Path('info', 'productName')),
+    Field('brand', Path('info', 'brandName')),
+    Field('price', Path('info', 'finalPrice'), coerce=str),
+    Field('original_price', derive=_original_price),
+    Field('discount_rate', Path('info', 'discountRatio'), coerce=str),
+    # onClick eventLog 우선, 없으면 image onClickLike eventLog
+    Field('rating', First(Path(*_ONCLICK_PAYLOAD, 'reviewScore'), Path(*_LIKE_PAYLOAD, 'reviewScore'))),
+    Field('review_count', First(Path(*_ONCLICK_PAYLOAD, 'reviewCount'), Path(*_LIKE_PAYLOAD, 'reviewCount'))),
+    # "N명이 보는 중" 실시간 조회자 수를 likes 필드에 저장
+    Field('likes', Scan(('info', 'additionalInformation'), r'(\d+)', literal='명이 보는 중', last=True)),
+    Field('image_url', Path('image', 'url')),
+    Field('product_url', Path('onClick', 'url'), derive=_product_url),
+    Field('product_id', Path('id'), coerce=str),
+]
+RANKING_ITEM_EXTRACTOR = compile_extractor(RANKING_ITEM_FIELDS, required=('name', 'brand'))
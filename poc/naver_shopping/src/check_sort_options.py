@@ -7,6 +7,7 @@ import requests
 from urllib.parse import quote
 from fake_useragent import UserAgent
 import time
+from page_bounds import find_last_page, PageProbeError
 
 def test_sort_options():
     """다양한 정렬 옵션으로 데이터 확인"""
@@ -121,13 +122,11 @@ def test_sort_options():
     
     return results
 
-def test_max_page(session, base_url, sort_option, test_pages=[50, 100, 200, 500]):
-    """특정 정렬 옵션의 최대 페이지 테스트"""
+def test_max_page(session, base_url, sort_option, max_page=1000):
+    """특정 정렬 옵션의 최대 페이지 테스트 (지수 탐색 + 이분 탐색, 요청 O(log n)회)"""
     print(f"    📄 {sort_option} 최대 페이지 테스트...")
     
-    last_valid_page = 1
-    
-    for page in test_pages:
+    def has_cards(page):
         variables = {
             "isIncludeProductBenefit": False,
             "isIncludeProductDetail": False,
@@ -156,35 +155,35 @@ def test_max_page(session, base_url, sort_option, test_pages=[50, 100, 200, 500]
         
         url = f"{base_url}?operationName=getPagedCards&variables={variables_encoded}&extensions={extensions_encoded}"
         
+        time.sleep(0.5)
         try:
             response = session.get(url, timeout=30)
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                if 'data' in data and 'pagedCards' in data['data']:
-                    cards = data['data']['pagedCards'].get('data', [])
-                    if cards:
-                        print(f"      페이지 {page}: ✅ ({len(cards)}개)")
-                        last_valid_page = page
-                    else:
-                        print(f"      페이지 {page}: ❌ 데이터 없음")
-                        break
-                else:
-                    print(f"      페이지 {page}: ❌ 구조 오류")
-                    break
-            else:
+            if response.status_code != 200:
                 print(f"      페이지 {page}: ❌ HTTP {response.status_code}")
-                break
+                return None
+            
+            data = response.json()
+            if 'data' not in data or 'pagedCards' not in data['data']:
+                print(f"      페이지 {page}: ❌ 구조 오류")
+                return None
+            
+            cards = data['data']['pagedCards'].get('data', [])
+            print(f"      페이지 {page}: {'✅' if cards else '❌ 데이터 없음'} ({len(cards)}개)")
+            return bool(cards)
                 
         except Exception as e:
             print(f"      페이지 {page}: ❌ {e}")
-            break
-        
-        time.sleep(0.5)
+            return None
+    
+    try:
+        last_valid_page, probes = find_last_page(has_cards, max_page=max_page)
+    except PageProbeError as e:
+        print(f"    ⚠️ {sort_option} 최대 페이지 탐색 중단: {e}")
+        return 1
     
-    print(f"    📊 {sort_option} 최대 유효 페이지: {last_valid_page}")
-    return last_valid_page
+    print(f"    📊 {sort_option} 최대 유효 페이지: {last_valid_page} (요청 {len(probes)}회)")
+    return max(last_valid_page, 1)
 
 def check_different_categories():
     """다른 뷰티 하위 카테고리도 확인"""
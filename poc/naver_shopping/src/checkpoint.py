@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+수집 중간 저장 (append-only 체크포인트)
+- 배치마다 새로 받은 상품만 NDJSON 파일 끝에 덧붙이고, 이어받기 위치(cursor)를 따로 기록
+- 재시작하면 cursor의 마지막 완료 페이지 다음부터 이어서 수집
+"""
+import json
+import logging
+import os
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class AppendOnlyCheckpoint:
+    """{checkpoint_dir}/products.ndjson + cursor.json
+
+    cursor에는 마지막 완료 페이지와 그 시점의 NDJSON 바이트 크기를 남긴다.
+    배치를 덧붙이다 중단되면 다음 실행에서 cursor 크기 뒤의 미완료 줄을 잘라내므로
+    같은 상품이 두 번 들어가지 않는다.
+    """
+
+    def __init__(self, checkpoint_dir: str):
+        self.checkpoint_dir = checkpoint_dir
+        self.data_path = os.path.join(checkpoint_dir, "products.ndjson")
+        self.cursor_path = os.path.join(checkpoint_dir, "cursor.json")
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.cursor = self._load_cursor()
+        self._truncate_uncommitted()
+
+    def _load_cursor(self) -> Dict:
+        if os.path.exists(self.cursor_path):
+            with open(self.cursor_path, encoding="utf-8") as f:
+                return json.load(f)
+        return {"last_page": 0, "row_count": 0, "offset": 0, "done": False}
+
+    def _truncate_uncommitted(self):
+        if not os.path.exists(self.data_path):
+            return
+        offset = self.cursor["offset"]
+        if os.path.getsize(self.data_path) > offset:
+            logger.warning(f"⚠️ 체크포인트 이후 미완료 데이터 제거 ({os.path.getsize(self.data_path) - offset} bytes)")
+            with open(self.data_path, "r+b") as f:
+                f.truncate(offset)
+
+    @property
+    def next_page(self) -> int:
+        return self.cursor["last_page"] + 1
+
+    @property
+    def done(self) -> bool:
+        return self.cursor["done"]
+
+    @property
+    def row_count(self) -> int:
+        return self.cursor["row_count"]
+
+    def append(self, products: List[Dict], last_page: int, done: bool = False):
+        """배치 상품을 덧붙이고 cursor를 last_page로 이동 (데이터 → cursor 순서로 기록)"""
+        with open(self.data_path, "ab") as f:
+            for product in products:
+                f.write((json.dumps(product, ensure_ascii=False) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            offset = f.tell()
+
+        self.cursor = {
+            "last_page": last_page,
+            "row_count": self.cursor["row_count"] + len(products),
+            "offset": offset,
+            "done": done,
+        }
+        tmp_path = f"{self.cursor_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.cursor, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.cursor_path)
+
+    def iter_products(self) -> Iterator[Dict]:
+        if not os.path.exists(self.data_path):
+            return
+        with open(self.data_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def load_products(self) -> List[Dict]:
+        return list(self.iter_products())
+
+    def clear(self):
+        """최종 저장이 끝난 뒤 호출 (다음 실행은 처음부터 새로 수집)"""
+        for path in (self.data_path, self.cursor_path):
+            if os.path.exists(path):
+                os.remove(path)
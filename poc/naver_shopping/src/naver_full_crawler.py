@@ -3,9 +3,11 @@
 네이버 쇼핑 스킨케어 전체 데이터 수집
 """
 from naver_shopping_crawler import NaverShoppingCrawler
+from checkpoint import AppendOnlyCheckpoint
 from datetime import datetime
 import logging
 import os
+import time
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -21,54 +23,62 @@ def collect_all_skincare_products():
     # 크롤러 초기화
     crawler = NaverShoppingCrawler()
     
+    # 배치마다 새 상품만 덧붙이는 체크포인트 (중단 후 재실행하면 마지막 완료 페이지 다음부터)
+    checkpoint = AppendOnlyCheckpoint(os.path.join(data_dir, "checkpoint_skincare"))
+    
     try:
         logger.info("🚀 네이버 쇼핑 스킨케어 전체 데이터 수집 시작...")
+        if checkpoint.next_page > 1:
+            logger.info(f"♻️ 체크포인트에서 이어서 수집: {checkpoint.row_count}개 상품, {checkpoint.next_page}페이지부터")
         
         # 최대 50페이지까지 수집 (약 1,000개 상품)
-        all_products = []
+        max_page = 50
         batch_size = 10  # 10페이지씩 배치 처리
         
-        for start_page in range(1, 51, batch_size):
-            end_page = min(start_page + batch_size - 1, 50)
+        start_page = checkpoint.next_page
+        while not checkpoint.done and start_page <= max_page:
+            end_page = min(start_page + batch_size - 1, max_page)
             
             logger.info(f"📦 배치 수집: {start_page}페이지 ~ {end_page}페이지")
             
             # 배치별 상품 수집
             batch_products = []
+            last_page = start_page - 1
+            finished = False
             for page in range(start_page, end_page + 1):
                 try:
                     page_products = crawler.fetch_single_page(page)
                     if page_products:
                         batch_products.extend(page_products)
+                        last_page = page
                         logger.info(f"  ✅ 페이지 {page}: {len(page_products)}개 상품")
                     else:
                         logger.warning(f"  ❌ 페이지 {page}: 데이터 없음 (수집 종료)")
+                        finished = True
                         break
                         
                 except Exception as e:
+                    # 오류 페이지는 완료로 기록하지 않음 (재실행 시 이 페이지부터 다시)
                     logger.error(f"  ❌ 페이지 {page} 오류: {e}")
                     break
             
-            if not batch_products:
-                logger.info("더 이상 수집할 데이터가 없습니다.")
-                break
-            
-            # 배치 결과를 전체 리스트에 추가
-            all_products.extend(batch_products)
+            # 중간 저장 (새 배치만 덧붙임 - 데이터 유실 방지)
+            checkpoint.append(batch_products, last_page, done=finished or last_page >= max_page)
+            logger.info(f"📊 현재까지 수집: {checkpoint.row_count}개 상품 (체크포인트: {last_page}페이지)")
             
-            # 중간 저장 (데이터 유실 방지)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            temp_file = f"{data_dir}/naver_skincare_temp_{timestamp}.json"
-            crawler.save_to_json(all_products, temp_file)
+            if last_page < end_page and not finished:
+                logger.error("배치 중 오류로 중단합니다. 다시 실행하면 이어서 수집합니다.")
+                return
             
-            logger.info(f"📊 현재까지 수집: {len(all_products)}개 상품 (중간저장: {temp_file})")
+            start_page = last_page + 1
             
             # 너무 빠른 요청 방지를 위한 딜레이
-            import time
             time.sleep(2)
         
+        all_products = checkpoint.load_products()
         if not all_products:
             logger.error("수집된 데이터가 없습니다.")
+            checkpoint.clear()
             return
         
         # 최종 저장
@@ -86,6 +96,7 @@ def collect_all_skincare_products():
         logger.info("🎉 전체 데이터 수집 완료!")
         logger.info(f"📈 총 수집 상품: {len(all_products):,}개")
         logger.info(f"💾 저장 파일: {csv_file}, {json_file}")
+        checkpoint.clear()
         
         # 브랜드별 통계
         brands = {}
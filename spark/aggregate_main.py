@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Product Sentiment Aggregation
+---------------------------------
+- predicted_reviews 의 새 run_date 파티션 하나만 읽어 상품별 일 집계 파티션을 교체
+- 최근 30일 일 집계만 읽어 7/30일 누적(rolling) 스냅샷 파티션을 교체
+- 대시보드는 집계 테이블만 조회 → 갱신 비용이 히스토리 길이와 무관
+
+예) spark-submit aggregate_main.py --run_date 2025-07-20
+"""
+
+import argparse
+import datetime as _dt
+
+from pyspark.sql import SparkSession, DataFrame
+from pyspark.sql import functions as F
+
+ROLLING_WINDOWS = (7, 30)
+
+# ──────────────────────────────────────────────
+# CLI
+# ──────────────────────────────────────────────
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser("Product sentiment aggregation")
+    parser.add_argument("--project",         default="de6-2ez")
+    parser.add_argument("--dataset",         default="gold")
+    parser.add_argument("--input_table",     default="predicted_reviews")
+    parser.add_argument("--daily_table",     default="product_sentiment_daily")
+    parser.add_argument("--rolling_table",   default="product_sentiment_rolling")
+    parser.add_argument("--temp_gcs_bucket", default="sentiment-pipeline")
+    parser.add_argument("--product_col",     default="product_id")
+    parser.add_argument("--run_date",        default=None, help="YYYY-MM-DD (기본: 오늘)")
+    parser.add_argument("--shuffle_partitions", type=int, default=16)
+    return parser
+
+# ──────────────────────────────────────────────
+# BigQuery I/O
+# ──────────────────────────────────────────────
+def _read_bq(spark: SparkSession, table: str, filter_expr: str) -> DataFrame:
+    # filter 옵션은 Storage Read API 로 push down → 해당 파티션만 스캔
+    return (
+        spark.read.format("bigquery")
+        .option("table", table)
+        .option("filter", filter_expr)
+        .load()
+    )
+
+def _overwrite_partition(df: DataFrame, table: str, field: str, day: _dt.date) -> None:
+    # datePartition + overwrite 는 지정한 파티션만 교체 → 같은 날짜 재실행도 멱등
+    (
+        df.write.format("bigquery")
+          .option("table", table)
+          .option("partitionField", field)
+          .option("datePartition", day.strftime("%Y%m%d"))
+          .mode("overwrite")
+          .save()
+    )
+
+# ──────────────────────────────────────────────
+# 집계
+# ──────────────────────────────────────────────
+def _daily_aggregate(df: DataFrame, product_col: str) -> DataFrame:
+    return (
+        df.groupBy(F.col(product_col).alias("product_id"), "run_date")
+          .agg(
+              F.count(F.lit(1)).alias("review_cnt"),
+              F.sum(F.when(F.col("pred_label") == "positive", 1).otherwise(0)).alias("positive_cnt"),
+              F.sum(F.when(F.col("pred_label") == "neutral",  1).otherwise(0)).alias("neutral_cnt"),
+              F.sum(F.when(F.col("pred_label") == "negative", 1).otherwise(0)).alias("negative_cnt"),
+              # rolling 평균을 합산으로 구하기 위해 평균과 함께 합계도 저장
+              F.sum("pos_prob").alias("pos_prob_sum"),
+              F.avg("pos_prob").alias("mean_pos_prob"),
+          )
+    )
+
+def _rolling_aggregate(daily: DataFrame, as_of: _dt.date) -> DataFrame:
+    as_of_col = F.to_date(F.lit(as_of.isoformat()))
+    age = F.datediff(as_of_col, F.col("run_date"))
+
+    aggs = []
+    for days in ROLLING_WINDOWS:
+        in_window = age < days
+        for name in ("review_cnt", "positive_cnt", "neutral_cnt", "negative_cnt", "pos_prob_sum"):
+            aggs.append(F.sum(F.when(in_window, F.col(name)).otherwise(0)).alias(f"{name}_{days}d"))
+
+    rolled = daily.groupBy("product_id").agg(*aggs)
+    for days in ROLLING_WINDOWS:
+        rolled = rolled.withColumn(
+            f"mean_pos_prob_{days}d",
+            F.col(f"pos_prob_sum_{days}d") / F.when(F.col(f"review_cnt_{days}d") > 0, F.col(f"review_cnt_{days}d"))
+        ).drop(f"pos_prob_sum_{days}d")
+    return rolled.withColumn("as_of_date", as_of_col)
+
+# ──────────────────────────────────────────────
+# 메인
+# ──────────────────────────────────────────────
+def main() -> None:
+    args = _build_parser().parse_args()
+    run_date = _dt.date.fromisoformat(args.run_date) if args.run_date else _dt.date.today()
+
+    spark = (
+        SparkSession.builder.appName("ProductSentimentAggregation")
+        .config("spark.sql.shuffle.partitions", str(args.shuffle_partitions))
+        .config("temporaryGcsBucket", args.temp_gcs_bucket)
+        .getOrCreate()
+    )
+    spark.sparkContext.setLogLevel("INFO")
+
+    bq_in      = f"{args.project}.{args.dataset}.{args.input_table}"
+    bq_daily   = f"{args.project}.{args.dataset}.{args.daily_table}"
+    bq_rolling = f"{args.project}.{args.dataset}.{args.rolling_table}"
+
+    # ① 새 run_date 파티션 → 일 집계 파티션 교체
+    df_new = _read_bq(spark, bq_in, f"run_date = '{run_date.isoformat()}'")
+    daily_new = _daily_aggregate(df_new, args.product_col).cache()
+    print(f"[INFO] {run_date} daily aggregates: {daily_new.count()} products")
+    _overwrite_partition(daily_new, bq_daily, "run_date", run_date)
+
+    # ② 최근 30일 일 집계 → rolling 스냅샷 파티션 교체
+    since = run_date - _dt.timedelta(days=max(ROLLING_WINDOWS) - 1)
+    daily_recent = _read_bq(
+        spark, bq_daily,
+        f"run_date >= '{since.isoformat()}' AND run_date < '{run_date.isoformat()}'"
+    ).unionByName(daily_new)
+    rolling = _rolling_aggregate(daily_recent, run_date)
+    _overwrite_partition(rolling, bq_rolling, "as_of_date", run_date)
+    print(f"[RESULT] Aggregates updated for run_date={run_date} "
+          f"(daily: {bq_daily}, rolling: {bq_rolling})")
+
+    spark.stop()
+
+# ──────────────────────────────────────────────
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+torch 스레드 × Python worker 조합 벤치마크
+---------------------------------
+- executor 한 대에서 worker W 개가 동시에 BERT forward 를 도는 상황을 프로세스로 재현
+- 조합별 처리량(texts/s)을 출력하고 _plan_torch_threads 계획값을 표시
+
+예) python benchmark_threads.py --workers 1 2 4 8 --threads 1 2 4 0 --batch 256
+    (--threads 0 = torch 기본값, 즉 과다 구독 상태)
+"""
+
+import os
+import time
+import argparse
+import multiprocessing as mp
+
+SAMPLE_TEXTS = [
+    "배송도 빠르고 제품도 너무 좋아요. 재구매 의사 있습니다!",
+    "향이 생각보다 강해서 별로였어요.",
+    "그냥 무난합니다. 가격 대비 나쁘지 않아요.",
+    "피부가 예민한 편인데 트러블 없이 잘 쓰고 있어요.",
+    "용기가 새서 왔어요. 포장 좀 신경 써주세요.",
+]
+
+# ──────────────────────────────────────────────
+# worker
+# ──────────────────────────────────────────────
+def _worker(threads: int, batch: int, rounds: int, barrier, out_q) -> None:
+    import torch
+    import pandas as pd
+    import main as engine
+
+    engine.TORCH_THREADS = threads if threads > 0 else torch.get_num_threads()
+    engine.TORCH_INTEROP_THREADS = 1
+    engine._load_model_once()
+
+    texts = pd.Series((SAMPLE_TEXTS * (batch // len(SAMPLE_TEXTS) + 1))[:batch])
+    engine._run_inference(texts)  # warm-up
+
+    barrier.wait()
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        engine._run_inference(texts)
+    out_q.put(time.perf_counter() - t0)
+
+# ──────────────────────────────────────────────
+# 조합 실행
+# ──────────────────────────────────────────────
+def _run_combo(workers: int, threads: int, batch: int, rounds: int) -> float:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    out_q = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(threads, batch, rounds, barrier, out_q))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    elapsed = max(out_q.get() for _ in procs)
+    for p in procs:
+        p.join()
+    return workers * batch * rounds / elapsed
+
+def main() -> None:
+    parser = argparse.ArgumentParser("torch thread / worker benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 0])
+    parser.add_argument("--task_cpus", type=int, default=1)
+    parser.add_argument("--batch",  type=int, default=128)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    from main import _plan_torch_threads
+
+    host_cpus = os.cpu_count() or 1
+    print(f"[INFO] host cpus: {host_cpus}, batch: {args.batch}, rounds: {args.rounds}")
+    print(f"{'workers':>8} {'threads':>8} {'texts/s':>10}  plan")
+    for w in args.workers:
+        planned, _ = _plan_torch_threads(args.task_cpus, w * args.task_cpus, host_cpus)
+        for t in args.threads:
+            tput = _run_combo(w, t, args.batch, args.rounds)
+            label = "default" if t <= 0 else str(t)
+            mark = "*" if t == planned else ""
+            print(f"{w:>8} {label:>8} {tput:>10.1f}  {mark}")
+
+    print("[RESULT] '*' = _plan_torch_threads 계획값")
+
+# ──────────────────────────────────────────────
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ Korean Sentiment Analysis Pipeline
 """
 
 import os
+import time
+import hashlib
 import argparse
 import datetime as _dt
 from typing import Literal
@@ -25,8 +27,71 @@ THRESH_POS = float(os.getenv("THRESH_POS", "0.6"))
 THRESH_NEG = float(os.getenv("THRESH_NEG", "0.4"))
 MAX_LEN    = int(os.getenv("MAX_LEN", "128"))
 
+# torch 스레드 (0 = spark.task.cpus / executor 코어 기준 자동 계산)
+TORCH_THREADS         = int(os.getenv("TORCH_THREADS", "0"))
+TORCH_INTEROP_THREADS = int(os.getenv("TORCH_INTEROP_THREADS", "0"))
+TASK_CPUS      = 1
+EXECUTOR_CORES = 0
+
+# TorchScript 아티팩트 (MODEL_PATH 로부터 1회 trace 후 버전 키로 저장)
+COMPILED_MODEL     = os.getenv("COMPILED_MODEL", "false").lower() == "true"
+COMPILED_MODEL_DIR = os.getenv("COMPILED_MODEL_DIR", "")
+
 TOKENIZER: BertTokenizer | None = None
 MODEL: BertForSequenceClassification | None = None
+_THREADS_PID: int | None = None
+
+# ──────────────────────────────────────────────
+# torch 스레드 계획
+# ──────────────────────────────────────────────
+def _plan_torch_threads(
+    task_cpus: int,
+    executor_cores: int,
+    host_cpus: int | None = None,
+) -> tuple[int, int]:
+    """(intra-op, inter-op) 스레드 수 계산.
+
+    executor 한 대에서 동시에 도는 Python worker 수는 executor_cores // task_cpus 이고,
+    각 worker 가 torch 기본값(호스트 전체 코어)으로 돌면 코어가 worker 수만큼 과다 구독된다.
+    worker 하나에는 자기 task 에 할당된 코어만큼만 intra-op 스레드를 준다.
+    UDF 배치마다 forward 한 번만 돌기 때문에 inter-op 병렬성은 쓸 일이 없어 1 로 둔다.
+    """
+    host_cpus = host_cpus or os.cpu_count() or 1
+    task_cpus = max(1, task_cpus)
+    executor_cores = min(executor_cores or host_cpus, host_cpus)
+    workers = max(1, executor_cores // task_cpus)
+    intra = max(1, min(task_cpus, host_cpus // workers))
+    return intra, 1
+
+def _apply_torch_threads() -> tuple[int, int]:
+    intra, interop = _plan_torch_threads(TASK_CPUS, EXECUTOR_CORES)
+    intra   = TORCH_THREADS or intra
+    interop = TORCH_INTEROP_THREADS or interop
+
+    torch.set_num_threads(intra)
+    try:
+        torch.set_num_interop_threads(interop)
+    except RuntimeError:
+        # inter-op 풀이 이미 시작된 프로세스에서는 변경 불가
+        interop = torch.get_num_interop_threads()
+    print(f"[INFO] torch threads: intra={intra}, interop={interop} "
+          f"(task_cpus={TASK_CPUS}, executor_cores={EXECUTOR_CORES or 'auto'})")
+    return intra, interop
+
+def _executor_cores_from_conf(spark: SparkSession) -> int:
+    conf = spark.sparkContext.getConf()
+    cores = conf.get("spark.executor.cores", None)
+    if cores:
+        return int(cores)
+    master = spark.sparkContext.master
+    if master.startswith("local[") and not master.startswith("local[*"):
+        return int(master[len("local["):].split(",")[0].rstrip("]"))
+    return 0  # 0 이면 worker 의 os.cpu_count() 사용
+
+def _apply_spark_cpu_conf(spark: SparkSession):
+    global TASK_CPUS, EXECUTOR_CORES
+    TASK_CPUS      = int(spark.sparkContext.getConf().get("spark.task.cpus", "1"))
+    EXECUTOR_CORES = _executor_cores_from_conf(spark)
 
 # ──────────────────────────────────────────────
 # 모델 로딩
@@ -37,42 +102,131 @@ def _resolve_model_path() -> str:
         return model_path
     raise FileNotFoundError(f"MODEL_PATH not found: {model_path}")
 
+def _from_pretrained(mp: str, **kwargs) -> BertForSequenceClassification:
+    return BertForSequenceClassification.from_pretrained(
+        mp,
+        local_files_only=True,
+        num_labels=2,
+        id2label={ "0": "negative", "1": "positive" },
+        label2id={ "negative": 0, "positive": 1 },
+        **kwargs
+    ).eval()
+
+# ──────────────────────────────────────────────
+# TorchScript 아티팩트 캐시
+# ──────────────────────────────────────────────
+def _compiled_version_key(mp: str) -> str:
+    """모델 파일 목록/크기/mtime + torch 버전 + MAX_LEN 으로 버전 키 생성"""
+    h = hashlib.sha1()
+    for name in sorted(os.listdir(mp)):
+        path = os.path.join(mp, name)
+        if os.path.isfile(path):
+            st = os.stat(path)
+            h.update(f"{name}:{st.st_size}:{int(st.st_mtime)};".encode())
+    h.update(f"torch={torch.__version__};max_len={MAX_LEN}".encode())
+    return h.hexdigest()[:16]
+
+def _compiled_artifact_path(mp: str) -> str:
+    out_dir = COMPILED_MODEL_DIR or os.path.join(mp, "compiled")
+    return os.path.join(out_dir, f"bert_ts_{_compiled_version_key(mp)}.pt")
+
+def _ensure_compiled_artifact(mp: str) -> str:
+    """아티팩트가 없으면 trace 해서 저장 (임시 파일 → rename 으로 worker 간 경합 방지)"""
+    path = _compiled_artifact_path(mp)
+    if os.path.exists(path):
+        return path
+
+    print(f"[INFO] Building TorchScript artifact: {path}")
+    t0 = time.perf_counter()
+    tokenizer = BertTokenizer.from_pretrained(mp, local_files_only=True)
+    model = _from_pretrained(mp, torchscript=True)
+    dummy = tokenizer(
+        ["warm-up"],
+        padding="max_length",
+        truncation=True,
+        return_tensors="pt",
+        max_length=MAX_LEN,
+    )
+    with torch.no_grad():
+        traced = torch.jit.trace(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+        )
+        traced = torch.jit.freeze(traced)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.jit.save(traced, tmp_path)
+    os.replace(tmp_path, path)
+    print(f"[INFO] TorchScript artifact saved in {time.perf_counter() - t0:.1f}s")
+    return path
+
+def _warm_up(tokenizer: BertTokenizer, model) -> float:
+    """더미 배치로 첫 forward 비용을 미리 지불 (TorchScript 는 2회 실행 후 최적화 그래프 고정)"""
+    t0 = time.perf_counter()
+    for _ in range(2 if COMPILED_MODEL else 1):
+        _forward(tokenizer, model, ["warm-up"])
+    return time.perf_counter() - t0
+
 def _load_model_once() -> tuple[BertTokenizer, BertForSequenceClassification]:
-    global TOKENIZER, MODEL
+    global TOKENIZER, MODEL, _THREADS_PID
+    # 모델이 UDF 와 함께 직렬화되어 올 수도 있으므로 스레드 설정은 프로세스 기준으로 적용
+    if _THREADS_PID != os.getpid():
+        _apply_torch_threads()
+        _THREADS_PID = os.getpid()
     if TOKENIZER is None or MODEL is None:
         mp = _resolve_model_path()
-        print(f"[INFO] Loading model from: {mp}")
+        t0 = time.perf_counter()
         TOKENIZER = BertTokenizer.from_pretrained(mp, local_files_only=True)
-        MODEL     = BertForSequenceClassification.from_pretrained(
-            mp,
-            local_files_only=True,
-            num_labels=2,
-            id2label={ "0": "negative", "1": "positive" },
-            label2id={ "negative": 0, "positive": 1 }
-        ).eval()
+        if COMPILED_MODEL:
+            artifact = _ensure_compiled_artifact(mp)
+            print(f"[INFO] Loading TorchScript model from: {artifact}")
+            MODEL = torch.jit.load(artifact).eval()
+        else:
+            print(f"[INFO] Loading model from: {mp}")
+            MODEL = _from_pretrained(mp)
+        load_sec = time.perf_counter() - t0
+        warm_sec = _warm_up(TOKENIZER, MODEL)
+        print(f"[INFO] Model warm-up (compiled={COMPILED_MODEL}): "
+              f"load={load_sec:.2f}s, first_batch={warm_sec:.2f}s")
     return TOKENIZER, MODEL
 
 # ──────────────────────────────────────────────
 # 추론 로직
 # ──────────────────────────────────────────────
-def _run_inference(texts: pd.Series) -> pd.Series:
-    tokenizer, model = _load_model_once()
+def _forward(tokenizer: BertTokenizer, model, texts: list[str]):
     inputs = tokenizer(
-        list(texts),
-        padding=True,
+        texts,
+        # trace 된 모델은 trace 시점의 시퀀스 길이로 고정
+        padding="max_length" if COMPILED_MODEL else True,
         truncation=True,
         return_tensors="pt",
         max_length=MAX_LEN,
     )
     with torch.no_grad():
-        logits = model(**inputs).logits
-        probs  = torch.softmax(logits, dim=1).cpu().numpy()[:, 1]
+        if COMPILED_MODEL:
+            logits = model(inputs["input_ids"], inputs["attention_mask"], inputs["token_type_ids"])[0]
+        else:
+            logits = model(**inputs).logits
+        return torch.softmax(logits, dim=1).cpu().numpy()[:, 1]
 
-    return pd.Series([
-        "positive" if p >= THRESH_POS else
-        "negative" if p < THRESH_NEG else "neutral"
-        for p in probs
-    ])
+PREDICTION_SCHEMA = "pred_label string, pos_prob double"
+
+def _run_inference_with_prob(texts: pd.Series) -> pd.DataFrame:
+    tokenizer, model = _load_model_once()
+    probs = _forward(tokenizer, model, list(texts))
+
+    return pd.DataFrame({
+        "pred_label": [
+            "positive" if p >= THRESH_POS else
+            "negative" if p < THRESH_NEG else "neutral"
+            for p in probs
+        ],
+        "pos_prob": probs.astype("float64"),
+    })
+
+def _run_inference(texts: pd.Series) -> pd.Series:
+    return _run_inference_with_prob(texts)["pred_label"]
 
 # ──────────────────────────────────────────────
 # CLI
@@ -93,16 +247,28 @@ def _build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--thresh_pos", type=float, default=None)
     parser.add_argument("--thresh_neg", type=float, default=None)
     parser.add_argument("--max_len",    type=int,   default=None)
+    parser.add_argument("--torch_threads",         type=int, default=None)
+    parser.add_argument("--torch_interop_threads", type=int, default=None)
+    parser.add_argument("--compiled_model", action="store_true",
+                        help="MODEL_PATH 에서 trace 한 TorchScript 아티팩트로 추론")
+    parser.add_argument("--dedup", action="store_true",
+                        help="MinHash LSH 근사 중복 클러스터별 대표 리뷰만 추론 후 결과 전파")
     return parser
 
 def _apply_cli_thresholds(args: argparse.Namespace):
-    global THRESH_POS, THRESH_NEG, MAX_LEN
+    global THRESH_POS, THRESH_NEG, MAX_LEN, TORCH_THREADS, TORCH_INTEROP_THREADS, COMPILED_MODEL
     if args.thresh_pos is not None:
         THRESH_POS = args.thresh_pos
     if args.thresh_neg is not None:
         THRESH_NEG = args.thresh_neg
     if args.max_len is not None:
         MAX_LEN = args.max_len
+    if args.torch_threads is not None:
+        TORCH_THREADS = args.torch_threads
+    if args.torch_interop_threads is not None:
+        TORCH_INTEROP_THREADS = args.torch_interop_threads
+    if args.compiled_model:
+        COMPILED_MODEL = True
 
 # ──────────────────────────────────────────────
 # 샘플링
@@ -175,16 +341,25 @@ def main() -> None:
     )
     spark.sparkContext.setLogLevel("INFO")
 
-    # 모델 및 토크나이저를 Spark 전체에서 공유
-    tokenizer, model = _load_model_once()
-    tokenizer_bcast = spark.sparkContext.broadcast(tokenizer)
-    model_bcast = spark.sparkContext.broadcast(model)
-
-    @F.pandas_udf("string")
-    def predict_sentiment_udf(text_col: pd.Series) -> pd.Series:
-        tokenizer = tokenizer_bcast.value
-        model = model_bcast.value
-        return _run_inference(text_col)
+    # worker 별 torch 스레드 계획 (UDF 와 함께 직렬화되어 executor 로 전달)
+    _apply_spark_cpu_conf(spark)
+
+    if COMPILED_MODEL:
+        # ScriptModule 은 pickle 불가 → driver 는 아티팩트만 준비하고 worker 가 직접 로드
+        _ensure_compiled_artifact(_resolve_model_path())
+        tokenizer_bcast = model_bcast = None
+    else:
+        # 모델 및 토크나이저를 Spark 전체에서 공유
+        tokenizer, model = _load_model_once()
+        tokenizer_bcast = spark.sparkContext.broadcast(tokenizer)
+        model_bcast = spark.sparkContext.broadcast(model)
+
+    @F.pandas_udf(PREDICTION_SCHEMA)
+    def predict_sentiment_udf(text_col: pd.Series) -> pd.DataFrame:
+        if model_bcast is not None:
+            tokenizer = tokenizer_bcast.value
+            model = model_bcast.value
+        return _run_inference_with_prob(text_col)
 
     bq_in  = f"{args.project}.{args.dataset}.{args.input_table}"
     bq_out = f"{args.project}.{args.dataset}.{args.output_table}"
@@ -216,11 +391,31 @@ def main() -> None:
     if args.test_limit <= 0 and args.npartitions > 0:
         df = df.repartition(args.npartitions)
 
-    # 추론
-    df = df.withColumn(
-        "pred_label",
-        predict_sentiment_udf(F.col("content"))
-    ).withColumn(
+    # 추론 (pos_prob 는 집계 job 의 평균 확률 계산에 사용)
+    if args.dedup:
+        # --dedup 일 때만 near_dup.py 필요 (streaming_main.py 등 main 을 import 하는 job 은 --py-files 에 없음)
+        from near_dup import tag_near_duplicates
+
+        # 근사 중복 클러스터 대표만 추론하고 같은 클러스터에 결과 전파
+        # (랜덤 샘플이 두 번 평가되어 달라지지 않도록 먼저 고정)
+        df = df.cache()
+        df = df.join(tag_near_duplicates(df), on="review_uid", how="inner")
+        df_pred = df.filter(F.col("is_representative")).select(
+            "dup_cluster_id",
+            predict_sentiment_udf(F.col("content")).alias("pred")
+        )
+        # 대표 추론 결과가 없는 클러스터의 행도 버리지 않고 직접 추론
+        df = df.join(df_pred, on="dup_cluster_id", how="left")
+        df_orphan = df.filter(F.col("pred").isNull()).drop("pred")
+        df = df.filter(F.col("pred").isNotNull()).unionByName(
+            df_orphan.withColumn("pred", predict_sentiment_udf(F.col("content")))
+        )
+    else:
+        df = df.withColumn("pred", predict_sentiment_udf(F.col("content")))
+
+    df = df.select(
+        "*", "pred.pred_label", "pred.pos_prob"
+    ).drop("pred").withColumn(
         "is_correct",
         (F.col("true_label") == F.col("pred_label"))
     )
@@ -237,6 +432,7 @@ def main() -> None:
           .write.format("bigquery")
           .option("table", bq_out)
           .option("partitionField", "run_date")
+          .option("allowFieldAddition", "true")
           .mode("append")
           .save()
     )
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Near-duplicate Review Detection (MinHash LSH)
+---------------------------------
+- content 의 문자 shingle -> MinHash 시그니처 -> LSH banding 으로 후보 버킷 생성
+- 버킷마다 최소 review_uid 를 대표로 두고 별(star) 형태 간선만 만들어 pairwise 비교 없이 선형 비용
+- 시그니처 일치율로 후보를 검증한 뒤 연결 요소(connected components)로 클러스터 id 부여
+
+단독 실행: spark-submit near_dup.py --input_table fact_reviews --output_table review_dup_clusters
+추론 연동: spark-submit --py-files near_dup.py main.py --dedup  (클러스터 대표 1건만 추론)
+"""
+
+import re
+import zlib
+import argparse
+
+import numpy as np
+import pandas as pd
+from pyspark.sql import SparkSession, DataFrame
+from pyspark.sql import functions as F
+
+# ──────────────────────────────────────────────
+# 하이퍼파라미터
+# ──────────────────────────────────────────────
+SHINGLE_K  = 3          # 한글은 음절 밀도가 높아 3-gram 이 짧은 리뷰에도 안정적
+NUM_PERM   = 64
+NUM_BANDS  = 16          # rows per band = 4 → 후보 임계 유사도 ≈ (1/16)^(1/4) ≈ 0.5
+SIM_THRESH = 0.7         # 시그니처 일치율(추정 Jaccard) 검증 기준
+MAX_CC_ITER = 50         # 안전장치. 수렴 전에 도달하면 대표 없는 클러스터가 생기므로 예외로 중단
+
+_PRIME = np.uint64((1 << 31) - 1)
+_RNG = np.random.RandomState(20250701)
+_PERM_A = _RNG.randint(1, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _RNG.randint(0, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+
+_WS_RE = re.compile(r"\s+")
+
+# ──────────────────────────────────────────────
+# MinHash
+# ──────────────────────────────────────────────
+def _shingle_hashes(text: str) -> np.ndarray:
+    text = _WS_RE.sub("", (text or "").lower())
+    if len(text) <= SHINGLE_K:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + SHINGLE_K] for i in range(len(text) - SHINGLE_K + 1)}
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) % int(_PRIME) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+def _minhash(text: str) -> np.ndarray:
+    h = _shingle_hashes(text)
+    # (a*h + b) mod p : a, h < 2^31 이라 uint64 에서 overflow 없음
+    return ((np.outer(_PERM_A, h) + _PERM_B[:, None]) % _PRIME).min(axis=1)
+
+def _band_keys(sig: np.ndarray) -> list[int]:
+    rows = NUM_PERM // NUM_BANDS
+    keys = []
+    for band in sig.reshape(NUM_BANDS, rows):
+        key = np.uint64(band.size)
+        with np.errstate(over="ignore"):
+            for v in band:
+                key = key * np.uint64(1000003) ^ v
+        keys.append(int(key & np.uint64(0x7FFFFFFFFFFFFFFF)))
+    return keys
+
+@F.pandas_udf("signature array<long>, band_keys array<long>")
+def minhash_udf(texts: pd.Series) -> pd.DataFrame:
+    sigs = [_minhash(t) for t in texts]
+    return pd.DataFrame({
+        "signature": [s.astype(np.int64).tolist() for s in sigs],
+        "band_keys": [_band_keys(s) for s in sigs],
+    })
+
+# ──────────────────────────────────────────────
+# 클러스터링
+# ──────────────────────────────────────────────
+def _candidate_edges(sigs: DataFrame, id_col: str) -> DataFrame:
+    bands = sigs.select(id_col, F.posexplode("band_keys").alias("band", "band_key"))
+    buckets = (
+        bands.groupBy("band", "band_key")
+             .agg(F.min(id_col).alias("rep"), F.count(F.lit(1)).alias("n"))
+             .filter(F.col("n") > 1)
+    )
+    # 버킷 내 모든 쌍 대신 (멤버 → 버킷 대표) 간선만 생성
+    return (
+        bands.join(buckets, ["band", "band_key"])
+             .filter(F.col(id_col) != F.col("rep"))
+             .select(F.col(id_col).alias("src"), F.col("rep").alias("dst"))
+             .distinct()
+    )
+
+def _verify_edges(edges: DataFrame, sigs: DataFrame, id_col: str) -> DataFrame:
+    a = sigs.select(F.col(id_col).alias("src"), F.col("signature").alias("sig_a"))
+    b = sigs.select(F.col(id_col).alias("dst"), F.col("signature").alias("sig_b"))
+    agree = F.expr(
+        "aggregate(zip_with(sig_a, sig_b, (x, y) -> int(x = y)), 0, (acc, x) -> acc + x)"
+    ) / F.lit(NUM_PERM)
+    return (
+        edges.join(a, "src").join(b, "dst")
+             .withColumn("similarity", agree)
+             .filter(F.col("similarity") >= SIM_THRESH)
+             .select("src", "dst")
+    )
+
+def _connected_components(ids: DataFrame, edges: DataFrame, id_col: str) -> DataFrame:
+    """최소 라벨 전파. 간선이 버킷 대표로 모이는 별 구조라 보통 몇 번 만에 수렴한다.
+
+    라벨이 더 이상 바뀌지 않을 때까지 반복하고, MAX_CC_ITER 안에 수렴하지 않으면 RuntimeError.
+    (중간에 멈추면 라벨이 클러스터 최소 id 가 아닌 노드가 남아 대표가 없는 클러스터가 생김)
+    """
+    undirected = edges.union(edges.select(F.col("dst").alias("src"), F.col("src").alias("dst"))).cache()
+    labels = ids.select(F.col(id_col).alias("node"), F.col(id_col).alias("label"))
+
+    for i in range(MAX_CC_ITER):
+        neighbor_min = (
+            undirected.join(labels.withColumnRenamed("node", "dst"), "dst")
+                      .groupBy(F.col("src").alias("node"))
+                      .agg(F.min("label").alias("nlabel"))
+        )
+        updated = (
+            labels.join(neighbor_min, "node", "left")
+                  .select("node", F.least("label", F.coalesce("nlabel", "label")).alias("label"))
+                  .localCheckpoint()
+        )
+        changed = updated.join(labels.withColumnRenamed("label", "old"), "node") \
+                         .filter(F.col("label") != F.col("old")).count()
+        labels = updated
+        print(f"[INFO] connected components iter {i + 1}: {changed} labels changed")
+        if changed == 0:
+            break
+    else:
+        undirected.unpersist()
+        raise RuntimeError(
+            f"connected components did not converge in {MAX_CC_ITER} iterations "
+            f"({changed} labels still changing)"
+        )
+
+    undirected.unpersist()
+    return labels
+
+def tag_near_duplicates(df: DataFrame, id_col: str = "review_uid", text_col: str = "content") -> DataFrame:
+    """(id_col, dup_cluster_id, cluster_size, is_representative) 반환. 대표 = 클러스터 내 최소 id"""
+    sigs = (
+        df.select(id_col, text_col)
+          .dropDuplicates([id_col])
+          .withColumn("mh", minhash_udf(F.col(text_col)))
+          .select(id_col, "mh.signature", "mh.band_keys")
+          .cache()
+    )
+    edges = _verify_edges(_candidate_edges(sigs, id_col), sigs, id_col)
+    labels = _connected_components(sigs.select(id_col), edges, id_col)
+
+    sizes = labels.groupBy("label").agg(F.count(F.lit(1)).alias("cluster_size"))
+    tagged = (
+        labels.join(sizes, "label")
+              .select(
+                  F.col("node").alias(id_col),
+                  F.col("label").alias("dup_cluster_id"),
+                  "cluster_size",
+                  (F.col("node") == F.col("label")).alias("is_representative"),
+              )
+    )
+    sigs.unpersist()
+    return tagged
+
+# ──────────────────────────────────────────────
+# 메인 (단독 실행)
+# ──────────────────────────────────────────────
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser("Near-duplicate review detection")
+    parser.add_argument("--project",         default="de6-2ez")
+    parser.add_argument("--dataset",         default="gold")
+    parser.add_argument("--input_table",     default="fact_reviews")
+    parser.add_argument("--output_table",    default="review_dup_clusters")
+    parser.add_argument("--temp_gcs_bucket", default="sentiment-pipeline")
+    parser.add_argument("--shuffle_partitions", type=int, default=16)
+    parser.add_argument("--read_parallelism",   type=int, default=8)
+    return parser
+
+def main() -> None:
+    args = _build_parser().parse_args()
+
+    spark = (
+        SparkSession.builder.appName("ReviewNearDuplicates")
+        .config("spark.sql.shuffle.partitions", str(args.shuffle_partitions))
+        .config("spark.sql.execution.arrow.pyspark.enabled", "true")
+        .config("temporaryGcsBucket", args.temp_gcs_bucket)
+        .getOrCreate()
+    )
+    spark.sparkContext.setLogLevel("INFO")
+
+    df = (
+        spark.read.format("bigquery")
+        .option("table", f"{args.project}.{args.dataset}.{args.input_table}")
+        .option("parallelism", str(args.read_parallelism))
+        .load()
+        .filter(F.col("content").isNotNull() & (F.col("content") != ""))
+    )
+
+    tagged = tag_near_duplicates(df).cache()
+    stats = tagged.agg(
+        F.count(F.lit(1)).alias("reviews"),
+        F.sum(F.col("is_representative").cast("int")).alias("clusters"),
+    ).first()
+    print(f"[RESULT] reviews: {stats.reviews}, clusters: {stats.clusters}, "
+          f"duplicates: {stats.reviews - stats.clusters}")
+
+    (
+        tagged.write.format("bigquery")
+              .option("table", f"{args.project}.{args.dataset}.{args.output_table}")
+              .mode("overwrite")
+              .save()
+    )
+    spark.stop()
+
+# ──────────────────────────────────────────────
+if __name__ == "__main__":
+    main()
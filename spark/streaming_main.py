@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Korean Sentiment Streaming Pipeline
+---------------------------------
+- raw-data/*/reviews/... CSV (GCS 또는 로컬 디렉토리) -> PySpark Structured Streaming -> BERT inference -> sink
+- 사이트별 컬럼(musinsa | naver | olive-young)을 공통 스키마로 정규화
+- 추론은 main.py 와 같은 엔진(_run_inference) 사용
+- sink: parquet (파일 sink 메타데이터 로그로 exactly-once) | bigquery (batch_id 기준 멱등 append)
+
+예) spark-submit --py-files main.py streaming_main.py \
+      --source_path "gs://de6-ez2/raw-data/*/reviews/*/*/*/*/" \
+      --checkpoint gs://sentiment-pipeline/checkpoints/reviews_stream \
+      --sink parquet --output_path gs://sentiment-pipeline/predicted_reviews_stream
+"""
+
+import io
+import re
+import argparse
+import datetime as _dt
+from typing import Iterator
+
+import pandas as pd
+from pyspark.sql import SparkSession, DataFrame
+from pyspark.sql import functions as F
+
+import main as engine
+
+# ──────────────────────────────────────────────
+# 사이트별 컬럼 매핑
+# ──────────────────────────────────────────────
+# raw-data/<site>/reviews/YYYY/MM/DD/<product_id>/<file>.csv
+SITE_COLUMNS = {
+    "musinsa":     {"review_id": "no",        "content": "content", "star": "grade",  "created_at": "createDate"},
+    "naver":       {"review_id": "review_id", "content": "content", "star": "rating", "created_at": "created_at"},
+    "olive-young": {"review_id": "review_id", "content": "review",  "star": "star",   "created_at": "date"},
+}
+
+NORMALIZED_SCHEMA = (
+    "review_uid string, site string, product_id string, review_id string, "
+    "content string, star int, created_at string, source_file string"
+)
+
+# driver 에서 CLI 로 바꾼 엔진 설정을 worker 의 main 모듈에 그대로 전달
+ENGINE_SETTINGS = (
+    "THRESH_POS", "THRESH_NEG", "MAX_LEN",
+    "TORCH_THREADS", "TORCH_INTEROP_THREADS", "TASK_CPUS", "EXECUTOR_CORES",
+    "COMPILED_MODEL", "COMPILED_MODEL_DIR",
+)
+
+def _site_from_path(path: str) -> str | None:
+    parts = path.split("/")
+    if "raw-data" in parts:
+        idx = parts.index("raw-data")
+        if idx + 2 < len(parts) and parts[idx + 2] == "reviews":
+            return parts[idx + 1]
+    return None
+
+def _product_id_from_path(path: str) -> str | None:
+    # .../reviews/YYYY/MM/DD/<product_id>/<file>.csv
+    parts = path.split("/")
+    return parts[-2] if len(parts) >= 2 else None
+
+def _normalize_file(path: str, text: str) -> pd.DataFrame:
+    site = _site_from_path(path)
+    mapping = SITE_COLUMNS.get(site)
+    if mapping is None:
+        print(f"[WARN] Unknown review source, skipped: {path}")
+        return pd.DataFrame()
+
+    raw = pd.read_csv(io.StringIO(text.lstrip("\ufeff")), dtype=str, keep_default_na=False)
+    if mapping["content"] not in raw.columns:
+        print(f"[WARN] '{mapping['content']}' column missing, skipped: {path}")
+        return pd.DataFrame()
+
+    def col(name: str) -> pd.Series:
+        src = mapping[name]
+        return raw[src] if src in raw.columns else pd.Series([""] * len(raw))
+
+    product_id = raw["product_id"] if "product_id" in raw.columns else pd.Series(
+        [_product_id_from_path(path)] * len(raw))
+    review_id = col("review_id")
+
+    out = pd.DataFrame({
+        "review_uid": site + "_" + product_id.astype(str) + "_" + review_id.astype(str),
+        "site":       site,
+        "product_id": product_id.astype(str),
+        "review_id":  review_id.astype(str),
+        "content":    col("content").astype(str).str.strip(),
+        "star":       pd.to_numeric(col("star"), errors="coerce"),
+        "created_at": col("created_at").astype(str),
+        "source_file": path,
+    })
+    return out
+
+def _normalize_partitions(batches: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    for pdf in batches:
+        frames = [_normalize_file(path, text) for path, text in zip(pdf["path"], pdf["value"])]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            continue
+        out = pd.concat(frames, ignore_index=True)
+        out["star"] = out["star"].round().astype("Int64")
+        yield out
+
+# ──────────────────────────────────────────────
+# 스트림 구성
+# ──────────────────────────────────────────────
+def _read_landing_stream(spark: SparkSession, args: argparse.Namespace) -> DataFrame:
+    # 파일마다 컬럼 구성이 달라(무신사는 flatten 결과) 파일 단위로 읽어 Python 에서 정규화
+    return (
+        spark.readStream
+        .option("wholetext", "true")
+        .option("pathGlobFilter", "*.csv")
+        .option("maxFilesPerTrigger", str(args.max_files_per_trigger))
+        .text(args.source_path)
+        .withColumn("path", F.input_file_name())
+        .mapInPandas(_normalize_partitions, schema=NORMALIZED_SCHEMA)
+        .filter(
+            F.col("content").isNotNull() &
+            (F.col("content") != "") &
+            F.col("star").isNotNull() &
+            (F.col("star") >= 1)
+        )
+        .withColumn(
+            "true_label",
+            F.when(F.col("star") >= 4, "positive")
+             .when(F.col("star") <= 2, "negative")
+             .otherwise("neutral")
+        )
+    )
+
+def _build_predict_udf(settings: dict):
+    @F.pandas_udf(engine.PREDICTION_SCHEMA)
+    def predict_sentiment_udf(text_col: pd.Series) -> pd.DataFrame:
+        for name, value in settings.items():
+            setattr(engine, name, value)
+        return engine._run_inference_with_prob(text_col)
+    return predict_sentiment_udf
+
+# BigQuery connector 가 테이블이 없을 때 내는 오류 메시지 (Py4JJavaError 문자열에 Java 예외가 포함됨)
+_TABLE_NOT_FOUND = re.compile(r"Not found: Table|Table .+ not found", re.IGNORECASE)
+
+def _is_table_not_found(exc: Exception) -> bool:
+    return bool(_TABLE_NOT_FOUND.search(str(exc)))
+
+def _sql_string(value: str) -> str:
+    """filter 절에 넣을 문자열 리터럴 (역슬래시/작은따옴표 이스케이프)"""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+def _write_bigquery_batch(bq_out: str, query_name: str):
+    """foreachBatch 용 writer. 재시작으로 같은 batch_id 가 다시 오면 건너뛴다."""
+    query_literal = _sql_string(query_name)
+
+    def _write(batch_df: DataFrame, batch_id: int) -> None:
+        spark = batch_df.sparkSession
+        try:
+            done = (
+                spark.read.format("bigquery")
+                .option("table", bq_out)
+                .option("filter", f"stream_query = {query_literal} AND stream_batch_id = {int(batch_id)}")
+                .load()
+                .limit(1)
+                .count()
+            )
+        except Exception as e:
+            # 첫 적재 전에는 테이블이 없음. 그 외 오류(일시 장애/권한)는 이미 커밋된 batch 를
+            # 중복 append 하지 않도록 그대로 올려 batch 를 실패시킨다 (재시작 시 재시도)
+            if not _is_table_not_found(e):
+                raise
+            done = 0
+        if done:
+            print(f"[INFO] batch {batch_id} already committed, skipped")
+            return
+
+        (
+            batch_df.withColumn("stream_query", F.lit(query_name))
+            .withColumn("stream_batch_id", F.lit(batch_id).cast("long"))
+            .write.format("bigquery")
+            .option("table", bq_out)
+            .option("partitionField", "run_date")
+            .option("allowFieldAddition", "true")
+            .mode("append")
+            .save()
+        )
+        print(f"[INFO] batch {batch_id} written to {bq_out}")
+    return _write
+
+# ──────────────────────────────────────────────
+# CLI
+# ──────────────────────────────────────────────
+def _build_parser() -> argparse.ArgumentParser:
+    parser = engine._build_parser()
+    parser.description = "Korean review sentiment streaming inference"
+    parser.add_argument("--source_path", required=True,
+                        help="리뷰 CSV 착지 경로 (예: gs://<bucket>/raw-data/*/reviews/*/*/*/*/ 또는 로컬 디렉토리)")
+    parser.add_argument("--checkpoint",  required=True)
+    parser.add_argument("--sink",        choices=["parquet", "bigquery"], default="parquet")
+    parser.add_argument("--output_path", default=None, help="parquet sink 경로")
+    parser.add_argument("--stream_table", default="predicted_reviews_stream", help="bigquery sink 테이블")
+    parser.add_argument("--trigger_seconds",       type=int, default=60)
+    parser.add_argument("--max_files_per_trigger", type=int, default=200)
+    parser.add_argument("--once", action="store_true", help="쌓인 파일만 처리하고 종료 (availableNow)")
+    return parser
+
+# ──────────────────────────────────────────────
+# 메인
+# ──────────────────────────────────────────────
+def main() -> None:
+    args = _build_parser().parse_args()
+    engine._apply_cli_thresholds(args)
+    if args.sink == "parquet" and not args.output_path:
+        raise ValueError("❌ parquet sink 는 --output_path 가 필요합니다.")
+
+    spark = (
+        SparkSession.builder.appName("KoreanSentimentStreaming")
+        .config("spark.sql.shuffle.partitions", str(args.shuffle_partitions))
+        .config("spark.sql.execution.arrow.pyspark.enabled", "true")
+        .config("spark.sql.execution.arrow.maxRecordsPerBatch", str(args.arrow_batch))
+        .config("spark.python.worker.reuse", "true")
+        .config("spark.network.timeout", "600s")
+        .config("spark.executor.heartbeatInterval", "60s")
+        .config("temporaryGcsBucket", args.temp_gcs_bucket)
+        .getOrCreate()
+    )
+    spark.sparkContext.setLogLevel("INFO")
+
+    engine._apply_spark_cpu_conf(spark)
+    if engine.COMPILED_MODEL:
+        engine._ensure_compiled_artifact(engine._resolve_model_path())
+    predict_sentiment_udf = _build_predict_udf(
+        {name: getattr(engine, name) for name in ENGINE_SETTINGS}
+    )
+
+    df = _read_landing_stream(spark, args)
+    if args.npartitions > 0:
+        df = df.repartition(args.npartitions)
+
+    df = (
+        df.withColumn("pred", predict_sentiment_udf(F.col("content")))
+          .select("*", "pred.pred_label", "pred.pos_prob")
+          .drop("pred")
+          .withColumn("is_correct", F.col("true_label") == F.col("pred_label"))
+          .withColumn("run_date", F.current_date())
+    )
+
+    query_name = "review_sentiment_stream"
+    writer = df.writeStream.queryName(query_name).option("checkpointLocation", args.checkpoint)
+    writer = writer.trigger(availableNow=True) if args.once else \
+        writer.trigger(processingTime=f"{args.trigger_seconds} seconds")
+
+    if args.sink == "parquet":
+        query = (
+            writer.format("parquet")
+            .option("path", args.output_path)
+            .partitionBy("run_date")
+            .outputMode("append")
+            .start()
+        )
+    else:
+        bq_out = f"{args.project}.{args.dataset}.{args.stream_table}"
+        query = writer.foreachBatch(_write_bigquery_batch(bq_out, query_name)).start()
+
+    print(f"[INFO] Streaming started at {_dt.datetime.now().isoformat()} "
+          f"(source={args.source_path}, sink={args.sink})")
+    query.awaitTermination()
+    spark.stop()
+
+# ──────────────────────────────────────────────
+if __name__ == "__main__":
+    main()